@@ -0,0 +1,38 @@
+"""Create guide_snapshots table
+
+Revision ID: 20240801_000001
+Revises: 20240716_000001
+Create Date: 2024-08-01 00:00:01.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20240801_000001"
+down_revision = "20240716_000001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "guide_snapshots",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("listing_id", sa.Integer(), nullable=False),
+        sa.Column("specific_item", sa.String(length=255), nullable=False, server_default=""),
+        sa.Column("language_code", sa.String(length=10), nullable=False),
+        sa.Column("checksum", sa.String(length=64), nullable=False),
+        sa.Column("document", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["listing_id"], ["listings.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "listing_id", "specific_item", "language_code", name="uq_guide_snapshot_scope"
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("guide_snapshots")
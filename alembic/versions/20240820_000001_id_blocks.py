@@ -0,0 +1,28 @@
+"""Create id_blocks table for batched consent ingestion
+
+Revision ID: 20240820_000001
+Revises: 20240810_000001
+Create Date: 2024-08-20 00:00:01.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20240820_000001"
+down_revision = "20240810_000001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "id_blocks",
+        sa.Column("name", sa.String(length=64), nullable=False),
+        sa.Column("next_id", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("id_blocks")
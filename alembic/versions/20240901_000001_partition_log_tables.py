@@ -0,0 +1,104 @@
+"""Range-partition consent_logs and admin_audit_logs by month on Postgres
+
+Revision ID: 20240901_000001
+Revises: 20240820_000001
+Create Date: 2024-09-01 00:00:01.000000
+"""
+
+from datetime import date, datetime, timezone
+
+from alembic import context, op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20240901_000001"
+down_revision = "20240820_000001"
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+TABLES = {
+    "consent_logs": {
+        "indexes": (("ix_consent_logs_listing_created", ["listing_id", "created_at"]),),
+        "foreign_keys": (("listing_id", "listings"), ("template_id", "consent_templates")),
+    },
+    "admin_audit_logs": {
+        "indexes": (),
+        "foreign_keys": (("user_id", "admin_users"),),
+    },
+}
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _tables():
+    # admin_audit_logs predates the migration chain on some deployments.
+    if context.is_offline_mode():
+        return tuple(TABLES)
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    return tuple(table for table in TABLES if table in existing)
+
+
+def _first_month(table: str) -> date:
+    today = datetime.now(timezone.utc).date().replace(day=1)
+    if context.is_offline_mode():
+        return today
+    oldest = op.get_bind().scalar(sa.text(f"SELECT min(created_at) FROM {table}"))
+    return min(oldest.date().replace(day=1), today) if oldest else today
+
+
+def _rebuild(table: str, partition_clause: str) -> None:
+    # The serial sequence is owned by the old table; keep it alive for the new one.
+    legacy = f"{table}_legacy"
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+    op.rename_table(table, legacy)
+    op.execute(
+        f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        f"{partition_clause}"
+    )
+
+
+def _finish(table: str, primary_key: str) -> None:
+    spec = TABLES[table]
+    legacy = f"{table}_legacy"
+    op.execute(f"INSERT INTO {table} SELECT * FROM {legacy}")
+    op.drop_table(legacy)
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY ({primary_key})")
+    for column, referred in spec["foreign_keys"]:
+        op.create_foreign_key(
+            f"{table}_{column}_fkey", table, referred, [column], ["id"], ondelete="SET NULL"
+        )
+    for name, columns in spec["indexes"]:
+        op.create_index(name, table, columns, unique=False)
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name != "postgresql":
+        return
+    for table in _tables():
+        first = _first_month(table)
+        last = _add_months(datetime.now(timezone.utc).date().replace(day=1), MONTHS_AHEAD)
+        _rebuild(table, " PARTITION BY RANGE (created_at)")
+        month = first
+        while month <= last:
+            upper = _add_months(month, 1)
+            op.execute(
+                f"CREATE TABLE {table}_p{month:%Y_%m} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month} 00:00+00') TO ('{upper} 00:00+00')"
+            )
+            month = upper
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+        _finish(table, "id, created_at")
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name != "postgresql":
+        return
+    for table in reversed(_tables()):
+        _rebuild(table, "")
+        _finish(table, "id")
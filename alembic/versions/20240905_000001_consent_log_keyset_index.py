@@ -0,0 +1,24 @@
+"""Add (created_at, id) index for keyset pagination of consent logs
+
+Revision ID: 20240905_000001
+Revises: 20240901_000001
+Create Date: 2024-09-05 00:00:01.000000
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20240905_000001"
+down_revision = "20240901_000001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_consent_logs_created_id", "consent_logs", ["created_at", "id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_consent_logs_created_id", table_name="consent_logs")
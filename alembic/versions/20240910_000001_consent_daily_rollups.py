@@ -0,0 +1,48 @@
+"""Create consent_daily_rollups and backfill it from consent_logs
+
+Revision ID: 20240910_000001
+Revises: 20240905_000001
+Create Date: 2024-09-10 00:00:01.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20240910_000001"
+down_revision = "20240905_000001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "consent_daily_rollups",
+        sa.Column("listing_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("template_version", sa.Integer(), nullable=False),
+        sa.Column("language_code", sa.String(length=10), nullable=False),
+        sa.Column("decision", sa.String(length=10), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["listing_id"], ["listings.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint(
+            "listing_id", "day", "template_version", "language_code", "decision"
+        ),
+    )
+    op.create_index("ix_consent_daily_rollups_day", "consent_daily_rollups", ["day"])
+    if op.get_context().dialect.name == "postgresql":
+        day = "(created_at AT TIME ZONE 'UTC')::date"
+    else:
+        day = "date(created_at)"
+    op.execute(
+        "INSERT INTO consent_daily_rollups "
+        "(listing_id, day, template_version, language_code, decision, count) "
+        f"SELECT listing_id, {day}, template_version, language_code, decision, count(*) "
+        "FROM consent_logs WHERE listing_id IS NOT NULL "
+        f"GROUP BY listing_id, {day}, template_version, language_code, decision"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_consent_daily_rollups_day", table_name="consent_daily_rollups")
+    op.drop_table("consent_daily_rollups")
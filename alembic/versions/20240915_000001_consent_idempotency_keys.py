@@ -0,0 +1,37 @@
+"""Create consent_idempotency_keys
+
+Revision ID: 20240915_000001
+Revises: 20240910_000001
+Create Date: 2024-09-15 00:00:01.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20240915_000001"
+down_revision = "20240910_000001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "consent_idempotency_keys",
+        sa.Column("key", sa.String(length=64), nullable=False),
+        sa.Column("listing_id", sa.Integer(), nullable=False),
+        sa.Column("response", sa.JSON(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["listing_id"], ["listings.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("key"),
+    )
+    op.create_index(
+        "ix_consent_idempotency_keys_expires_at", "consent_idempotency_keys", ["expires_at"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_consent_idempotency_keys_expires_at", table_name="consent_idempotency_keys"
+    )
+    op.drop_table("consent_idempotency_keys")
@@ -0,0 +1,49 @@
+"""Add the current published consent template pointer to listings and backfill it
+
+Revision ID: 20240920_000001
+Revises: 20240915_000001
+Create Date: 2024-09-20 00:00:01.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20240920_000001"
+down_revision = "20240915_000001"
+branch_labels = None
+depends_on = None
+
+LATEST_PUBLISHED = (
+    "FROM consent_templates WHERE consent_templates.listing_id = listings.id "
+    "AND consent_templates.status = 'published' "
+    "ORDER BY consent_templates.version DESC LIMIT 1"
+)
+
+
+def upgrade() -> None:
+    op.add_column("listings", sa.Column("current_template_id", sa.Integer(), nullable=True))
+    op.add_column(
+        "listings", sa.Column("current_template_version", sa.Integer(), nullable=True)
+    )
+    if op.get_context().dialect.name != "sqlite":
+        op.create_foreign_key(
+            "fk_listings_current_template_id",
+            "listings",
+            "consent_templates",
+            ["current_template_id"],
+            ["id"],
+            ondelete="SET NULL",
+        )
+    op.execute(
+        "UPDATE listings SET "
+        f"current_template_id = (SELECT consent_templates.id {LATEST_PUBLISHED}), "
+        f"current_template_version = (SELECT consent_templates.version {LATEST_PUBLISHED})"
+    )
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name != "sqlite":
+        op.drop_constraint("fk_listings_current_template_id", "listings", type_="foreignkey")
+    op.drop_column("listings", "current_template_version")
+    op.drop_column("listings", "current_template_id")
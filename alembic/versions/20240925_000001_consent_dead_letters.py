@@ -0,0 +1,35 @@
+"""Create consent_dead_letters
+
+Revision ID: 20240925_000001
+Revises: 20240920_000001
+Create Date: 2024-09-25 00:00:01.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20240925_000001"
+down_revision = "20240920_000001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "consent_dead_letters",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("listing_id", sa.Integer(), nullable=True),
+        sa.Column("row", sa.JSON(), nullable=False),
+        sa.Column("error", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_consent_dead_letters_listing_id", "consent_dead_letters", ["listing_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_consent_dead_letters_listing_id", table_name="consent_dead_letters")
+    op.drop_table("consent_dead_letters")
@@ -4,9 +4,15 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_admin
-from app.db.session import get_db
-from app.models import ConsentTemplate, ConsentTemplateStatusEnum, ConsentTemplateTranslation
+from app.db.session import get_db, get_read_db
+from app.models import (
+    ConsentTemplate,
+    ConsentTemplateStatusEnum,
+    ConsentTemplateTranslation,
+    Listing,
+)
 from app.schemas.consent import ConsentTemplateCreate, ConsentTemplateOut, ConsentTemplateUpdate
+from app.services.guide import invalidate_guide_cache, set_current_template
 
 router = APIRouter(dependencies=[Depends(get_current_admin)])
 
@@ -67,17 +73,21 @@ def update_consent_template(
     if payload.status:
         if payload.status not in {e.value for e in ConsentTemplateStatusEnum}:
             raise HTTPException(status_code=400, detail="Invalid status")
+        db.query(Listing.id).filter(Listing.id == template.listing_id).with_for_update().first()
         template.status = payload.status
         if payload.status == ConsentTemplateStatusEnum.PUBLISHED.value:
             template.published_at = datetime.utcnow()
+        db.flush()
+        set_current_template(db, template.listing_id)
     db.add(template)
     db.commit()
     db.refresh(template)
+    invalidate_guide_cache(template.listing_id, sections=["consent", "guide"])
     return template
 
 
 @router.get("/admin/listings/{listing_id}/consent-templates", response_model=list[ConsentTemplateOut], tags=["Admin"])
-def list_consent_templates(listing_id: int, db: Session = Depends(get_db)):
+def list_consent_templates(listing_id: int, db: Session = Depends(get_read_db)):
     return (
         db.query(ConsentTemplate)
         .filter(ConsentTemplate.listing_id == listing_id)
@@ -1,41 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_admin
-from app.db.session import get_db
-from app.models import FAQ, FAQTranslation
+from app.db.session import get_db, get_read_db
+from app.models import FAQ
 from app.schemas.faq import FAQCreate, FAQOut, FAQUpdate
+from app.services.content_types import FAQS, sync_translations
+from app.services.guide_snapshot import discard_snapshots, publish_guide_changes
 
 router = APIRouter(dependencies=[Depends(get_current_admin)])
 
 
-def _sync_faq_translations(faq: FAQ, translations: list[dict], db: Session) -> None:
-    existing = {tr.language_code: tr for tr in faq.translations}
-    incoming_codes = set()
-    for translation in translations:
-        code = translation["language_code"].lower()
-        incoming_codes.add(code)
-        if code in existing:
-            existing[code].question = translation["question"]
-            existing[code].answer = translation["answer"]
-            existing[code].links = translation.get("links")
-        else:
-            db.add(
-                FAQTranslation(
-                    faq=faq,
-                    language_code=code,
-                    question=translation["question"],
-                    answer=translation["answer"],
-                    links=translation.get("links"),
-                )
-            )
-    for code, translation in existing.items():
-        if code not in incoming_codes:
-            db.delete(translation)
-
-
 @router.post("/admin/faqs", response_model=FAQOut, tags=["Admin"])
-def create_faq(payload: FAQCreate, db: Session = Depends(get_db)) -> FAQOut:
+def create_faq(
+    payload: FAQCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)
+) -> FAQOut:
     faq = FAQ(
         listing_id=payload.listing_id,
         specific_item=payload.specific_item,
@@ -43,26 +22,38 @@ def create_faq(payload: FAQCreate, db: Session = Depends(get_db)) -> FAQOut:
     )
     db.add(faq)
     db.flush()
-    _sync_faq_translations(faq, [t.dict() for t in payload.translations], db)
+    sync_translations(db, FAQS, faq, [t.dict() for t in payload.translations])
+    discard_snapshots(db, faq.listing_id, [faq.specific_item])
     db.commit()
     db.refresh(faq)
+    publish_guide_changes(db, background_tasks, faq.listing_id, [faq.specific_item], [FAQS.section])
     return faq
 
 
 @router.put("/admin/faqs/{faq_id}", response_model=FAQOut, tags=["Admin"])
-def update_faq(faq_id: int, payload: FAQUpdate, db: Session = Depends(get_db)) -> FAQOut:
+def update_faq(
+    faq_id: int,
+    payload: FAQUpdate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+) -> FAQOut:
     faq = db.query(FAQ).filter(FAQ.id == faq_id).first()
     if not faq:
         raise HTTPException(status_code=404, detail="FAQ not found")
+    previous_item = faq.specific_item
     if payload.is_active is not None:
         faq.is_active = payload.is_active
     if payload.specific_item is not None:
         faq.specific_item = payload.specific_item
     if payload.translations is not None:
-        _sync_faq_translations(faq, [t.dict() for t in payload.translations], db)
+        sync_translations(db, FAQS, faq, [t.dict() for t in payload.translations])
     db.add(faq)
+    discard_snapshots(db, faq.listing_id, [previous_item, faq.specific_item])
     db.commit()
     db.refresh(faq)
+    publish_guide_changes(
+        db, background_tasks, faq.listing_id, [previous_item, faq.specific_item], [FAQS.section]
+    )
     return faq
 
 
@@ -76,7 +67,7 @@ def _list_faqs(listing_id: int, specific_item: str | None, db: Session) -> list[
 
 
 @router.get("/admin/listings/{listing_id}/faqs", response_model=list[FAQOut], tags=["Admin"])
-def list_faqs(listing_id: int, db: Session = Depends(get_db)) -> list[FAQOut]:
+def list_faqs(listing_id: int, db: Session = Depends(get_read_db)) -> list[FAQOut]:
     return _list_faqs(listing_id, None, db)
 
 
@@ -86,16 +77,21 @@ def list_faqs(listing_id: int, db: Session = Depends(get_db)) -> list[FAQOut]:
     tags=["Admin"],
 )
 def list_specific_faqs(
-    listing_id: int, specific_item: str, db: Session = Depends(get_db)
+    listing_id: int, specific_item: str, db: Session = Depends(get_read_db)
 ) -> list[FAQOut]:
     return _list_faqs(listing_id, specific_item, db)
 
 
 @router.delete("/admin/faqs/{faq_id}", tags=["Admin"])
-def delete_faq(faq_id: int, db: Session = Depends(get_db)) -> dict[str, str]:
+def delete_faq(
+    faq_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)
+) -> dict[str, str]:
     faq = db.query(FAQ).filter(FAQ.id == faq_id).first()
     if not faq:
         raise HTTPException(status_code=404, detail="FAQ not found")
+    listing_id, specific_item = faq.listing_id, faq.specific_item
     db.delete(faq)
+    discard_snapshots(db, listing_id, [specific_item])
     db.commit()
+    publish_guide_changes(db, background_tasks, listing_id, [specific_item], [FAQS.section])
     return {"status": "deleted"}
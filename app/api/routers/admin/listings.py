@@ -2,9 +2,11 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_admin
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.models import Listing
 from app.schemas.listing import ListingCreate, ListingOut, ListingUpdate
+from app.services.guide import invalidate_guide_cache
+from app.services.guide_snapshot import discard_snapshots
 
 router = APIRouter(dependencies=[Depends(get_current_admin)])
 
@@ -19,12 +21,12 @@ def create_listing(listing_in: ListingCreate, db: Session = Depends(get_db)) ->
 
 
 @router.get("/admin/listings", response_model=list[ListingOut], tags=["Admin"])
-def list_listings(db: Session = Depends(get_db)) -> list[ListingOut]:
+def list_listings(db: Session = Depends(get_read_db)) -> list[ListingOut]:
     return db.query(Listing).all()
 
 
 @router.get("/admin/listings/{listing_id}", response_model=ListingOut, tags=["Admin"])
-def get_listing(listing_id: int, db: Session = Depends(get_db)) -> ListingOut:
+def get_listing(listing_id: int, db: Session = Depends(get_read_db)) -> ListingOut:
     listing = db.query(Listing).filter(Listing.id == listing_id).first()
     if not listing:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Listing not found")
@@ -51,6 +53,8 @@ def delete_listing(listing_id: int, db: Session = Depends(get_db)):
     listing = db.query(Listing).filter(Listing.id == listing_id).first()
     if not listing:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Listing not found")
+    discard_snapshots(db, listing_id)
     db.delete(listing)
     db.commit()
+    invalidate_guide_cache(listing_id)
     return None
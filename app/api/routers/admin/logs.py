@@ -1,16 +1,93 @@
-from datetime import datetime
-from typing import Optional
+import base64
+import binascii
+import csv
+import io
+import json
+import zlib
+from itertools import chain, islice
+from datetime import date, datetime
+from typing import Any, Iterator, Literal, Mapping, Optional
 
-from fastapi import APIRouter, Depends
-from sqlalchemy import and_
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import case, func, select, tuple_
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_admin
-from app.db.session import get_db
-from app.models import ConsentLog
+from app.db.session import get_read_db
+from app.models import ConsentDailyRollup, ConsentLog
+from app.services.consent_archive import archived_before, as_utc, iter_archived_logs
+from app.utils.responses import FastJSONResponse, accepts_encoding, json_dumps
 
 router = APIRouter(dependencies=[Depends(get_current_admin)])
 
+LOG_COLUMNS = (
+    "id",
+    "listing_id",
+    "template_id",
+    "template_version",
+    "language_code",
+    "decision",
+    "email",
+    "ip_address",
+    "user_agent",
+    "created_at",
+)
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+STATS_GROUPS = {
+    "day": ConsentDailyRollup.day,
+    "listing": ConsentDailyRollup.listing_id,
+    "template_version": ConsentDailyRollup.template_version,
+    "language": ConsentDailyRollup.language_code,
+}
+EXPORT_BATCH_ROWS = 1000
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def _consent_log_conditions(
+    listing_id: Optional[int],
+    language: Optional[str],
+    decision: Optional[str],
+    start: Optional[datetime],
+    end: Optional[datetime],
+) -> list:
+    conditions = []
+    if listing_id is not None:
+        conditions.append(ConsentLog.listing_id == listing_id)
+    if language is not None:
+        conditions.append(ConsentLog.language_code == language)
+    if decision is not None:
+        conditions.append(ConsentLog.decision == decision)
+    if start is not None:
+        conditions.append(ConsentLog.created_at >= start)
+    if end is not None:
+        conditions.append(ConsentLog.created_at <= end)
+    return conditions
+
+
+def _consent_log_select(conditions: list):
+    return (
+        select(*(getattr(ConsentLog, column) for column in LOG_COLUMNS))
+        .where(*conditions)
+        .order_by(ConsentLog.created_at.desc(), ConsentLog.id.desc())
+    )
+
+
+def encode_cursor(created_at: datetime, log_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), log_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, log_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(log_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
 
 @router.get("/admin/consent-logs", tags=["Admin"])
 def list_consent_logs(
@@ -19,35 +96,153 @@ def list_consent_logs(
     decision: Optional[str] = None,
     start: Optional[datetime] = None,
     end: Optional[datetime] = None,
-    db: Session = Depends(get_db),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+):
+    conditions = _consent_log_conditions(listing_id, language, decision, start, end)
+    position = decode_cursor(cursor) if cursor is not None else None
+    if position is not None:
+        conditions.append(tuple_(ConsentLog.created_at, ConsentLog.id) < tuple_(*position))
+    watermark = archived_before()
+    if watermark is not None:
+        conditions.append(ConsentLog.created_at >= watermark)
+    rows = [
+        dict(row)
+        for row in db.execute(_consent_log_select(conditions).limit(limit + 1)).mappings()
+    ]
+    if len(rows) <= limit and _reaches_archive(watermark, start):
+        if rows:
+            position = (rows[-1]["created_at"], rows[-1]["id"])
+        archived = iter_archived_logs(listing_id, language, decision, start, end, before=position)
+        rows.extend(
+            {column: row[column] for column in LOG_COLUMNS}
+            for row in islice(archived, limit + 1 - len(rows))
+        )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+    return FastJSONResponse({"items": rows, "next_cursor": next_cursor})
+
+
+def _reaches_archive(watermark: Optional[datetime], start: Optional[datetime]) -> bool:
+    return watermark is not None and (start is None or as_utc(start) < watermark)
+
+
+def _stream_rows(bind: Engine, statement) -> Iterator[Mapping[str, Any]]:
+    # Runs on its own connection: the request's session is closed once the handler returns.
+    with bind.connect() as connection:
+        result = connection.execution_options(
+            stream_results=True, yield_per=EXPORT_BATCH_ROWS
+        ).execute(statement)
+        yield from result.mappings()
+
+
+def _export_lines(rows: Iterator[Mapping[str, Any]], format: str) -> Iterator[bytes]:
+    if format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(LOG_COLUMNS)
+        for row in rows:
+            writer.writerow(
+                value.isoformat() if isinstance(value, datetime) else value
+                for value in (row[column] for column in LOG_COLUMNS)
+            )
+            if buffer.tell() >= EXPORT_CHUNK_BYTES:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode("utf-8")
+    else:
+        chunk = bytearray()
+        for row in rows:
+            chunk += json_dumps({column: row[column] for column in LOG_COLUMNS}) + b"\n"
+            if len(chunk) >= EXPORT_CHUNK_BYTES:
+                yield bytes(chunk)
+                chunk.clear()
+        yield bytes(chunk)
+
+
+def _gzip(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+@router.get("/admin/consent-logs/export", tags=["Admin"])
+def export_consent_logs(
+    request: Request,
+    format: Literal["csv", "ndjson"] = "csv",
+    listing_id: Optional[int] = None,
+    language: Optional[str] = None,
+    decision: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: Session = Depends(get_read_db),
+):
+    conditions = _consent_log_conditions(listing_id, language, decision, start, end)
+    watermark = archived_before()
+    if watermark is not None:
+        conditions.append(ConsentLog.created_at >= watermark)
+    rows = _stream_rows(db.get_bind(), _consent_log_select(conditions))
+    if _reaches_archive(watermark, start):
+        rows = chain(rows, iter_archived_logs(listing_id, language, decision, start, end))
+    body = _export_lines(rows, format)
+    headers = {
+        "Content-Disposition": f'attachment; filename="consent-logs.{format}"',
+        "Vary": "Accept-Encoding",
+    }
+    if accepts_encoding(request.headers.get("accept-encoding"), "gzip"):
+        body = _gzip(body)
+        headers["Content-Encoding"] = "gzip"
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(body, media_type=media_type, headers=headers)
+
+
+@router.get("/admin/consent-stats", tags=["Admin"])
+def consent_stats(
+    listing_id: Optional[int] = None,
+    language: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    group_by: list[Literal["day", "listing", "template_version", "language"]] = Query(["day"]),
+    db: Session = Depends(get_read_db),
 ):
-    query = db.query(ConsentLog)
+    groups = list(dict.fromkeys(group_by))
     conditions = []
     if listing_id is not None:
-        conditions.append(ConsentLog.listing_id == listing_id)
+        conditions.append(ConsentDailyRollup.listing_id == listing_id)
     if language is not None:
-        conditions.append(ConsentLog.language_code == language)
-    if decision is not None:
-        conditions.append(ConsentLog.decision == decision)
+        conditions.append(ConsentDailyRollup.language_code == language)
     if start is not None:
-        conditions.append(ConsentLog.created_at >= start)
+        conditions.append(ConsentDailyRollup.day >= start)
     if end is not None:
-        conditions.append(ConsentLog.created_at <= end)
-    if conditions:
-        query = query.filter(and_(*conditions))
-    logs = query.order_by(ConsentLog.created_at.desc()).all()
-    return [
-        {
-            "id": log.id,
-            "listing_id": log.listing_id,
-            "template_id": log.template_id,
-            "template_version": log.template_version,
-            "language_code": log.language_code,
-            "decision": log.decision,
-            "email": log.email,
-            "ip_address": log.ip_address,
-            "user_agent": log.user_agent,
-            "created_at": log.created_at,
-        }
-        for log in logs
+        conditions.append(ConsentDailyRollup.day <= end)
+    columns = [STATS_GROUPS[group] for group in groups]
+    decisions = [
+        func.sum(case((ConsentDailyRollup.decision == decision, ConsentDailyRollup.count), else_=0))
+        for decision in ("accept", "decline")
     ]
+    rows = db.execute(
+        select(*columns, *decisions, func.sum(ConsentDailyRollup.count))
+        .where(*conditions)
+        .group_by(*columns)
+        .order_by(*columns)
+    ).all()
+    items = []
+    for row in rows:
+        *keys, accept, decline, total = row
+        items.append(
+            {
+                **dict(zip(groups, keys)),
+                "accept": accept,
+                "decline": decline,
+                "total": total,
+                "acceptance_rate": round(accept / total, 4),
+            }
+        )
+    return FastJSONResponse(items)
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Depends
+
+from app.api.deps import get_current_admin
+from app.db.pool import pool_stats
+from app.db.session import (
+    SQLITE_MODE,
+    async_engine,
+    async_write_engine,
+    engine,
+    read_router,
+    write_engine,
+)
+from app.services.consent_ingest import consent_ingestor
+from app.services.guide import guide_cache
+
+router = APIRouter(dependencies=[Depends(get_current_admin)])
+
+
+@router.get("/admin/metrics/cache", tags=["Admin"])
+def cache_metrics() -> dict[str, dict]:
+    return {"guide": guide_cache.stats()}
+
+
+@router.get("/admin/metrics/consent-ingest", tags=["Admin"])
+def consent_ingest_metrics() -> dict:
+    return consent_ingestor.stats()
+
+
+@router.get("/admin/metrics/replicas", tags=["Admin"])
+def replica_metrics() -> list[dict]:
+    return read_router.stats()
+
+
+@router.get("/admin/metrics/pool", tags=["Admin"])
+def pool_metrics() -> dict:
+    stats = {
+        "primary": pool_stats(engine),
+        "primary_async": pool_stats(async_engine),
+        "replicas": [
+            {"sync": pool_stats(sync), "async": pool_stats(async_) if async_ else None}
+            for sync, async_ in zip(read_router.engines, read_router.async_engines)
+        ],
+    }
+    if SQLITE_MODE:
+        stats["sqlite_writer"] = pool_stats(write_engine)
+        stats["sqlite_writer_async"] = pool_stats(async_write_engine)
+    return stats
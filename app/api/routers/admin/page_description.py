@@ -1,44 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_admin
-from app.db.session import get_db
-from app.models import PageDescription, PageDescriptionTranslation
+from app.db.session import get_db, get_read_db
+from app.models import PageDescription
 from app.schemas.page_description import (
     PageDescriptionCreate,
     PageDescriptionOut,
     PageDescriptionUpdate,
 )
+from app.services.content_types import PAGE_DESCRIPTIONS, sync_translations
+from app.services.guide_snapshot import discard_snapshots, publish_guide_changes
 
 router = APIRouter(dependencies=[Depends(get_current_admin)])
 
 
-def _sync_page_description_translations(
-    description: PageDescription, translations: list[dict], db: Session
-) -> None:
-    existing = {tr.language_code: tr for tr in description.translations}
-    incoming_codes = set()
-    for translation in translations:
-        code = translation["language_code"].lower()
-        incoming_codes.add(code)
-        if code in existing:
-            existing[code].body = translation["body"]
-        else:
-            db.add(
-                PageDescriptionTranslation(
-                    page_description=description,
-                    language_code=code,
-                    body=translation["body"],
-                )
-            )
-    for code, translation in existing.items():
-        if code not in incoming_codes:
-            db.delete(translation)
-
-
 @router.post("/admin/page-descriptions", response_model=PageDescriptionOut, tags=["Admin"])
 def create_page_description(
-    payload: PageDescriptionCreate, db: Session = Depends(get_db)
+    payload: PageDescriptionCreate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
 ) -> PageDescriptionOut:
     description = PageDescription(
         listing_id=payload.listing_id,
@@ -47,11 +28,19 @@ def create_page_description(
     )
     db.add(description)
     db.flush()
-    _sync_page_description_translations(
-        description, [t.dict() for t in payload.translations], db
+    sync_translations(
+        db, PAGE_DESCRIPTIONS, description, [t.dict() for t in payload.translations]
     )
+    discard_snapshots(db, description.listing_id, [description.specific_item])
     db.commit()
     db.refresh(description)
+    publish_guide_changes(
+        db,
+        background_tasks,
+        description.listing_id,
+        [description.specific_item],
+        [PAGE_DESCRIPTIONS.section],
+    )
     return description
 
 
@@ -61,24 +50,36 @@ def create_page_description(
     tags=["Admin"],
 )
 def update_page_description(
-    description_id: int, payload: PageDescriptionUpdate, db: Session = Depends(get_db)
+    description_id: int,
+    payload: PageDescriptionUpdate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
 ) -> PageDescriptionOut:
     description = (
         db.query(PageDescription).filter(PageDescription.id == description_id).first()
     )
     if not description:
         raise HTTPException(status_code=404, detail="Page description not found")
+    previous_item = description.specific_item
     if payload.is_active is not None:
         description.is_active = payload.is_active
     if payload.specific_item is not None:
         description.specific_item = payload.specific_item
     if payload.translations is not None:
-        _sync_page_description_translations(
-            description, [t.dict() for t in payload.translations], db
+        sync_translations(
+            db, PAGE_DESCRIPTIONS, description, [t.dict() for t in payload.translations]
         )
     db.add(description)
+    discard_snapshots(db, description.listing_id, [previous_item, description.specific_item])
     db.commit()
     db.refresh(description)
+    publish_guide_changes(
+        db,
+        background_tasks,
+        description.listing_id,
+        [previous_item, description.specific_item],
+        [PAGE_DESCRIPTIONS.section],
+    )
     return description
 
 
@@ -88,7 +89,7 @@ def update_page_description(
     tags=["Admin"],
 )
 def list_page_descriptions(
-    listing_id: int, db: Session = Depends(get_db)
+    listing_id: int, db: Session = Depends(get_read_db)
 ) -> list[PageDescriptionOut]:
     return _list_page_descriptions(listing_id, None, db)
 
@@ -110,18 +111,25 @@ def _list_page_descriptions(
     tags=["Admin"],
 )
 def list_specific_page_descriptions(
-    listing_id: int, specific_item: str, db: Session = Depends(get_db)
+    listing_id: int, specific_item: str, db: Session = Depends(get_read_db)
 ) -> list[PageDescriptionOut]:
     return _list_page_descriptions(listing_id, specific_item, db)
 
 
 @router.delete("/admin/page-descriptions/{description_id}", tags=["Admin"])
-def delete_page_description(description_id: int, db: Session = Depends(get_db)):
+def delete_page_description(
+    description_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)
+):
     description = (
         db.query(PageDescription).filter(PageDescription.id == description_id).first()
     )
     if not description:
         raise HTTPException(status_code=404, detail="Page description not found")
+    listing_id, specific_item = description.listing_id, description.specific_item
     db.delete(description)
+    discard_snapshots(db, listing_id, [specific_item])
     db.commit()
+    publish_guide_changes(
+        db, background_tasks, listing_id, [specific_item], [PAGE_DESCRIPTIONS.section]
+    )
     return {"status": "deleted"}
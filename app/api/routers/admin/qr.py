@@ -6,7 +6,7 @@ from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_admin
 from app.core.config import get_settings
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.models import Listing
 from app.schemas.qr import ListingQRCreate, ListingQRTokenOut
 from app.services.qr import create_qr_token, decode_qr_token
@@ -69,7 +69,7 @@ def generate_listing_qr(
 def get_listing_qr_image(
     listing_id: int,
     request: Request,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     require_consent: bool = True,
 ) -> RedirectResponse:
     listing = db.query(Listing).filter(Listing.id == listing_id).first()
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_admin
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.models import Listing, SpecificItem
 from app.schemas.specific_item import (
     SpecificItemCreate,
@@ -39,7 +39,7 @@ def _get_specific_item_or_404(
 
 
 @router.get("/admin/listings/{listing_id}/items", response_model=list[SpecificItemOut], tags=["Admin"])
-def list_specific_items(listing_id: int, db: Session = Depends(get_db)) -> list[SpecificItemOut]:
+def list_specific_items(listing_id: int, db: Session = Depends(get_read_db)) -> list[SpecificItemOut]:
     _get_listing_or_404(listing_id, db)
     return db.query(SpecificItem).filter(SpecificItem.listing_id == listing_id).all()
 
@@ -80,7 +80,7 @@ def create_specific_item(
     tags=["Admin"],
 )
 def get_specific_item(
-    listing_id: int, specific_item: str, db: Session = Depends(get_db)
+    listing_id: int, specific_item: str, db: Session = Depends(get_read_db)
 ) -> SpecificItemOut:
     _get_listing_or_404(listing_id, db)
     return _get_specific_item_or_404(listing_id, specific_item, db)
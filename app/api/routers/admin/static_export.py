@@ -0,0 +1,28 @@
+from typing import Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, status
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_admin
+from app.db.session import get_db
+from app.services.static_export import export_static_guides
+
+router = APIRouter(dependencies=[Depends(get_current_admin)])
+
+
+@router.post("/admin/static-export", status_code=status.HTTP_202_ACCEPTED, tags=["Admin"])
+def trigger_static_export(
+    background_tasks: BackgroundTasks,
+    listing_id: Optional[int] = None,
+    force: bool = False,
+    db: Session = Depends(get_db),
+) -> dict[str, str]:
+    background_tasks.add_task(
+        export_static_guides,
+        db.get_bind(),
+        listing_ids=None if listing_id is None else [listing_id],
+        force=force,
+        # the CLI renders in a process pool; in the API worker that would fork the server
+        workers=1,
+    )
+    return {"status": "scheduled"}
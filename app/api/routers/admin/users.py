@@ -4,7 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_admin
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.models import AdminRoleEnum, AdminUser
 from app.schemas.auth import AdminProfile, AdminUpdateRequest
 
@@ -19,7 +19,7 @@ def _ensure_admin_privileges(user: AdminUser) -> None:
 
 @router.get("", response_model=list[AdminProfile])
 def list_admins(
-    db: Session = Depends(get_db), current_admin: AdminUser = Depends(get_current_admin)
+    db: Session = Depends(get_read_db), current_admin: AdminUser = Depends(get_current_admin)
 ) -> list[AdminProfile]:
     _ensure_admin_privileges(current_admin)
     users = db.query(AdminUser).order_by(AdminUser.id).all()
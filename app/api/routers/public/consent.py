@@ -1,86 +1,139 @@
-from datetime import datetime
+from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
-from app.models import ConsentLog, ConsentTemplate, ConsentTemplateTranslation, Listing
+from app.core.config import get_settings
+from app.db.session import get_async_db, get_async_read_db
+from app.models import ConsentLog
 from app.schemas.consent import ConsentDecisionCreate, ConsentDecisionOut
+from app.services.consent_idempotency import (
+    IDEMPOTENCY_HEADER,
+    claim_keys,
+    find_response,
+    idempotency_key,
+    key_row,
+    recent_submissions,
+    stored_response,
+)
+from app.services.consent_ingest import ConsentQueueFullError, consent_ingestor
+from app.services.consent_stats import rollup_counts, rollup_upsert
+from app.services.guide import (
+    ConsentTemplateNotFoundError,
+    ConsentTranslationNotFoundError,
+    ListingNotFoundError,
+    load_consent,
+    published_template_version,
+)
+from app.services.language import negotiate_languages
 
-router = APIRouter()
-
+settings = get_settings()
 
-def _get_latest_published_template(db: Session, listing_id: int) -> ConsentTemplate | None:
-    return (
-        db.query(ConsentTemplate)
-        .filter(ConsentTemplate.listing_id == listing_id, ConsentTemplate.status == "published")
-        .order_by(ConsentTemplate.version.desc())
-        .first()
-    )
+router = APIRouter()
 
 
 @router.get("/public/listings/{listing_id}/consent", tags=["Public"])
-def get_consent_template(listing_id: int, language: str = "en", db: Session = Depends(get_db)):
-    listing = db.query(Listing).filter(Listing.id == listing_id).first()
-    if not listing:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Listing not found")
-    template = _get_latest_published_template(db, listing_id)
-    if not template:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Consent template not found")
-    translation = (
-        db.query(ConsentTemplateTranslation)
-        .filter(
-            ConsentTemplateTranslation.template_id == template.id,
-            ConsentTemplateTranslation.language_code == language,
-        )
-        .first()
-    )
-    if not translation:
-        translation = (
-            db.query(ConsentTemplateTranslation)
-            .filter(
-                ConsentTemplateTranslation.template_id == template.id,
-                ConsentTemplateTranslation.language_code == "en",
-            )
-            .first()
+async def get_consent_template(
+    listing_id: int,
+    request: Request,
+    language: str | None = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    languages = negotiate_languages(language, request.headers.get("accept-language"))
+    try:
+        etag, content_language, body = await db.run_sync(
+            load_consent, listing_id, languages, request.headers.get("if-none-match")
         )
-    if not translation:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Consent translation not found")
-    return {
-        "template_id": template.id,
-        "template_version": template.version,
-        "status": template.status,
-        "translation": {
-            "language_code": translation.language_code,
-            "title": translation.title,
-            "body": translation.body,
-        },
-    }
+    except ListingNotFoundError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Listing not found") from exc
+    except ConsentTemplateNotFoundError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Consent template not found"
+        ) from exc
+    except ConsentTranslationNotFoundError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Consent translation not found"
+        ) from exc
+    headers = {"ETag": etag, "Vary": "Accept-Language"}
+    if content_language is not None:
+        headers["Content-Language"] = content_language
+    if body is None:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    headers["Cache-Control"] = "no-cache"
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @router.post("/public/listings/{listing_id}/consent", response_model=ConsentDecisionOut, tags=["Public"])
-def submit_consent(
+async def submit_consent(
     listing_id: int,
     payload: ConsentDecisionCreate,
     request: Request,
-    db: Session = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
 ):
-    template = _get_latest_published_template(db, listing_id)
-    if not template or template.id != payload.template_id:
+    key = idempotency_key(
+        listing_id,
+        request.headers.get(IDEMPOTENCY_HEADER),
+        payload.template_version,
+        payload.language_code,
+        payload.decision,
+        payload.email,
+    )
+    replay = recent_submissions.get(key)
+    if replay is not None:
+        response.headers["Idempotent-Replayed"] = "true"
+        return replay
+    published = await db.run_sync(published_template_version, listing_id)
+    if published is None or published[0] != payload.template_id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid template")
-    if template.version != payload.template_version:
+    template_id, template_version = published
+    if template_version != payload.template_version:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Template version is stale")
-    log = ConsentLog(
-        listing_id=listing_id,
-        template_id=template.id,
-        template_version=template.version,
-        language_code=payload.language_code,
-        decision=payload.decision,
-        email=payload.email,
-        ip_address=request.client.host if request.client else None,
-        user_agent=request.headers.get("user-agent"),
-    )
+    values = {
+        "listing_id": listing_id,
+        "template_id": template_id,
+        "template_version": template_version,
+        "language_code": payload.language_code,
+        "decision": payload.decision,
+        "email": payload.email,
+        "ip_address": request.client.host if request.client else None,
+        "user_agent": request.headers.get("user-agent"),
+    }
+    if settings.consent_ingest_mode == "batch":
+        # a retry still in another worker's queue is dropped when its batch claims the key
+        replay = await db.run_sync(find_response, key)
+        if replay is not None:
+            response.headers["Idempotent-Replayed"] = "true"
+            return replay
+        try:
+            row = await run_in_threadpool(consent_ingestor.submit, values, key)
+        except ConsentQueueFullError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Consent queue is full",
+                headers={"Retry-After": "1"},
+            ) from exc
+        stored = stored_response(row)
+        recent_submissions.set(key, stored)
+        return stored
+    # a retry that reached another worker is caught when its key is claimed below
+    now = datetime.now(timezone.utc)
+    log = ConsentLog(**values, created_at=now, updated_at=now)
     db.add(log)
-    db.commit()
-    db.refresh(log)
-    return log
+    await db.flush()
+    stored = stored_response(log)
+    claimed = await db.scalar(claim_keys(db.bind.dialect.name, [key_row(key, listing_id, stored)]))
+    if claimed is None:
+        # a concurrent retry with the same key committed first
+        await db.rollback()
+        replay = await db.run_sync(find_response, key)
+        if replay is None:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Duplicate submission")
+        response.headers["Idempotent-Replayed"] = "true"
+        return replay
+    counts = rollup_counts([{**values, "created_at": now}])
+    await db.execute(rollup_upsert(db.bind.dialect.name, counts))
+    await db.commit()
+    recent_submissions.set(key, stored)
+    return stored
@@ -0,0 +1,53 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse
+
+from app.core.config import get_settings
+from app.services.language import negotiate_languages
+from app.services.static_export import STATIC_SECTIONS, export_root, find_static_file
+
+settings = get_settings()
+
+router = APIRouter()
+
+
+@router.get("/public/static/listings/{listing_id}/{section}", tags=["Public"])
+def get_static_section(
+    listing_id: int, section: str, request: Request, language: str | None = None
+) -> FileResponse:
+    return _serve(request, listing_id, None, section, language)
+
+
+@router.get("/public/static/listings/{listing_id}/{specific_item}/{section}", tags=["Public"])
+def get_static_specific_section(
+    listing_id: int,
+    specific_item: str,
+    section: str,
+    request: Request,
+    language: str | None = None,
+) -> FileResponse:
+    return _serve(request, listing_id, specific_item, section, language)
+
+
+def _serve(
+    request: Request,
+    listing_id: int,
+    specific_item: str | None,
+    section: str,
+    language: str | None,
+) -> FileResponse:
+    if section not in STATIC_SECTIONS:
+        raise HTTPException(status_code=404, detail="Unknown guide section")
+    languages = negotiate_languages(language, request.headers.get("accept-language"))
+    found = find_static_file(export_root(), listing_id, specific_item, section, languages)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Guide not exported")
+    path, content_language = found
+    return FileResponse(
+        path,
+        media_type="application/json",
+        headers={
+            "Content-Language": content_language,
+            "Vary": "Accept-Language",
+            "Cache-Control": f"public, max-age={settings.static_export_max_age_seconds}",
+        },
+    )
@@ -13,6 +13,20 @@ class Settings(BaseSettings):
     refresh_token_length: int = Field(64, env="REFRESH_TOKEN_LENGTH")
     database_url: Optional[str] = Field(None, env="DATABASE_URL")
     sqlite_url: str = Field("sqlite:///./app.db", env="SQLITE_URL")
+    database_read_urls: list[str] = Field(default_factory=list, env="DATABASE_READ_URLS")
+    replica_eject_seconds: int = Field(30, env="REPLICA_EJECT_SECONDS")
+    replica_sticky_seconds: int = Field(5, env="REPLICA_STICKY_SECONDS")
+    db_pool_size: int = Field(5, env="DB_POOL_SIZE")
+    db_max_overflow: int = Field(10, env="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(30, env="DB_POOL_TIMEOUT")
+    db_pool_recycle: int = Field(1800, env="DB_POOL_RECYCLE")
+    db_pool_pre_ping: bool = Field(True, env="DB_POOL_PRE_PING")
+    db_pool_warmup: Optional[int] = Field(None, env="DB_POOL_WARMUP")
+    sqlite_wal: bool = Field(True, env="SQLITE_WAL")
+    sqlite_synchronous: str = Field("NORMAL", env="SQLITE_SYNCHRONOUS")
+    sqlite_busy_timeout_ms: int = Field(5000, env="SQLITE_BUSY_TIMEOUT_MS")
+    sqlite_mmap_size: int = Field(256 * 1024 * 1024, env="SQLITE_MMAP_SIZE")
+    sqlite_cache_size: int = Field(-64 * 1024, env="SQLITE_CACHE_SIZE")
 
     public_frontend_base_url: Optional[str] = Field(
         "https://web.mrhost.top", env="PUBLIC_FRONTEND_BASE_URL"
@@ -33,6 +47,38 @@ class Settings(BaseSettings):
     reset_rate_limit: int = Field(5, env="RESET_RATE_LIMIT")
     totp_issuer: str = Field("MrHost Admin", env="TOTP_ISSUER")
 
+    cache_backend: str = Field("memory", env="CACHE_BACKEND")
+    cache_redis_url: str = Field("redis://localhost:6379/0", env="CACHE_REDIS_URL")
+    cache_key_prefix: str = Field("mqb:", env="CACHE_KEY_PREFIX")
+    guide_cache_enabled: bool = Field(True, env="GUIDE_CACHE_ENABLED")
+    guide_cache_ttl_seconds: int = Field(300, env="GUIDE_CACHE_TTL_SECONDS")
+    guide_cache_max_entries: int = Field(10000, env="GUIDE_CACHE_MAX_ENTRIES")
+    guide_cache_max_bytes: int = Field(64 * 1024 * 1024, env="GUIDE_CACHE_MAX_BYTES")
+
+    consent_ingest_mode: str = Field("sync", env="CONSENT_INGEST_MODE")
+    consent_batch_size: int = Field(500, env="CONSENT_BATCH_SIZE")
+    consent_batch_interval_ms: int = Field(200, env="CONSENT_BATCH_INTERVAL_MS")
+    consent_queue_max: int = Field(10000, env="CONSENT_QUEUE_MAX")
+    consent_id_block_size: int = Field(1000, env="CONSENT_ID_BLOCK_SIZE")
+    consent_drain_timeout_seconds: float = Field(30, env="CONSENT_DRAIN_TIMEOUT_SECONDS")
+    consent_idempotency_ttl_seconds: int = Field(24 * 60 * 60, env="CONSENT_IDEMPOTENCY_TTL_SECONDS")
+    consent_idempotency_max_entries: int = Field(10000, env="CONSENT_IDEMPOTENCY_MAX_ENTRIES")
+
+    consent_log_retention_days: Optional[int] = Field(None, env="CONSENT_LOG_RETENTION_DAYS")
+    audit_log_retention_days: Optional[int] = Field(None, env="AUDIT_LOG_RETENTION_DAYS")
+    log_partition_months_ahead: int = Field(3, env="LOG_PARTITION_MONTHS_AHEAD")
+    consent_archive_dir: str = Field("./consent_archive", env="CONSENT_ARCHIVE_DIR")
+    consent_archive_after_days: Optional[int] = Field(None, env="CONSENT_ARCHIVE_AFTER_DAYS")
+
+    static_export_dir: str = Field("./static_guides", env="STATIC_EXPORT_DIR")
+    static_export_workers: int = Field(0, env="STATIC_EXPORT_WORKERS")
+    static_export_max_age_seconds: int = Field(300, env="STATIC_EXPORT_MAX_AGE_SECONDS")
+
+    default_language: str = Field("en", env="DEFAULT_LANGUAGE")
+    language_fallbacks: dict[str, list[str]] = Field(
+        default_factory=dict, env="LANGUAGE_FALLBACKS"
+    )
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
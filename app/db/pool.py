@@ -0,0 +1,136 @@
+import logging
+import time
+from contextlib import AsyncExitStack, ExitStack
+from threading import Lock
+
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import get_settings
+from app.db.sqlite import is_sqlite_file
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+
+class PoolTelemetry:
+    """Counts checkouts and how long callers waited for a pooled connection."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, waited: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def stats(self) -> dict:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_ms_avg": round(self.wait_seconds_total / attempts * 1000, 3) if attempts else 0.0,
+                "wait_ms_max": round(self.wait_seconds_max * 1000, 3),
+            }
+
+
+class _TimedPoolMixin:
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.telemetry = PoolTelemetry()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.telemetry = self.telemetry
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.telemetry.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.telemetry.record(time.perf_counter() - started)
+        return connection
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(url: str, asynchronous: bool = False, writer: bool = False) -> dict:
+    """Pool settings for an engine; ``writer`` gives a one-connection pool whose
+    checkout queue serializes writes."""
+    options: dict = {}
+    if url.startswith("sqlite") and not asynchronous:
+        options["connect_args"] = {"check_same_thread": False}
+    if url.startswith("sqlite") and not is_sqlite_file(url):
+        return options
+    options.update(
+        poolclass=TimedAsyncQueuePool if asynchronous else TimedQueuePool,
+        pool_size=1 if writer else settings.db_pool_size,
+        max_overflow=0 if writer else settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+    )
+    return options
+
+
+def pool_stats(engine: Engine | AsyncEngine) -> dict:
+    pool = engine.pool
+    stats: dict = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+            timeout_seconds=pool.timeout(),
+        )
+    telemetry = getattr(pool, "telemetry", None)
+    if telemetry is not None:
+        stats.update(telemetry.stats())
+    return stats
+
+
+def _warmup_count(engine: Engine | AsyncEngine, connections: int | None) -> int:
+    if not isinstance(engine.pool, QueuePool):
+        return 0
+    size = engine.pool.size()
+    return size if connections is None else min(connections, size)
+
+
+def warm_pool(engine: Engine, connections: int | None = None) -> int:
+    """Open pooled connections up front so early requests skip connection setup."""
+    count = _warmup_count(engine, connections)
+    with ExitStack() as stack:
+        for _ in range(count):
+            stack.enter_context(engine.connect())
+    return count
+
+
+async def warm_async_pool(engine: AsyncEngine, connections: int | None = None) -> int:
+    count = _warmup_count(engine, connections)
+    async with AsyncExitStack() as stack:
+        for _ in range(count):
+            await stack.enter_async_context(engine.connect())
+    return count
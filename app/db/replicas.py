@@ -0,0 +1,151 @@
+import itertools
+import logging
+import time
+from hashlib import sha256
+from threading import Lock
+from typing import Callable
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.db.pool import engine_options
+from app.utils.cache import CacheBackend, MemoryCacheBackend
+
+logger = logging.getLogger(__name__)
+
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def _bearer_token(headers) -> str | None:
+    authorization = headers.get("authorization")
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return None
+    return authorization[7:].strip() or None
+
+
+def _sticky_key(token: str) -> str:
+    return "replica:sticky:" + sha256(token.encode("utf-8")).hexdigest()
+
+
+class ReplicaRouter:
+    """Round-robin over healthy read replicas, with ejection and read-your-writes stickiness.
+
+    Stickiness lives in ``backend`` so that, with a shared backend, a write on one worker
+    pins the token's reads on every worker.
+    """
+
+    def __init__(
+        self,
+        urls: list[str],
+        eject_seconds: float,
+        sticky_seconds: float,
+        async_url: Callable[[str], str],
+        clock: Callable[[], float] = time.monotonic,
+        backend: CacheBackend | None = None,
+    ) -> None:
+        self.eject_seconds = eject_seconds
+        self.sticky_seconds = sticky_seconds
+        self._clock = clock
+        self._lock = Lock()
+        self._counter = itertools.count()
+        self._ejected_until: dict[int, float] = {}
+        self.backend = backend or MemoryCacheBackend(clock)
+        self.engines: list[Engine] = []
+        self.async_engines: list[AsyncEngine] = []
+        for url in urls:
+            self.add_replica(
+                create_engine(url, **engine_options(url)),
+                create_async_engine(
+                    async_url(url), **engine_options(async_url(url), asynchronous=True)
+                ),
+            )
+
+    def add_replica(self, engine: Engine, async_engine: AsyncEngine | None = None) -> None:
+        index = len(self.engines)
+        self.engines.append(engine)
+        self.async_engines.append(async_engine)
+        self._watch(engine, index)
+        if async_engine is not None:
+            self._watch(async_engine.sync_engine, index)
+
+    def _watch(self, engine: Engine, index: int) -> None:
+        @event.listens_for(engine, "handle_error")
+        def eject_on_failure(context) -> None:
+            # connect failures and dropped connections, not ordinary SQL errors
+            if context.is_disconnect or context.connection is None:
+                self.eject(index)
+
+    def eject(self, index: int) -> None:
+        with self._lock:
+            self._ejected_until[index] = self._clock() + self.eject_seconds
+        logger.warning("Read replica %s ejected for %ss", index, self.eject_seconds)
+
+    def healthy(self) -> list[int]:
+        now = self._clock()
+        with self._lock:
+            return [
+                index
+                for index in range(len(self.engines))
+                if self._ejected_until.get(index, 0) <= now
+            ]
+
+    def choose(self) -> int | None:
+        healthy = self.healthy()
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)]
+
+    def stick(self, token: str) -> None:
+        self.backend.set(_sticky_key(token), b"1", self.sticky_seconds)
+
+    def is_sticky(self, headers) -> bool:
+        token = _bearer_token(headers)
+        if token is None:
+            return False
+        return self.backend.get(_sticky_key(token)) is not None
+
+    def route(self, headers) -> int | None:
+        """Replica index for a read, or None when it must go to the primary."""
+        if not self.engines or self.is_sticky(headers):
+            return None
+        return self.choose()
+
+    def stats(self) -> list[dict]:
+        healthy = set(self.healthy())
+        return [
+            {"replica": index, "url": engine.url.render_as_string(), "healthy": index in healthy}
+            for index, engine in enumerate(self.engines)
+        ]
+
+
+class ReadYourWritesMiddleware:
+    """Pins an admin token to the primary for a few seconds after a successful write."""
+
+    def __init__(self, app, router: ReplicaRouter) -> None:
+        self.app = app
+        self.router = router
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["method"] in READ_METHODS or not self.router.engines:
+            await self.app(scope, receive, send)
+            return
+        headers = {
+            name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]
+        }
+        token = _bearer_token(headers)
+        if token is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_and_stick(message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                self.router.stick(token)
+            await send(message)
+
+        await self.app(scope, receive, send_and_stick)
+
+
+def primary_bind(session):
+    """Bind to use for writes spawned from a (possibly replica) read session."""
+    return session.info.get("primary_bind", session.bind)
@@ -1,19 +1,91 @@
+from fastapi import Depends, Request
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import get_settings
+from app.db.pool import engine_options
+from app.db.replicas import ReplicaRouter
+from app.db.sqlite import RoutingSession, configure_sqlite, is_sqlite_file
+from app.utils.cache import get_cache_backend
 
 
 settings = get_settings()
 
 DATABASE_URL = settings.database_url or settings.sqlite_url
+# WAL, read pool and a single writer connection for file-backed SQLite
+SQLITE_MODE = settings.sqlite_wal and is_sqlite_file(DATABASE_URL)
+
+
+def create_sqlite_engines(
+    url: str,
+) -> tuple[Engine, Engine] | tuple[AsyncEngine, AsyncEngine]:
+    """Pooled read engine and single-connection writer engine for file-backed SQLite."""
+    asynchronous = "+aiosqlite" in url
+    create = create_async_engine if asynchronous else create_engine
+    reader = create(url, **engine_options(url, asynchronous=asynchronous))
+    writer = create(url, **engine_options(url, asynchronous=asynchronous, writer=True))
+    configure_sqlite(reader.sync_engine if asynchronous else reader)
+    configure_sqlite(writer.sync_engine if asynchronous else writer, writer=True)
+    return reader, writer
+
+
+if SQLITE_MODE:
+    engine, write_engine = create_sqlite_engines(DATABASE_URL)
+    SessionLocal = sessionmaker(
+        class_=RoutingSession,
+        reader=engine,
+        writer=write_engine,
+        autocommit=False,
+        autoflush=False,
+    )
+else:
+    engine = write_engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
-)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def async_database_url(url: str) -> str:
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith(("postgresql:", "postgres:")):
+        return "postgresql+psycopg:" + url.split(":", 1)[1]
+    return url
+
+
+ASYNC_DATABASE_URL = async_database_url(DATABASE_URL)
+
+if SQLITE_MODE:
+    async_engine, async_write_engine = create_sqlite_engines(ASYNC_DATABASE_URL)
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_write_engine,
+        class_=AsyncSession,
+        sync_session_class=RoutingSession,
+        reader=async_engine.sync_engine,
+        writer=async_write_engine.sync_engine,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+else:
+    async_engine = async_write_engine = create_async_engine(
+        ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL, asynchronous=True)
+    )
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
+read_router = ReplicaRouter(
+    settings.database_read_urls,
+    eject_seconds=settings.replica_eject_seconds,
+    sticky_seconds=settings.replica_sticky_seconds,
+    async_url=async_database_url,
+    backend=None if settings.cache_backend == "memory" else get_cache_backend(),
+)
 
 
 def get_db():
@@ -22,3 +94,33 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_read_db(request: Request, db: Session = Depends(get_db)):
+    replica = read_router.route(request.headers)
+    if replica is None:
+        yield db
+        return
+    session = Session(bind=read_router.engines[replica], autoflush=False)
+    session.info["primary_bind"] = db.bind
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+async def get_async_read_db(request: Request, db: AsyncSession = Depends(get_async_db)):
+    replica = read_router.route(request.headers)
+    if replica is None or read_router.async_engines[replica] is None:
+        yield db
+        return
+    async with AsyncSession(
+        bind=read_router.async_engines[replica], autoflush=False, expire_on_commit=False
+    ) as session:
+        session.info["primary_bind"] = db.bind
+        yield session
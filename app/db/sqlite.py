@@ -0,0 +1,152 @@
+"""SQLite production mode: WAL pragmas on every connection, reads from a pool and all
+writes funnelled through a single ``BEGIN IMMEDIATE`` writer.
+
+The sync engine (admin routes, background jobs) and the async engine (public routes) each
+have a one-connection writer engine, and both take the same per-database write gate before
+``BEGIN IMMEDIATE``, so within a process only one write transaction runs at a time. Other
+processes (extra uvicorn workers, CLI jobs) are serialized by SQLite's write lock and wait
+up to ``busy_timeout`` for it.
+"""
+
+import os
+import sqlite3
+from threading import Lock
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import AdaptedConnection, Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+WRITING = "sqlite_writing"
+HOLDS_GATE = "sqlite_write_gate"
+
+
+def is_sqlite_file(url: str) -> bool:
+    return url.startswith("sqlite") and not (
+        url.split("://", 1)[-1] in ("", "/") or ":memory:" in url
+    )
+
+
+def sqlite_pragmas() -> dict[str, object]:
+    return {
+        "journal_mode": "WAL",
+        "synchronous": settings.sqlite_synchronous,
+        "busy_timeout": settings.sqlite_busy_timeout_ms,
+        "mmap_size": settings.sqlite_mmap_size,
+        "cache_size": settings.sqlite_cache_size,
+        "foreign_keys": "ON",
+    }
+
+
+class WriteGate:
+    """One write transaction at a time across the writer engines of a database."""
+
+    def __init__(self, timeout: float) -> None:
+        self._lock = Lock()
+        self.timeout = timeout
+
+    def acquire(self) -> None:
+        if not self._lock.acquire(timeout=self.timeout):
+            raise sqlite3.OperationalError("database is locked")
+
+    def release(self) -> None:
+        self._lock.release()
+
+
+_gates: dict[str, WriteGate] = {}
+_gates_lock = Lock()
+
+
+def write_gate(database: str) -> WriteGate:
+    with _gates_lock:
+        return _gates.setdefault(
+            os.path.abspath(database), WriteGate(settings.sqlite_busy_timeout_ms / 1000)
+        )
+
+
+def _in_connection_thread(dbapi_connection, fn) -> None:
+    """Run ``fn`` on the thread that owns the connection: an aiosqlite writer waits for the
+    gate in its worker thread rather than blocking the event loop."""
+    if isinstance(dbapi_connection, AdaptedConnection):
+        # aiosqlite has no public hook for running a callable on its thread
+        dbapi_connection.run_async(lambda driver: driver._execute(fn))
+    else:
+        fn()
+
+
+def configure_sqlite(engine: Engine, writer: bool = False) -> None:
+    """Apply the pragmas on connect; a writer takes the database's write gate and then the
+    write lock when it begins, so a busy database waits instead of failing on lock
+    upgrade."""
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, _) -> None:
+        if writer:
+            dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for name, value in sqlite_pragmas().items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    if not writer:
+        return
+    gate = write_gate(engine.url.database)
+
+    def release(info: dict) -> None:
+        if info.pop(HOLDS_GATE, False):
+            gate.release()
+
+    @event.listens_for(engine, "begin")
+    def begin_immediate(connection) -> None:
+        pooled = connection.connection
+        try:
+            _in_connection_thread(pooled.dbapi_connection, gate.acquire)
+        except sqlite3.OperationalError as error:
+            raise exc.OperationalError("BEGIN IMMEDIATE", (), error) from error
+        pooled.info[HOLDS_GATE] = True
+        try:
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+        except Exception:
+            release(pooled.info)
+            raise
+
+    @event.listens_for(engine, "commit")
+    @event.listens_for(engine, "rollback")
+    def end_transaction(connection) -> None:
+        release(connection.connection.info)
+
+    # a connection checked in, invalidated or closed mid-transaction gives the gate back too
+    @event.listens_for(engine, "reset")
+    def reset(_, record, __) -> None:
+        release(record.info)
+
+    @event.listens_for(engine, "invalidate")
+    @event.listens_for(engine, "close")
+    def discard(_, record, *__) -> None:
+        release(record.info)
+
+
+class RoutingSession(Session):
+    """Reads go to ``reader``; once a transaction flushes or runs DML it stays on ``writer``."""
+
+    def __init__(self, *args, reader: Engine, writer: Engine, **kwargs) -> None:
+        kwargs.setdefault("bind", writer)
+        super().__init__(*args, **kwargs)
+        self.reader = reader
+        self.writer = writer
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.info.get(WRITING) or self._flushing or isinstance(clause, UpdateBase):
+            self.info[WRITING] = True
+            return self.writer
+        return self.reader
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _release_writer(session: Session, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(WRITING, None)
@@ -1,12 +1,61 @@
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.routes import router
 from app.core.config import get_settings
+from app.db.pool import warm_async_pool, warm_pool
+from app.db.replicas import ReadYourWritesMiddleware
+from app.db.session import (
+    SQLITE_MODE,
+    async_engine,
+    async_write_engine,
+    engine,
+    read_router,
+    write_engine,
+)
+from app.services.consent_ingest import consent_ingestor
+from app.services.partitions import ensure_partitions
+from app.utils.responses import FastJSONResponse
+
+logger = logging.getLogger(__name__)
 
 settings = get_settings()
 
-app = FastAPI(title=settings.app_name, debug=settings.debug)
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    try:
+        await run_in_threadpool(warm_pool, engine, settings.db_pool_warmup)
+        await warm_async_pool(async_engine, settings.db_pool_warmup)
+        if SQLITE_MODE:
+            await run_in_threadpool(warm_pool, write_engine)
+            await warm_async_pool(async_write_engine)
+    except Exception:
+        logger.exception("Database pool warmup failed")
+    try:
+        await run_in_threadpool(ensure_partitions, write_engine)
+    except Exception:
+        logger.exception("Log partition maintenance failed")
+    if settings.consent_ingest_mode == "batch":
+        consent_ingestor.start(write_engine)
+    yield
+    if settings.consent_ingest_mode == "batch":
+        await run_in_threadpool(consent_ingestor.drain, settings.consent_drain_timeout_seconds)
+    await async_engine.dispose()
+    if SQLITE_MODE:
+        await async_write_engine.dispose()
+
+
+app = FastAPI(
+    title=settings.app_name,
+    debug=settings.debug,
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan,
+)
 cors_origins = settings.cors_allow_origins or (
     [settings.public_frontend_base_url]
     if settings.public_frontend_base_url
@@ -20,6 +69,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ReadYourWritesMiddleware, router=read_router)
 app.include_router(router)
 
 
@@ -7,12 +7,17 @@ from app.models.entities import (
     AdminRefreshToken,
     AdminRoleEnum,
     AdminUser,
+    ConsentDailyRollup,
+    ConsentDeadLetter,
+    ConsentIdempotencyKey,
     ConsentLog,
     ConsentTemplate,
     ConsentTemplateStatusEnum,
     ConsentTemplateTranslation,
     FAQ,
     FAQTranslation,
+    GuideSnapshot,
+    IdBlock,
     Listing,
     PageDescription,
     PageDescriptionTranslation,
@@ -30,12 +35,17 @@ __all__ = [
     "AdminRefreshToken",
     "AdminRoleEnum",
     "AdminUser",
+    "ConsentDailyRollup",
+    "ConsentDeadLetter",
+    "ConsentIdempotencyKey",
     "ConsentLog",
     "ConsentTemplate",
     "ConsentTemplateStatusEnum",
     "ConsentTemplateTranslation",
     "FAQ",
     "FAQTranslation",
+    "GuideSnapshot",
+    "IdBlock",
     "Listing",
     "PageDescription",
     "PageDescriptionTranslation",
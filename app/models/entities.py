@@ -3,10 +3,13 @@ from enum import Enum
 from uuid import uuid4
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     Column,
+    Date,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -40,11 +43,26 @@ class Listing(Base, TimestampMixin):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
     slug = Column(String(255), unique=True, nullable=False)
+    # highest published consent template, kept in step by set_current_template()
+    current_template_id = Column(
+        Integer,
+        ForeignKey(
+            "consent_templates.id",
+            ondelete="SET NULL",
+            use_alter=True,
+            name="fk_listings_current_template_id",
+        ),
+        nullable=True,
+    )
+    current_template_version = Column(Integer, nullable=True)
 
     faqs = relationship("FAQ", back_populates="listing", cascade="all, delete-orphan")
     tutorials = relationship("Tutorial", back_populates="listing", cascade="all, delete-orphan")
     consent_templates = relationship(
-        "ConsentTemplate", back_populates="listing", cascade="all, delete-orphan"
+        "ConsentTemplate",
+        back_populates="listing",
+        cascade="all, delete-orphan",
+        foreign_keys="ConsentTemplate.listing_id",
     )
     page_descriptions = relationship(
         "PageDescription",
@@ -87,7 +105,7 @@ class ConsentTemplate(Base, TimestampMixin):
     status = Column(String(50), nullable=False, default=ConsentTemplateStatusEnum.DRAFT.value)
     published_at = Column(DateTime(timezone=True), nullable=True)
 
-    listing = relationship("Listing", back_populates="consent_templates")
+    listing = relationship("Listing", back_populates="consent_templates", foreign_keys=[listing_id])
     translations = relationship(
         "ConsentTemplateTranslation",
         back_populates="template",
@@ -95,7 +113,10 @@ class ConsentTemplate(Base, TimestampMixin):
     )
     logs = relationship("ConsentLog", back_populates="template")
 
-    __table_args__ = (UniqueConstraint("listing_id", "version", name="uq_template_version"),)
+    __table_args__ = (
+        UniqueConstraint("listing_id", "version", name="uq_template_version"),
+        Index("ix_consent_templates_listing_status_version", "listing_id", "status", "version"),
+    )
 
 
 class ConsentTemplateTranslation(Base, TimestampMixin):
@@ -129,6 +150,10 @@ class FAQ(Base, TimestampMixin):
         "FAQTranslation", back_populates="faq", cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        Index("ix_faqs_listing_scope", "listing_id", "specific_item", "is_active"),
+    )
+
 
 class FAQTranslation(Base, TimestampMixin):
     __tablename__ = "faq_translations"
@@ -158,6 +183,10 @@ class Tutorial(Base, TimestampMixin):
         "TutorialTranslation", back_populates="tutorial", cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        Index("ix_tutorials_listing_scope", "listing_id", "specific_item", "is_active"),
+    )
+
 
 class TutorialTranslation(Base, TimestampMixin):
     __tablename__ = "tutorial_translations"
@@ -196,6 +225,52 @@ class ConsentLog(Base, TimestampMixin):
 
     template = relationship("ConsentTemplate", back_populates="logs")
 
+    __table_args__ = (
+        Index("ix_consent_logs_listing_created", "listing_id", "created_at"),
+        Index("ix_consent_logs_created_id", "created_at", "id"),
+    )
+
+
+class ConsentDailyRollup(Base):
+    """Consent decision counts per listing, template version, language, decision and UTC day."""
+
+    __tablename__ = "consent_daily_rollups"
+
+    listing_id = Column(Integer, ForeignKey("listings.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    template_version = Column(Integer, primary_key=True)
+    language_code = Column(String(10), primary_key=True)
+    decision = Column(String(10), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (Index("ix_consent_daily_rollups_day", "day"),)
+
+
+class ConsentIdempotencyKey(Base):
+    """Stored response for a consent submission, replayed when the same key is retried."""
+
+    __tablename__ = "consent_idempotency_keys"
+
+    key = Column(String(64), primary_key=True)
+    listing_id = Column(Integer, ForeignKey("listings.id", ondelete="CASCADE"), nullable=False)
+    response = Column(json_type(), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class ConsentDeadLetter(Base):
+    """Queued consent log the database rejected, kept with the error for replay."""
+
+    __tablename__ = "consent_dead_letters"
+
+    id = Column(Integer, primary_key=True)
+    # no foreign key: the listing may be the reason the row was rejected
+    listing_id = Column(Integer, nullable=True, index=True)
+    row = Column(json_type(), nullable=False)
+    error = Column(Text, nullable=False)
+    created_at = Column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False
+    )
+
 
 class PageDescription(Base, TimestampMixin):
     __tablename__ = "page_descriptions"
@@ -212,6 +287,10 @@ class PageDescription(Base, TimestampMixin):
         cascade="all, delete-orphan",
     )
 
+    __table_args__ = (
+        Index("ix_page_descriptions_listing_scope", "listing_id", "specific_item", "is_active"),
+    )
+
 
 class PageDescriptionTranslation(Base, TimestampMixin):
     __tablename__ = "page_description_translations"
@@ -232,6 +311,35 @@ class PageDescriptionTranslation(Base, TimestampMixin):
             name="uq_page_description_language",
         ),
     )
+
+
+class GuideSnapshot(Base, TimestampMixin):
+    __tablename__ = "guide_snapshots"
+
+    id = Column(Integer, primary_key=True)
+    listing_id = Column(Integer, ForeignKey("listings.id", ondelete="CASCADE"), nullable=False)
+    # "" stands for the listing-level guide so the unique constraint also covers it
+    specific_item = Column(String(255), nullable=False, default="")
+    language_code = Column(String(10), nullable=False)
+    checksum = Column(String(64), nullable=False)
+    document = Column(json_type(), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "listing_id", "specific_item", "language_code", name="uq_guide_snapshot_scope"
+        ),
+    )
+
+
+class IdBlock(Base):
+    """Next id to hand out for tables whose ids are reserved in blocks ahead of insert."""
+
+    __tablename__ = "id_blocks"
+
+    name = Column(String(64), primary_key=True)
+    next_id = Column(BigInteger, nullable=False)
+
+
 class AdminRoleEnum(str, Enum):
     SUPERADMIN = "superadmin"
     ADMIN = "admin"
@@ -290,6 +398,8 @@ class AdminRefreshToken(Base, TimestampMixin):
     user = relationship("AdminUser", back_populates="refresh_tokens", foreign_keys=[user_id])
     replaced_by = relationship("AdminRefreshToken", remote_side=[id])
 
+    __table_args__ = (Index("ix_admin_refresh_tokens_user_expires", "user_id", "expires_at"),)
+
 
 class AdminPasswordResetToken(Base, TimestampMixin):
     __tablename__ = "admin_password_reset_tokens"
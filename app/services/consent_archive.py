@@ -0,0 +1,239 @@
+"""Cold archival of old consent logs into gzip NDJSON segment files.
+
+Each run moves logs older than ``CONSENT_ARCHIVE_AFTER_DAYS`` out of ``consent_logs`` into
+one segment per listing and month (rows newest first), listed in ``index.json`` together
+with the ``archived_before`` watermark: every archived row is older than it and every row
+still in the table is at least as new, so readers page through the table first and then
+continue into the segments.
+
+    python -m app.services.consent_archive [--older-than-days N]
+"""
+
+import argparse
+import copy
+import gzip
+import heapq
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.engine import Engine
+
+from app.core.config import get_settings
+from app.models import ConsentLog
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+INDEX_FILE = "index.json"
+ARCHIVE_COLUMNS = tuple(column.name for column in ConsentLog.__table__.columns)
+DATETIME_COLUMNS = ("created_at", "updated_at")
+
+_index_cache: dict[str, tuple[float, dict]] = {}
+
+
+def as_utc(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def archive_path(archive_dir: Optional[str] = None) -> Path:
+    return Path(archive_dir or settings.consent_archive_dir)
+
+
+def load_index(archive_dir: Optional[str] = None) -> dict:
+    path = archive_path(archive_dir) / INDEX_FILE
+    try:
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        return {"archived_before": None, "segments": []}
+    cached = _index_cache.get(str(path))
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, json.loads(path.read_text()))
+        _index_cache[str(path)] = cached
+    return cached[1]
+
+
+def archived_before(archive_dir: Optional[str] = None) -> Optional[datetime]:
+    watermark = load_index(archive_dir)["archived_before"]
+    return datetime.fromisoformat(watermark) if watermark else None
+
+
+def _write_index(root: Path, index: dict) -> None:
+    temporary = root / f"{INDEX_FILE}.tmp"
+    temporary.write_text(json.dumps(index, indent=2))
+    os.replace(temporary, root / INDEX_FILE)
+
+
+def _encode(row: dict[str, Any]) -> bytes:
+    record = {
+        column: as_utc(row[column]).isoformat() if column in DATETIME_COLUMNS else row[column]
+        for column in ARCHIVE_COLUMNS
+    }
+    return json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def _decode(line: bytes) -> dict[str, Any]:
+    record = json.loads(line)
+    for column in DATETIME_COLUMNS:
+        record[column] = datetime.fromisoformat(record[column])
+    return record
+
+
+class _SegmentWriter:
+    def __init__(self, root: Path, listing_id: Optional[int], month: str, run: str) -> None:
+        listing = "none" if listing_id is None else listing_id
+        self.relative = f"{month}/listing-{listing}-{run}.ndjson.gz"
+        self.path = root / self.relative
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = gzip.open(self.path, "wb")
+        self.entry = {"path": self.relative, "listing_id": listing_id, "month": month, "rows": 0}
+
+    def write(self, row: dict[str, Any]) -> None:
+        self.file.write(_encode(row))
+        self.entry["rows"] += 1
+
+    def close(self) -> dict:
+        self.file.close()
+        return self.entry
+
+
+def archive_consent_logs(
+    bind: Engine,
+    archive_dir: Optional[str] = None,
+    older_than_days: Optional[int] = None,
+    now: Optional[datetime] = None,
+) -> dict:
+    """Move logs older than the cutoff into new segments, then delete them from the table."""
+    days = settings.consent_archive_after_days if older_than_days is None else older_than_days
+    if days is None:
+        raise ValueError("CONSENT_ARCHIVE_AFTER_DAYS is not set")
+    root = archive_path(archive_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=days)
+    index = copy.deepcopy(load_index(archive_dir))
+    previous = archived_before(archive_dir)
+    result = {"archived_rows": 0, "segments": 0, "archived_before": index["archived_before"]}
+
+    with bind.begin() as connection:
+        if previous is not None:
+            # rows left behind by a run that stopped after updating the index
+            connection.execute(delete(ConsentLog).where(ConsentLog.created_at < previous))
+    if previous is not None and cutoff <= previous:
+        return result
+
+    conditions = [ConsentLog.created_at < cutoff]
+    if previous is not None:
+        conditions.append(ConsentLog.created_at >= previous)
+    statement = (
+        select(*(ConsentLog.__table__.c[column] for column in ARCHIVE_COLUMNS))
+        .where(*conditions)
+        .order_by(
+            ConsentLog.listing_id, ConsentLog.created_at.desc(), ConsentLog.id.desc()
+        )
+    )
+    run = now.strftime("%Y%m%dT%H%M%S")
+    segments: list[dict] = []
+    writer: Optional[_SegmentWriter] = None
+    with bind.connect() as connection:
+        rows = connection.execution_options(stream_results=True, yield_per=1000).execute(
+            statement
+        )
+        for row in rows.mappings():
+            month = as_utc(row["created_at"]).strftime("%Y-%m")
+            if writer is None or (writer.entry["listing_id"], writer.entry["month"]) != (
+                row["listing_id"],
+                month,
+            ):
+                if writer is not None:
+                    segments.append(writer.close())
+                writer = _SegmentWriter(root, row["listing_id"], month, run)
+            writer.write(dict(row))
+    if writer is not None:
+        segments.append(writer.close())
+
+    index["segments"].extend(segments)
+    index["archived_before"] = cutoff.isoformat()
+    _write_index(root, index)
+    with bind.begin() as connection:
+        connection.execute(delete(ConsentLog).where(*conditions))
+    result.update(
+        archived_rows=sum(segment["rows"] for segment in segments),
+        segments=len(segments),
+        archived_before=index["archived_before"],
+    )
+    logger.info("Archived consent logs: %s", result)
+    return result
+
+
+def _read_segment(path: Path) -> Iterator[dict[str, Any]]:
+    with gzip.open(path, "rb") as file:
+        for line in file:
+            yield _decode(line)
+
+
+def iter_archived_logs(
+    listing_id: Optional[int] = None,
+    language: Optional[str] = None,
+    decision: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    before: Optional[tuple[datetime, int]] = None,
+    archive_dir: Optional[str] = None,
+) -> Iterator[dict[str, Any]]:
+    """Archived logs matching the filters, newest first, strictly after ``before`` in that order."""
+    root = archive_path(archive_dir)
+    start = as_utc(start) if start else None
+    end = as_utc(end) if end else None
+    before = (as_utc(before[0]), before[1]) if before else None
+    upper = min((value for value in (end, before and before[0]) if value), default=None)
+    months: dict[str, list[Path]] = {}
+    for segment in load_index(archive_dir)["segments"]:
+        if listing_id is not None and segment["listing_id"] != listing_id:
+            continue
+        if start and segment["month"] < start.strftime("%Y-%m"):
+            continue
+        if upper and segment["month"] > upper.strftime("%Y-%m"):
+            continue
+        months.setdefault(segment["month"], []).append(root / segment["path"])
+    for month in sorted(months, reverse=True):
+        merged = heapq.merge(
+            *(_read_segment(path) for path in months[month]),
+            key=lambda row: (row["created_at"], row["id"]),
+            reverse=True,
+        )
+        for row in merged:
+            if before and (row["created_at"], row["id"]) >= before:
+                continue
+            if end and row["created_at"] > end:
+                continue
+            if start and row["created_at"] < start:
+                return
+            if language is not None and row["language_code"] != language:
+                continue
+            if decision is not None and row["decision"] != decision:
+                continue
+            yield row
+
+
+def main(argv: list[str] | None = None) -> None:
+    from app.db.session import write_engine
+
+    parser = argparse.ArgumentParser(description="Move old consent logs into archive segments.")
+    parser.add_argument("--archive-dir", default=None)
+    parser.add_argument("--older-than-days", type=int, default=None)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    result = archive_consent_logs(
+        write_engine, archive_dir=args.archive_dir, older_than_days=args.older_than_days
+    )
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
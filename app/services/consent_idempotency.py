@@ -0,0 +1,111 @@
+"""Replay of consent submissions retried with the same idempotency key.
+
+The key comes from the ``Idempotency-Key`` header, or is derived from the listing, template
+version, language, decision and email. Stored responses live in a bounded in-process
+cache in front of ``consent_idempotency_keys`` and expire after
+``CONSENT_IDEMPOTENCY_TTL_SECONDS``.
+"""
+
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models import ConsentIdempotencyKey
+from app.utils.cache import TTLCache
+
+settings = get_settings()
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+RESPONSE_FIELDS = (
+    "id",
+    "template_version",
+    "decision",
+    "language_code",
+    "email",
+    "ip_address",
+    "created_at",
+)
+
+recent_submissions = TTLCache(
+    max_entries=settings.consent_idempotency_max_entries,
+    max_bytes=settings.consent_idempotency_max_entries * 1024,
+    ttl_seconds=settings.consent_idempotency_ttl_seconds,
+)
+
+
+def idempotency_key(
+    listing_id: int,
+    header: Optional[str],
+    template_version: int,
+    language_code: str,
+    decision: str,
+    email: str,
+) -> str:
+    if header:
+        source = f"header:{listing_id}:{header}"
+    else:
+        source = (
+            f"derived:{listing_id}:{template_version}:{language_code}:{decision}:{email.lower()}"
+        )
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def stored_response(log: Any) -> dict[str, Any]:
+    """The submission response in the JSON-safe form it is stored and replayed in."""
+    if not isinstance(log, dict):
+        log = {field: getattr(log, field) for field in RESPONSE_FIELDS}
+    response = {field: log[field] for field in RESPONSE_FIELDS}
+    response["created_at"] = response["created_at"].isoformat()
+    return response
+
+
+def find_response(db: Session, key: str) -> Optional[dict[str, Any]]:
+    response = recent_submissions.get(key)
+    if response is not None:
+        return response
+    response = db.scalar(
+        select(ConsentIdempotencyKey.response).where(
+            ConsentIdempotencyKey.key == key,
+            ConsentIdempotencyKey.expires_at > datetime.now(timezone.utc),
+        )
+    )
+    if response is not None:
+        recent_submissions.set(key, response)
+    return response
+
+
+def key_row(key: str, listing_id: int, response: dict[str, Any]) -> dict[str, Any]:
+    expires_at = datetime.now(timezone.utc) + timedelta(
+        seconds=settings.consent_idempotency_ttl_seconds
+    )
+    return {"key": key, "listing_id": listing_id, "response": response, "expires_at": expires_at}
+
+
+def claim_keys(dialect_name: str, rows: list[dict[str, Any]]):
+    """Insert key rows, taking over expired ones; returns the keys actually claimed."""
+    dialect = postgresql if dialect_name == "postgresql" else sqlite
+    statement = dialect.insert(ConsentIdempotencyKey).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=["key"],
+        set_={
+            "listing_id": statement.excluded.listing_id,
+            "response": statement.excluded.response,
+            "expires_at": statement.excluded.expires_at,
+        },
+        where=ConsentIdempotencyKey.expires_at <= datetime.now(timezone.utc),
+    ).returning(ConsentIdempotencyKey.key)
+
+
+def purge_expired_keys(bind: Engine, now: Optional[datetime] = None) -> int:
+    with bind.begin() as connection:
+        return connection.execute(
+            delete(ConsentIdempotencyKey).where(
+                ConsentIdempotencyKey.expires_at <= (now or datetime.now(timezone.utc))
+            )
+        ).rowcount
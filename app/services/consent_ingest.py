@@ -0,0 +1,326 @@
+"""Write-behind ingestion of consent decisions.
+
+Submissions get their id and timestamps in-process and are queued; a background thread
+writes them in batches (COPY on Postgres, a multi-row INSERT elsewhere) once
+``batch_size`` rows are waiting or the oldest has waited ``flush_interval`` seconds.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import case, func, insert, select, text, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DataError, IntegrityError
+
+from app.core.config import get_settings
+from app.models import ConsentDeadLetter, ConsentLog, IdBlock
+from app.services.consent_idempotency import claim_keys, key_row, stored_response
+from app.services.consent_stats import rollup_counts, rollup_upsert
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+CONSENT_LOG_COLUMNS = (
+    "id",
+    "listing_id",
+    "template_id",
+    "template_version",
+    "language_code",
+    "decision",
+    "email",
+    "ip_address",
+    "user_agent",
+    "created_at",
+    "updated_at",
+)
+
+
+class ConsentQueueFullError(RuntimeError):
+    pass
+
+
+class IdAllocator:
+    """Hands out primary keys for a table from blocks reserved in one round trip.
+
+    Postgres draws the block from the table's serial sequence; other databases advance
+    the table's row in ``id_blocks`` past both the last block and the current max id.
+    """
+
+    def __init__(self, table, block_size: int) -> None:
+        self.table = table
+        self.block_size = block_size
+        self._ids: deque[int] = deque()
+        self._lock = threading.Lock()
+
+    def allocate(self, bind: Engine) -> int:
+        with self._lock:
+            if not self._ids:
+                with bind.begin() as connection:
+                    self._ids.extend(self._reserve(connection))
+            return self._ids.popleft()
+
+    def _reserve(self, connection: Connection) -> list[int]:
+        count = self.block_size
+        if connection.dialect.name == "postgresql":
+            return list(
+                connection.execute(
+                    text(
+                        "SELECT nextval(pg_get_serial_sequence(:table, 'id')) "
+                        "FROM generate_series(1, :count)"
+                    ),
+                    {"table": self.table.name, "count": count},
+                ).scalars()
+            )
+        floor = select(func.coalesce(func.max(self.table.c.id), 0) + 1).scalar_subquery()
+        start = case((IdBlock.next_id < floor, floor), else_=IdBlock.next_id)
+        reserved = connection.execute(
+            update(IdBlock)
+            .where(IdBlock.name == self.table.name)
+            .values(next_id=start + count)
+            .returning(IdBlock.next_id)
+        ).scalar()
+        if reserved is None:
+            first = connection.scalar(select(floor))
+            try:
+                with connection.begin_nested():
+                    connection.execute(
+                        insert(IdBlock).values(name=self.table.name, next_id=first + count)
+                    )
+            except IntegrityError:
+                # another worker created the row first
+                return self._reserve(connection)
+            reserved = first + count
+        return list(range(reserved - count, reserved))
+
+
+class ConsentIngestor:
+    def __init__(
+        self,
+        batch_size: int,
+        flush_interval: float,
+        max_queue: int,
+        id_block_size: int,
+    ) -> None:
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.bind: Engine | None = None
+        self._allocator = IdAllocator(ConsentLog.__table__, id_block_size)
+        self._queue: deque[dict[str, Any]] = deque()
+        self._condition = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._stopping = False
+        self.enqueued = 0
+        self.flushed = 0
+        self.batches = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.duplicates = 0
+        self.dead_lettered = 0
+        self.max_depth = 0
+        self.last_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, bind: Engine) -> None:
+        if self.running:
+            return
+        self.bind = bind
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="consent-ingest", daemon=True)
+        self._thread.start()
+
+    def submit(
+        self, values: dict[str, Any], idempotency_key: str | None = None
+    ) -> dict[str, Any]:
+        """Queue one consent log; returns the row as it will be stored."""
+        if not self.running:
+            raise RuntimeError("Consent ingestion is not running")
+        with self._condition:
+            if len(self._queue) >= self.max_queue:
+                raise ConsentQueueFullError("Consent queue is full")
+        now = datetime.now(timezone.utc)
+        row = {column: values.get(column) for column in CONSENT_LOG_COLUMNS}
+        row.update(id=self._allocator.allocate(self.bind), created_at=now, updated_at=now)
+        with self._condition:
+            self._queue.append({**row, "idempotency_key": idempotency_key})
+            self.enqueued += 1
+            self.max_depth = max(self.max_depth, len(self._queue))
+            self._condition.notify()
+        return row
+
+    def drain(self, timeout: float | None = None) -> int:
+        """Flush whatever is queued and stop the writer thread; returns rows left unwritten."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        with self._condition:
+            remaining = len(self._queue)
+        if remaining:
+            logger.error("Consent ingestion stopped with %s rows unwritten", remaining)
+        return remaining
+
+    def stats(self) -> dict[str, int | float | bool]:
+        with self._condition:
+            return {
+                "running": self.running,
+                "depth": len(self._queue),
+                "max_depth": self.max_depth,
+                "max_queue": self.max_queue,
+                "enqueued": self.enqueued,
+                "flushed": self.flushed,
+                "batches": self.batches,
+                "failures": self.failures,
+                "consecutive_failures": self.consecutive_failures,
+                "duplicates": self.duplicates,
+                "dead_lettered": self.dead_lettered,
+                "last_flush_ms": round(self.last_flush_ms, 3),
+            }
+
+    def _next_batch(self) -> list[dict[str, Any]] | None:
+        with self._condition:
+            while not self._queue and not self._stopping:
+                self._condition.wait()
+            if not self._queue:
+                return None
+            deadline = time.monotonic() + self.flush_interval
+            while len(self._queue) < self.batch_size and not self._stopping:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            count = min(self.batch_size, len(self._queue))
+            return [self._queue.popleft() for _ in range(count)]
+
+    def _run(self) -> None:
+        backoff = self.flush_interval
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            started = time.perf_counter()
+            try:
+                try:
+                    dropped = self._write(batch)
+                except (IntegrityError, DataError):
+                    # one bad row must not hold up the rows queued behind it
+                    logger.warning(
+                        "Consent batch of %s rows rejected, writing rows one at a time",
+                        len(batch),
+                    )
+                    self._write_each(batch)
+                    dropped = None
+            except Exception:
+                logger.exception("Failed to write %s consent logs", len(batch))
+                with self._condition:
+                    self.failures += 1
+                    self.consecutive_failures += 1
+                    self._queue.extendleft(reversed(batch))
+                    if self._stopping and self.consecutive_failures > 3:
+                        return
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 5.0)
+                continue
+            backoff = self.flush_interval
+            with self._condition:
+                self.consecutive_failures = 0
+                if dropped is not None:
+                    self.flushed += len(batch) - dropped
+                    self.duplicates += dropped
+                self.batches += 1
+                self.last_flush_ms = (time.perf_counter() - started) * 1000
+
+    def _write_each(self, batch: list[dict[str, Any]]) -> None:
+        """Write rows singly, dead-lettering those that are rejected; rows are removed from
+        ``batch`` as they are handled so a failure requeues only the rest."""
+        while batch:
+            row = batch[0]
+            try:
+                dropped = self._write([row])
+            except (IntegrityError, DataError) as error:
+                logger.exception(
+                    "Dead-lettering consent log %s for listing %s", row["id"], row["listing_id"]
+                )
+                self._dead_letter(row, error)
+                with self._condition:
+                    self.dead_lettered += 1
+            else:
+                with self._condition:
+                    self.flushed += 1 - dropped
+                    self.duplicates += dropped
+            batch.pop(0)
+
+    def _dead_letter(self, row: dict[str, Any], error: Exception) -> None:
+        """Store a rejected row in ``consent_dead_letters``; if that fails the row stays in
+        the batch and is requeued with it."""
+        stored = {
+            key: value.isoformat() if isinstance(value, datetime) else value
+            for key, value in row.items()
+        }
+        with self.bind.begin() as connection:
+            connection.execute(
+                insert(ConsentDeadLetter.__table__).values(
+                    listing_id=row["listing_id"],
+                    row=stored,
+                    error=str(getattr(error, "orig", error)),
+                    created_at=datetime.now(timezone.utc),
+                )
+            )
+
+    def _write(self, batch: list[dict[str, Any]]) -> int:
+        """Write a batch; returns how many rows were dropped as retries of a stored key."""
+        with self.bind.begin() as connection:
+            dialect = connection.dialect.name
+            keys: dict[str, dict[str, Any]] = {}
+            for row in batch:
+                key = row["idempotency_key"]
+                if key and row["listing_id"] is not None and key not in keys:
+                    keys[key] = key_row(key, row["listing_id"], stored_response(row))
+            claimed: set[str] = set()
+            if keys:
+                claimed = set(
+                    connection.execute(claim_keys(dialect, list(keys.values()))).scalars()
+                )
+            # a retry of a key claimed earlier, here or by another worker, is not written
+            rows = [
+                row
+                for row in batch
+                if row["idempotency_key"] not in keys
+                or (
+                    row["idempotency_key"] in claimed
+                    and keys[row["idempotency_key"]]["response"]["id"] == row["id"]
+                )
+            ]
+            if not rows:
+                return len(batch)
+            if dialect == "postgresql" and connection.dialect.driver == "psycopg":
+                cursor = connection.connection.driver_connection.cursor()
+                columns = ", ".join(CONSENT_LOG_COLUMNS)
+                with cursor.copy(f"COPY consent_logs ({columns}) FROM STDIN") as copy:
+                    for row in rows:
+                        copy.write_row([row[column] for column in CONSENT_LOG_COLUMNS])
+            else:
+                connection.execute(
+                    insert(ConsentLog.__table__),
+                    [{column: row[column] for column in CONSENT_LOG_COLUMNS} for row in rows],
+                )
+            counts = rollup_counts(rows)
+            if counts:
+                connection.execute(rollup_upsert(dialect, counts))
+        return len(batch) - len(rows)
+
+consent_ingestor = ConsentIngestor(
+    batch_size=settings.consent_batch_size,
+    flush_interval=settings.consent_batch_interval_ms / 1000,
+    max_queue=settings.consent_queue_max,
+    id_block_size=settings.consent_id_block_size,
+)
@@ -0,0 +1,43 @@
+"""Daily consent rollups, kept current by the code paths that write consent logs."""
+
+from collections import Counter
+from datetime import date, datetime, timezone
+from typing import Any, Iterable, Mapping
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.models import ConsentDailyRollup
+
+ROLLUP_KEY = ("listing_id", "day", "template_version", "language_code", "decision")
+
+
+def utc_day(value: datetime) -> date:
+    return (value.astimezone(timezone.utc) if value.tzinfo else value).date()
+
+
+def rollup_counts(logs: Iterable[Mapping[str, Any]]) -> list[dict[str, Any]]:
+    """Collapse consent log rows into one count per rollup key."""
+    counts: Counter = Counter()
+    for log in logs:
+        if log["listing_id"] is None:
+            continue
+        counts[
+            (
+                log["listing_id"],
+                utc_day(log["created_at"]),
+                log["template_version"],
+                log["language_code"],
+                log["decision"],
+            )
+        ] += 1
+    return [dict(zip(ROLLUP_KEY, key), count=count) for key, count in counts.items()]
+
+
+def rollup_upsert(dialect_name: str, counts: list[dict[str, Any]]):
+    """``INSERT ... ON CONFLICT`` adding ``counts`` to the existing rollup rows."""
+    dialect = postgresql if dialect_name == "postgresql" else sqlite
+    statement = dialect.insert(ConsentDailyRollup).values(counts)
+    return statement.on_conflict_do_update(
+        index_elements=list(ROLLUP_KEY),
+        set_={"count": ConsentDailyRollup.count + statement.excluded["count"]},
+    )
@@ -0,0 +1,99 @@
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.models import (
+    FAQ,
+    FAQTranslation,
+    PageDescription,
+    PageDescriptionTranslation,
+    Tutorial,
+    TutorialTranslation,
+)
+
+
+@dataclass(frozen=True)
+class ContentType:
+    """A translatable guide section: one entity table plus its per-language rows."""
+
+    section: str
+    path: str
+    model: Any
+    translation_model: Any
+    foreign_key: str
+    fields: tuple[str, ...]
+
+    @property
+    def translation_fk(self):
+        return getattr(self.translation_model, self.foreign_key)
+
+    def serialize(self, entity: Any, translation: Any) -> dict:
+        item = {"id": entity.id}
+        for field in self.fields:
+            item[field] = getattr(translation, field)
+        item["language_code"] = translation.language_code
+        return item
+
+
+CONTENT_TYPES: dict[str, ContentType] = {}
+
+
+def register_content_type(content_type: ContentType) -> ContentType:
+    if content_type.section in CONTENT_TYPES:
+        raise ValueError(f"Content type {content_type.section!r} is already registered")
+    CONTENT_TYPES[content_type.section] = content_type
+    return content_type
+
+
+def sync_translations(
+    db: Session, content_type: ContentType, entity: Any, translations: list[dict]
+) -> None:
+    existing = {tr.language_code: tr for tr in entity.translations}
+    incoming_codes = set()
+    for translation in translations:
+        code = translation["language_code"].lower()
+        incoming_codes.add(code)
+        values = {field: translation.get(field) for field in content_type.fields}
+        if code in existing:
+            for field, value in values.items():
+                setattr(existing[code], field, value)
+        else:
+            entity.translations.append(
+                content_type.translation_model(language_code=code, **values)
+            )
+    for code, translation in existing.items():
+        if code not in incoming_codes:
+            db.delete(translation)
+
+
+FAQS = register_content_type(
+    ContentType(
+        section="faqs",
+        path="faqs",
+        model=FAQ,
+        translation_model=FAQTranslation,
+        foreign_key="faq_id",
+        fields=("question", "answer", "links"),
+    )
+)
+TUTORIALS = register_content_type(
+    ContentType(
+        section="tutorials",
+        path="tutorials",
+        model=Tutorial,
+        translation_model=TutorialTranslation,
+        foreign_key="tutorial_id",
+        fields=("title", "description", "video_url", "thumbnail_url"),
+    )
+)
+PAGE_DESCRIPTIONS = register_content_type(
+    ContentType(
+        section="page_descriptions",
+        path="page-descriptions",
+        model=PageDescription,
+        translation_model=PageDescriptionTranslation,
+        foreign_key="page_description_id",
+        fields=("body",),
+    )
+)
@@ -0,0 +1,310 @@
+from typing import Any, Iterable
+
+from sqlalchemy import and_, case, func, select, update
+from sqlalchemy.orm import Session, aliased
+
+from app.core.config import get_settings
+from app.models import (
+    ConsentTemplate,
+    ConsentTemplateStatusEnum,
+    ConsentTemplateTranslation,
+    Listing,
+)
+from app.services.content_types import CONTENT_TYPES, ContentType
+from app.services.language import language_chain
+from app.utils.cache import SharedTTLCache, TTLCache, get_cache_backend
+from app.utils.etag import etag_matches, make_etag
+from app.utils.responses import json_dumps
+
+settings = get_settings()
+
+if settings.cache_backend == "memory":
+    guide_cache = TTLCache(
+        max_entries=settings.guide_cache_max_entries,
+        max_bytes=settings.guide_cache_max_bytes,
+        ttl_seconds=settings.guide_cache_ttl_seconds,
+    )
+else:
+    guide_cache = SharedTTLCache(
+        get_cache_backend(),
+        ttl_seconds=settings.guide_cache_ttl_seconds,
+        prefix="guide:",
+    )
+
+
+ETAG_SCHEMA = "guide-v1"
+WRITTEN_PREFIX = "replica:written:"
+
+
+class ListingNotFoundError(LookupError):
+    pass
+
+
+class ConsentTemplateNotFoundError(LookupError):
+    pass
+
+
+class ConsentTranslationNotFoundError(LookupError):
+    pass
+
+
+def scope_filters(model, listing_id: int, specific_item: str | None) -> list:
+    if specific_item is None:
+        return [model.listing_id == listing_id, model.specific_item.is_(None)]
+    return [model.listing_id == listing_id, model.specific_item == specific_item]
+
+
+def _consent_state_columns() -> list:
+    """ETag inputs for the listing's current template, correlated to ``listings``."""
+    current = ConsentTemplateTranslation.template_id == Listing.current_template_id
+    return [
+        Listing.current_template_id,
+        select(ConsentTemplate.updated_at)
+        .where(ConsentTemplate.id == Listing.current_template_id)
+        .correlate(Listing)
+        .scalar_subquery(),
+        select(func.count(ConsentTemplateTranslation.id))
+        .where(current)
+        .correlate(Listing)
+        .scalar_subquery(),
+        select(func.max(ConsentTemplateTranslation.updated_at))
+        .where(current)
+        .correlate(Listing)
+        .scalar_subquery(),
+    ]
+
+
+def consent_state(db: Session, listing_id: int) -> tuple | None:
+    state = db.execute(
+        select(*_consent_state_columns()).where(Listing.id == listing_id)
+    ).first()
+    return None if state is None else tuple(state)
+
+
+def lookup_consent(
+    db: Session, listing_id: int, languages: list[str]
+) -> tuple[ConsentTemplate | None, ConsentTemplateTranslation | None, tuple] | None:
+    """Current published template, best translation and ETag state in one statement."""
+    preference = case(
+        {code: rank for rank, code in enumerate(languages)},
+        value=ConsentTemplateTranslation.language_code,
+    )
+    row = (
+        db.query(
+            Listing.id,
+            ConsentTemplate,
+            ConsentTemplateTranslation,
+            *_consent_state_columns(),
+        )
+        .select_from(Listing)
+        .outerjoin(ConsentTemplate, ConsentTemplate.id == Listing.current_template_id)
+        .outerjoin(
+            ConsentTemplateTranslation,
+            and_(
+                ConsentTemplateTranslation.template_id == ConsentTemplate.id,
+                ConsentTemplateTranslation.language_code.in_(languages),
+            ),
+        )
+        .filter(Listing.id == listing_id)
+        .order_by(preference)
+        .first()
+    )
+    if row is None:
+        return None
+    return row[1], row[2], tuple(row[3:])
+
+
+def listing_exists(db: Session, listing_id: int) -> bool:
+    return db.query(Listing.id).filter(Listing.id == listing_id).first() is not None
+
+
+def load_consent(
+    db: Session,
+    listing_id: int,
+    languages: list[str],
+    if_none_match: str | None = None,
+) -> tuple[str, str | None, bytes | None]:
+    """Return (etag, content language, encoded body); body is None when the ETag matches."""
+    key = (listing_id, None, "consent", tuple(languages))
+    entry = guide_cache.get(key) if settings.guide_cache_enabled else None
+    if entry is None:
+        if if_none_match:
+            state = consent_state(db, listing_id)
+            if state is None:
+                raise ListingNotFoundError(listing_id)
+            etag = make_etag(ETAG_SCHEMA, key, state)
+            if etag_matches(if_none_match, etag):
+                return etag, None, None
+        found = lookup_consent(db, listing_id, languages)
+        if found is None:
+            raise ListingNotFoundError(listing_id)
+        template, translation, state = found
+        if template is None:
+            raise ConsentTemplateNotFoundError(listing_id)
+        if translation is None:
+            raise ConsentTranslationNotFoundError(listing_id)
+        entry = {
+            "etag": make_etag(ETAG_SCHEMA, key, state),
+            "language": translation.language_code,
+            "body": json_dumps(serialize_consent(template, translation)),
+        }
+        if settings.guide_cache_enabled and cacheable(db, listing_id):
+            guide_cache.set(key, entry, size=len(entry["body"]))
+    if etag_matches(if_none_match, entry["etag"]):
+        return entry["etag"], entry["language"], None
+    return entry["etag"], entry["language"], entry["body"]
+
+
+def cacheable(db: Session, listing_id: int) -> bool:
+    """False for a replica read of a listing written within the replica sticky window: the
+    replica may not have the write yet, and caching its answer would outlive the lag."""
+    if "primary_bind" not in db.info:
+        return True
+    return get_cache_backend().get(f"{WRITTEN_PREFIX}{listing_id}") is None
+
+
+def invalidate_guide_cache(
+    listing_id: int,
+    specific_items: Iterable[str | None] | None = None,
+    sections: Iterable[str] | None = None,
+) -> None:
+    items = None if specific_items is None else set(specific_items)
+    section_set = None if sections is None else set(sections)
+    if section_set is not None and section_set & set(CONTENT_TYPES):
+        section_set.update(("guide", "languages"))
+
+    def match(key) -> bool:
+        key_listing, key_item, key_section, _ = key
+        if key_listing != listing_id:
+            return False
+        if section_set is not None and key_section not in section_set:
+            return False
+        return items is None or key_item in items
+
+    guide_cache.invalidate(match, namespace=listing_id)
+    get_cache_backend().set(
+        f"{WRITTEN_PREFIX}{listing_id}", b"1", settings.replica_sticky_seconds
+    )
+
+
+def resolve_translations(
+    db: Session,
+    model,
+    translation_model,
+    foreign_key: str,
+    filters: list,
+    languages: list[str],
+) -> list[tuple[Any, Any]]:
+    translation_fk = getattr(translation_model, foreign_key)
+    preference = case(
+        {code: rank for rank, code in enumerate(languages)},
+        value=translation_model.language_code,
+    )
+    ranked = (
+        select(
+            translation_model,
+            func.row_number()
+            .over(partition_by=translation_fk, order_by=preference)
+            .label("preference_rank"),
+        )
+        .join(model, translation_fk == model.id)
+        .where(*filters, translation_model.language_code.in_(languages))
+        .subquery()
+    )
+    translation = aliased(translation_model, ranked)
+    return (
+        db.query(model, translation)
+        .join(translation, getattr(translation, foreign_key) == model.id)
+        .filter(ranked.c.preference_rank == 1)
+        .order_by(model.id)
+        .all()
+    )
+
+
+def build_section_items(
+    db: Session,
+    content_type: ContentType,
+    listing_id: int,
+    specific_item: str | None,
+    language: str,
+) -> list[dict]:
+    model = content_type.model
+    filters = [*scope_filters(model, listing_id, specific_item), model.is_active.is_(True)]
+    return [
+        content_type.serialize(entity, translation)
+        for entity, translation in resolve_translations(
+            db,
+            model,
+            content_type.translation_model,
+            content_type.foreign_key,
+            filters,
+            language_chain([language]),
+        )
+    ]
+
+
+def published_template_version(db: Session, listing_id: int) -> tuple[int, int] | None:
+    """(id, version) of the listing's current published template.
+
+    Read from the listing pointer on every call rather than the per-worker guide cache, so a
+    publish is seen by every worker at once.
+    """
+    row = (
+        db.query(Listing.current_template_id, Listing.current_template_version)
+        .filter(Listing.id == listing_id)
+        .first()
+    )
+    if row is None or row.current_template_id is None:
+        return None
+    return row.current_template_id, row.current_template_version
+
+
+def set_current_template(db: Session, listing_id: int) -> None:
+    """Point the listing at its highest published template version.
+
+    Run in the transaction that changes a template's status, after locking the listing row
+    so concurrent publishes for the same listing apply one after the other.
+    """
+    latest = (
+        select(ConsentTemplate.id, ConsentTemplate.version)
+        .where(
+            ConsentTemplate.listing_id == listing_id,
+            ConsentTemplate.status == ConsentTemplateStatusEnum.PUBLISHED.value,
+        )
+        .order_by(ConsentTemplate.version.desc())
+        .limit(1)
+    )
+    db.execute(
+        update(Listing)
+        .where(Listing.id == listing_id)
+        .values(
+            current_template_id=latest.with_only_columns(ConsentTemplate.id).scalar_subquery(),
+            current_template_version=latest.with_only_columns(
+                ConsentTemplate.version
+            ).scalar_subquery(),
+        )
+    )
+
+
+def serialize_consent(
+    template: ConsentTemplate, translation: ConsentTemplateTranslation
+) -> dict:
+    return {
+        "template_id": template.id,
+        "template_version": template.version,
+        "status": template.status,
+        "translation": {
+            "language_code": translation.language_code,
+            "title": translation.title,
+            "body": translation.body,
+        },
+    }
+
+
+def build_guide_document(
+    db: Session, listing_id: int, specific_item: str | None, language: str
+) -> dict[str, list[dict]]:
+    return {
+        section: build_section_items(db, content_type, listing_id, specific_item, language)
+        for section, content_type in CONTENT_TYPES.items()
+    }
@@ -0,0 +1,320 @@
+import json
+import logging
+from datetime import datetime, timezone
+from hashlib import sha1
+from threading import Lock
+from typing import Any, Iterable
+
+from fastapi import BackgroundTasks
+from sqlalchemy import select, union
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session, defer
+
+from app.db.replicas import primary_bind
+from app.models import GuideSnapshot
+from app.services.content_types import CONTENT_TYPES
+from app.services.language import normalize_language
+from app.services.guide import (
+    ETAG_SCHEMA,
+    ListingNotFoundError,
+    build_guide_document,
+    cacheable,
+    consent_state,
+    guide_cache,
+    invalidate_guide_cache,
+    listing_exists,
+    lookup_consent,
+    scope_filters,
+    serialize_consent,
+    settings,
+)
+from app.utils.etag import etag_matches, make_etag
+from app.utils.responses import json_dumps
+
+logger = logging.getLogger(__name__)
+
+
+def _scope(specific_item: str | None) -> str:
+    return specific_item or ""
+
+
+def snapshot_checksum(document: Any) -> str:
+    encoded = json.dumps(document, sort_keys=True, separators=(",", ":"), default=str)
+    return sha1(encoded.encode("utf-8")).hexdigest()
+
+
+def available_languages(db: Session, listing_id: int, specific_item: str | None) -> set[str]:
+    queries = [
+        select(content_type.translation_model.language_code)
+        .join(content_type.model, content_type.translation_fk == content_type.model.id)
+        .where(
+            *scope_filters(content_type.model, listing_id, specific_item),
+            content_type.model.is_active.is_(True),
+        )
+        for content_type in CONTENT_TYPES.values()
+    ]
+    return {
+        normalize_language(settings.default_language),
+        *db.execute(union(*queries)).scalars(),
+    }
+
+
+def listing_languages(db: Session, listing_id: int, specific_item: str | None) -> list[str]:
+    key = (listing_id, specific_item, "languages", None)
+    languages = guide_cache.get(key) if settings.guide_cache_enabled else None
+    if languages is None:
+        languages = sorted(available_languages(db, listing_id, specific_item))
+        if settings.guide_cache_enabled and cacheable(db, listing_id):
+            guide_cache.set(key, languages)
+    return languages
+
+
+def resolve_language(available: Iterable[str], languages: list[str]) -> str:
+    available = set(available)
+    for code in languages:
+        if code in available:
+            return code
+    return languages[-1]
+
+
+def find_snapshot(
+    db: Session,
+    listing_id: int,
+    specific_item: str | None,
+    languages: list[str],
+    with_document: bool = True,
+) -> GuideSnapshot | None:
+    """Best snapshot for ``languages``; without ``with_document`` the document is loaded on
+    first access."""
+    query = db.query(GuideSnapshot)
+    if not with_document:
+        query = query.options(defer(GuideSnapshot.document))
+    snapshots = {
+        snapshot.language_code: snapshot
+        for snapshot in query.filter(
+            GuideSnapshot.listing_id == listing_id,
+            GuideSnapshot.specific_item == _scope(specific_item),
+            GuideSnapshot.language_code.in_(languages),
+        )
+    }
+    for code in languages:
+        if code in snapshots:
+            return snapshots[code]
+    return None
+
+
+def discard_snapshots(
+    db: Session, listing_id: int, specific_items: Iterable[str | None] | None = None
+) -> None:
+    """Delete the listing's snapshots for ``specific_items``, or for every scope."""
+    filters = [GuideSnapshot.listing_id == listing_id]
+    if specific_items is not None:
+        filters.append(GuideSnapshot.specific_item.in_({_scope(item) for item in specific_items}))
+    db.query(GuideSnapshot).filter(*filters).delete(synchronize_session=False)
+
+
+def snapshot_upsert(dialect_name: str, rows: list[dict[str, Any]]):
+    """``INSERT ... ON CONFLICT`` replacing a snapshot another worker saved concurrently."""
+    dialect = postgresql if dialect_name == "postgresql" else sqlite
+    statement = dialect.insert(GuideSnapshot).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=["listing_id", "specific_item", "language_code"],
+        set_={
+            "checksum": statement.excluded.checksum,
+            "document": statement.excluded.document,
+            "updated_at": statement.excluded.updated_at,
+        },
+    )
+
+
+def rebuild_snapshots(db: Session, listing_id: int, specific_item: str | None) -> int:
+    discard_snapshots(db, listing_id, [specific_item])
+    if not listing_exists(db, listing_id):
+        db.commit()
+        return 0
+    now = datetime.now(timezone.utc)
+    rows = []
+    for language in sorted(available_languages(db, listing_id, specific_item)):
+        document = build_guide_document(db, listing_id, specific_item, language)
+        # only the listing scope is worth a snapshot when it has no content
+        if specific_item is not None and not any(document.values()):
+            continue
+        rows.append(
+            {
+                "listing_id": listing_id,
+                "specific_item": _scope(specific_item),
+                "language_code": language,
+                "checksum": snapshot_checksum(document),
+                "document": document,
+                "created_at": now,
+                "updated_at": now,
+            }
+        )
+    if rows:
+        # the last rebuild to commit wins, and it read the content after the latest edit
+        db.execute(snapshot_upsert(db.get_bind().dialect.name, rows))
+    db.commit()
+    return len(rows)
+
+
+class SnapshotRebuilder:
+    """Collects dirty (listing, specific item) scopes and rebuilds each one once per flush."""
+
+    def __init__(self) -> None:
+        self._pending: set[tuple[int, str | None]] = set()
+        self._lock = Lock()
+        self.rebuilds = 0
+
+    def mark(self, listing_id: int, specific_items: Iterable[str | None]) -> None:
+        with self._lock:
+            self._pending.update((listing_id, item) for item in specific_items)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def schedule(self, background_tasks: BackgroundTasks, bind: Engine | AsyncEngine) -> None:
+        if self.pending():
+            flush = self.flush_async if isinstance(bind, AsyncEngine) else self.flush
+            background_tasks.add_task(flush, bind)
+
+    def flush(self, bind: Engine) -> int:
+        rebuilt = 0
+        for listing_id, specific_item in self._take():
+            with Session(bind=bind) as db:
+                rebuilt += _rebuild_scope(db, listing_id, specific_item)
+        return self._record(rebuilt)
+
+    async def flush_async(self, bind: AsyncEngine) -> int:
+        rebuilt = 0
+        for listing_id, specific_item in self._take():
+            async with AsyncSession(bind=bind) as db:
+                rebuilt += await db.run_sync(_rebuild_scope, listing_id, specific_item)
+        return self._record(rebuilt)
+
+    def _take(self) -> set[tuple[int, str | None]]:
+        with self._lock:
+            pending, self._pending = self._pending, set()
+        return pending
+
+    def _record(self, rebuilt: int) -> int:
+        with self._lock:
+            self.rebuilds += rebuilt
+        return rebuilt
+
+
+def _rebuild_scope(db: Session, listing_id: int, specific_item: str | None) -> bool:
+    try:
+        rebuild_snapshots(db, listing_id, specific_item)
+    except Exception:
+        db.rollback()
+        logger.exception(
+            "Guide snapshot rebuild failed for listing %s (%s)", listing_id, specific_item
+        )
+        return False
+    return True
+
+
+snapshot_rebuilder = SnapshotRebuilder()
+
+
+def publish_guide_changes(
+    db: Session,
+    background_tasks: BackgroundTasks,
+    listing_id: int,
+    specific_items: Iterable[str | None],
+    sections: Iterable[str],
+) -> None:
+    specific_items = list(specific_items)
+    invalidate_guide_cache(listing_id, specific_items, sections)
+    snapshot_rebuilder.mark(listing_id, specific_items)
+    snapshot_rebuilder.schedule(background_tasks, primary_bind(db))
+
+
+def section_payload(
+    document: dict,
+    listing_id: int,
+    specific_item: str | None,
+    section: str,
+    language: str,
+    consent: dict | None = None,
+) -> dict:
+    if section == "guide":
+        return {
+            "listing_id": listing_id,
+            "specific_item": specific_item,
+            "language": language,
+            "consent": consent,
+            **document,
+        }
+    return {"items": document[section]}
+
+
+def load_guide_section(
+    db: Session,
+    listing_id: int,
+    specific_item: str | None,
+    section: str,
+    languages: list[str],
+    if_none_match: str | None = None,
+) -> tuple[str, str, bytes | None]:
+    """Return (etag, content language, encoded body); body is None when the ETag matches."""
+    key = (listing_id, specific_item, section, tuple(languages))
+    entry = guide_cache.get(key) if settings.guide_cache_enabled else None
+    if entry is None:
+        snapshot = find_snapshot(
+            db, listing_id, specific_item, languages, with_document=not if_none_match
+        )
+        if snapshot is not None and if_none_match:
+            # revalidate from the checksum and consent state before loading the document
+            parts: list[Any] = [snapshot.checksum]
+            if section == "guide":
+                state = consent_state(db, listing_id)
+                if state is None:
+                    raise ListingNotFoundError(listing_id)
+                parts.append(state)
+            etag = make_etag(ETAG_SCHEMA, key, *parts)
+            if etag_matches(if_none_match, etag):
+                return etag, snapshot.language_code, None
+        if snapshot is not None:
+            language = snapshot.language_code
+            checksum, document = snapshot.checksum, snapshot.document
+        else:
+            language = resolve_language(
+                listing_languages(db, listing_id, specific_item), languages
+            )
+            document = build_guide_document(db, listing_id, specific_item, language)
+            # Content rows imply the listing exists; only an empty guide needs the check.
+            has_content = any(document.values())
+            if not has_content and not listing_exists(db, listing_id):
+                raise ListingNotFoundError(listing_id)
+            if specific_item is None or has_content:
+                snapshot_rebuilder.mark(listing_id, [specific_item])
+            checksum = snapshot_checksum(document)
+        parts = [checksum]
+        consent = None
+        if section == "guide":
+            found = lookup_consent(db, listing_id, languages)
+            if found is None:
+                raise ListingNotFoundError(listing_id)
+            template, translation, state = found
+            if template is not None and translation is not None:
+                consent = serialize_consent(template, translation)
+            parts.append(state)
+        etag = make_etag(ETAG_SCHEMA, key, *parts)
+        if etag_matches(if_none_match, etag):
+            return etag, language, None
+        entry = {
+            "etag": etag,
+            "language": language,
+            "body": json_dumps(
+                section_payload(document, listing_id, specific_item, section, language, consent)
+            ),
+        }
+        if settings.guide_cache_enabled and cacheable(db, listing_id):
+            guide_cache.set(key, entry, size=len(entry["body"]))
+    if etag_matches(if_none_match, entry["etag"]):
+        return entry["etag"], entry["language"], None
+    return entry["etag"], entry["language"], entry["body"]
@@ -0,0 +1,54 @@
+from typing import Iterable
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+def normalize_language(tag: str) -> str:
+    return tag.strip().replace("_", "-").lower()
+
+
+def parse_accept_language(header: str | None) -> list[str]:
+    weighted: list[tuple[float, int, str]] = []
+    for position, part in enumerate((header or "").split(",")):
+        tag, _, params = part.partition(";")
+        tag = normalize_language(tag)
+        if not tag or tag == "*":
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            weighted.append((-quality, position, tag))
+    return [tag for _, _, tag in sorted(weighted)]
+
+
+def language_chain(preferences: Iterable[str]) -> list[str]:
+    """Expand preferred tags into an ordered fallback chain, e.g. pt-br -> pt -> en."""
+    chain: list[str] = []
+
+    def add(code: str) -> None:
+        if code and code not in chain:
+            chain.append(code)
+
+    for preference in preferences:
+        tag = normalize_language(preference)
+        subtags = tag.split("-")
+        for size in range(len(subtags), 0, -1):
+            add("-".join(subtags[:size]))
+        for fallback in settings.language_fallbacks.get(tag, []):
+            add(normalize_language(fallback))
+    add(normalize_language(settings.default_language))
+    return chain
+
+
+def negotiate_languages(language: str | None, accept_language: str | None) -> list[str]:
+    if language:
+        return language_chain([language])
+    return language_chain(parse_accept_language(accept_language))
@@ -0,0 +1,188 @@
+"""Monthly partition maintenance and retention for the append-only log tables.
+
+On Postgres (after migration 20240901_000001) ``consent_logs`` and ``admin_audit_logs``
+are range-partitioned by ``created_at``: future months are created ahead of time and
+months older than the retention window are dropped whole. Other databases keep the
+plain tables and retention falls back to ``DELETE``.
+
+    python -m app.services.partitions [--dry-run]
+"""
+
+import argparse
+import json
+import logging
+import re
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import get_settings
+from app.models import AdminAuditLog, ConsentLog
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+PARTITIONED_TABLES = {
+    ConsentLog.__tablename__: ConsentLog.__table__,
+    AdminAuditLog.__tablename__: AdminAuditLog.__table__,
+}
+
+
+def retention_days() -> dict[str, int | None]:
+    return {
+        ConsentLog.__tablename__: settings.consent_log_retention_days,
+        AdminAuditLog.__tablename__: settings.audit_log_retention_days,
+    }
+
+
+def month_start(value: datetime | date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+def partition_month(table: str, name: str) -> date | None:
+    match = re.fullmatch(rf"{re.escape(table)}_p(\d{{4}})_(\d{{2}})", name)
+    return date(int(match[1]), int(match[2]), 1) if match else None
+
+
+def is_partitioned(connection: Connection, table: str) -> bool:
+    if connection.dialect.name != "postgresql":
+        return False
+    return bool(
+        connection.scalar(
+            text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"),
+            {"table": table},
+        )
+    )
+
+
+def list_partitions(connection: Connection, table: str) -> list[str]:
+    return list(
+        connection.scalars(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE pg_inherits.inhparent = to_regclass(:table) ORDER BY child.relname"
+            ),
+            {"table": table},
+        )
+    )
+
+
+def _create_partition(connection: Connection, table: str, month: date) -> None:
+    # Build the partition detached so rows that already landed in the default partition
+    # for this month can be moved in before it is attached.
+    name = partition_name(table, month)
+    lower, upper = f"{month} 00:00+00", f"{add_months(month, 1)} 00:00+00"
+    connection.exec_driver_sql(
+        f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    )
+    connection.exec_driver_sql(
+        f"WITH moved AS (DELETE FROM {table}_default "
+        f"WHERE created_at >= '{lower}' AND created_at < '{upper}' RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    )
+    connection.exec_driver_sql(
+        f"ALTER TABLE {table} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+    )
+
+
+def ensure_partitions(
+    bind: Engine, months_ahead: int | None = None, now: datetime | None = None
+) -> list[str]:
+    """Create any missing monthly partitions from this month through ``months_ahead``."""
+    months_ahead = settings.log_partition_months_ahead if months_ahead is None else months_ahead
+    current = month_start(now or datetime.now(timezone.utc))
+    created = []
+    with bind.begin() as connection:
+        for table in PARTITIONED_TABLES:
+            if not is_partitioned(connection, table):
+                continue
+            existing = set(list_partitions(connection, table))
+            for offset in range(months_ahead + 1):
+                month = add_months(current, offset)
+                if partition_name(table, month) not in existing:
+                    _create_partition(connection, table, month)
+                    created.append(partition_name(table, month))
+    if created:
+        logger.info("Created log partitions %s", ", ".join(created))
+    return created
+
+
+def expired_partitions(table: str, names: list[str], cutoff: datetime) -> list[str]:
+    """Partitions whose whole month ends on or before ``cutoff``."""
+    expired = []
+    for name in names:
+        month = partition_month(table, name)
+        if month is not None and add_months(month, 1) <= cutoff.date():
+            expired.append(name)
+    return expired
+
+
+def apply_retention(
+    bind: Engine, now: datetime | None = None, dry_run: bool = False
+) -> dict[str, dict]:
+    """Drop (Postgres partitions) or delete (plain tables) logs past their retention."""
+    now = now or datetime.now(timezone.utc)
+    result: dict[str, dict] = {}
+    with bind.begin() as connection:
+        for table, days in retention_days().items():
+            if days is None:
+                continue
+            cutoff = now - timedelta(days=days)
+            if is_partitioned(connection, table):
+                dropped = expired_partitions(table, list_partitions(connection, table), cutoff)
+                if not dry_run:
+                    for name in dropped:
+                        connection.exec_driver_sql(f"DROP TABLE {name}")
+                    connection.execute(
+                        text(f"DELETE FROM {table}_default WHERE created_at < :cutoff"),
+                        {"cutoff": cutoff},
+                    )
+                result[table] = {"cutoff": cutoff.isoformat(), "dropped_partitions": dropped}
+                continue
+            model = PARTITIONED_TABLES[table]
+            condition = model.c.created_at < cutoff
+            if dry_run:
+                deleted = connection.scalar(
+                    select(func.count()).select_from(model).where(condition)
+                )
+            else:
+                deleted = connection.execute(delete(model).where(condition)).rowcount
+            result[table] = {"cutoff": cutoff.isoformat(), "deleted_rows": deleted}
+    for table, outcome in result.items():
+        logger.info("Log retention for %s: %s", table, outcome)
+    return result
+
+
+def main(argv: list[str] | None = None) -> None:
+    from app.db.session import write_engine
+    from app.services.consent_idempotency import purge_expired_keys
+
+    parser = argparse.ArgumentParser(
+        description="Create upcoming log partitions, apply log retention and purge expired "
+        "consent idempotency keys."
+    )
+    parser.add_argument("--months-ahead", type=int, default=None)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    created = [] if args.dry_run else ensure_partitions(write_engine, args.months_ahead)
+    retention = apply_retention(write_engine, dry_run=args.dry_run)
+    purged = 0 if args.dry_run else purge_expired_keys(write_engine)
+    print(json.dumps({"created": created, "retention": retention, "purged_keys": purged}))
+
+
+if __name__ == "__main__":
+    main()
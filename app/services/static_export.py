@@ -0,0 +1,336 @@
+"""Static JSON export of guest guides, laid out as
+``{listing_id}/{scope}/{language}/{section}.json`` so nginx or a CDN can serve them."""
+
+import argparse
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import sha1
+from pathlib import Path
+from typing import Iterable
+from urllib.parse import quote
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.models import ConsentTemplate, ConsentTemplateTranslation, Listing
+from app.services.content_types import CONTENT_TYPES
+from app.services.guide import (
+    build_guide_document,
+    lookup_consent,
+    serialize_consent,
+    settings,
+)
+from app.services.guide_snapshot import available_languages, section_payload
+from app.services.language import language_chain
+from app.utils.responses import json_dumps
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+LISTING_SCOPE = "_"
+STATIC_SECTIONS = ("guide", "consent", *(ct.path for ct in CONTENT_TYPES.values()))
+LANGUAGE_TAG = re.compile(r"[a-z]{2,3}(?:-[a-z0-9]{1,8})*")
+
+_worker_engine: Engine | None = None
+
+
+def export_root(output_dir: str | os.PathLike | None = None) -> Path:
+    return Path(output_dir or settings.static_export_dir)
+
+
+def scope_name(specific_item: str | None) -> str:
+    if specific_item is None:
+        return LISTING_SCOPE
+    name = quote(specific_item, safe="")
+    if name in {".", ".."}:
+        raise ValueError(f"Invalid guide scope {specific_item!r}")
+    return name
+
+
+def _section_path(base: Path, specific_item: str | None, language: str, section: str) -> Path:
+    if not LANGUAGE_TAG.fullmatch(language):
+        raise ValueError(f"Invalid language tag {language!r}")
+    return base / scope_name(specific_item) / language / f"{section}.json"
+
+
+def static_file_path(
+    root: Path, listing_id: int, specific_item: str | None, language: str, section: str
+) -> Path:
+    return _section_path(root / str(listing_id), specific_item, language, section)
+
+
+def listing_fingerprints(db: Session, listing_ids: Iterable[int] | None = None) -> dict[int, str]:
+    listings = select(Listing.id, Listing.updated_at)
+    if listing_ids is not None:
+        listings = listings.where(Listing.id.in_(list(listing_ids)))
+    state: dict[int, list] = {
+        listing_id: [updated_at] for listing_id, updated_at in db.execute(listings)
+    }
+
+    def collect(statement) -> None:
+        statement = statement.where(statement.selected_columns[0].in_(list(state)))
+        for listing_id, *values in db.execute(statement):
+            state[listing_id].append(values)
+
+    for content_type in CONTENT_TYPES.values():
+        model, translation = content_type.model, content_type.translation_model
+        collect(
+            select(model.listing_id, func.count(model.id), func.max(model.updated_at))
+            .group_by(model.listing_id)
+        )
+        collect(
+            select(model.listing_id, func.count(translation.id), func.max(translation.updated_at))
+            .join(model, content_type.translation_fk == model.id)
+            .group_by(model.listing_id)
+        )
+    collect(
+        select(
+            ConsentTemplate.listing_id,
+            func.count(ConsentTemplate.id),
+            func.max(ConsentTemplate.updated_at),
+        ).group_by(ConsentTemplate.listing_id)
+    )
+    collect(
+        select(
+            ConsentTemplate.listing_id,
+            func.count(ConsentTemplateTranslation.id),
+            func.max(ConsentTemplateTranslation.updated_at),
+        )
+        .join(ConsentTemplate, ConsentTemplateTranslation.template_id == ConsentTemplate.id)
+        .group_by(ConsentTemplate.listing_id)
+    )
+    return {
+        listing_id: sha1(repr(values).encode("utf-8")).hexdigest()
+        for listing_id, values in state.items()
+    }
+
+
+def _specific_items(db: Session, listing_id: int) -> list[str]:
+    items: set[str] = set()
+    for content_type in CONTENT_TYPES.values():
+        model = content_type.model
+        items.update(
+            db.execute(
+                select(model.specific_item).where(
+                    model.listing_id == listing_id, model.specific_item.is_not(None)
+                )
+            ).scalars()
+        )
+    return sorted(items)
+
+
+def _consent_languages(db: Session, listing_id: int) -> set[str]:
+    return set(
+        db.execute(
+            select(ConsentTemplateTranslation.language_code)
+            .join(ConsentTemplate, ConsentTemplateTranslation.template_id == ConsentTemplate.id)
+            .where(ConsentTemplate.listing_id == listing_id, ConsentTemplate.status == "published")
+        ).scalars()
+    )
+
+
+def _write(path: Path, payload) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(json_dumps(payload))
+
+
+def _current_render(target: Path) -> Path | None:
+    return target.parent / os.readlink(target) if target.is_symlink() else None
+
+
+def _swap_in(root: Path, listing_id: int, rendered: Path) -> None:
+    """Point ``{listing_id}`` at a new render with one ``os.replace`` of its symlink, so
+    readers see the old tree or the new one and never a missing listing."""
+    target = root / str(listing_id)
+    previous = _current_render(target)
+    link = root / f"{rendered.name}.link"
+    link.symlink_to(rendered.name, target_is_directory=True)
+    if target.is_dir() and not target.is_symlink():
+        # a plain directory left by an older export cannot be replaced atomically
+        shutil.rmtree(target)
+    os.replace(link, target)
+    if previous is not None:
+        shutil.rmtree(previous, ignore_errors=True)
+
+
+def remove_listing(root: Path, listing_id: int) -> None:
+    target = root / str(listing_id)
+    previous = _current_render(target)
+    if target.is_symlink():
+        target.unlink()
+    else:
+        shutil.rmtree(target, ignore_errors=True)
+    if previous is not None:
+        shutil.rmtree(previous, ignore_errors=True)
+
+
+def render_listing(db: Session, listing_id: int, root: Path) -> int:
+    """Render one listing into its own temporary directory and swap it in; returns files
+    written."""
+    rendered = Path(tempfile.mkdtemp(prefix=f".{listing_id}.", dir=root))
+    rendered.chmod(0o755)
+    try:
+        written = _render_files(db, listing_id, rendered)
+        _swap_in(root, listing_id, rendered)
+    except BaseException:
+        shutil.rmtree(rendered, ignore_errors=True)
+        raise
+    return written
+
+
+def _render_files(db: Session, listing_id: int, base: Path) -> int:
+    consent_languages = _consent_languages(db, listing_id)
+    written = 0
+    for specific_item in [None, *_specific_items(db, listing_id)]:
+        languages = available_languages(db, listing_id, specific_item) | consent_languages
+        for language in sorted(languages):
+            try:
+                _section_path(base, specific_item, language, "guide")
+            except ValueError:
+                logger.warning(
+                    "Skipping static export of listing %s scope %r language %r",
+                    listing_id,
+                    specific_item,
+                    language,
+                )
+                continue
+            found = lookup_consent(db, listing_id, language_chain([language]))
+            consent = None
+            if found is not None and found[0] is not None and found[1] is not None:
+                consent = serialize_consent(found[0], found[1])
+            document = build_guide_document(db, listing_id, specific_item, language)
+            files = {
+                "guide": section_payload(
+                    document, listing_id, specific_item, "guide", language, consent
+                ),
+                **{
+                    content_type.path: section_payload(
+                        document, listing_id, specific_item, section, language
+                    )
+                    for section, content_type in CONTENT_TYPES.items()
+                },
+            }
+            if specific_item is None and consent is not None:
+                files["consent"] = consent
+            for section, payload in files.items():
+                _write(_section_path(base, specific_item, language, section), payload)
+                written += 1
+    return written
+
+
+def _init_worker(database_url: str) -> None:
+    global _worker_engine
+    _worker_engine = create_engine(database_url)
+
+
+def _render_in_worker(listing_id: int, root: str) -> int:
+    with Session(bind=_worker_engine) as db:
+        return render_listing(db, listing_id, Path(root))
+
+
+def _load_manifest(root: Path) -> dict[str, str]:
+    try:
+        return json.loads((root / MANIFEST_NAME).read_text("utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def export_static_guides(
+    bind: Engine,
+    output_dir: str | os.PathLike | None = None,
+    listing_ids: Iterable[int] | None = None,
+    force: bool = False,
+    workers: int | None = None,
+) -> dict[str, list[int]]:
+    root = export_root(output_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    listing_ids = None if listing_ids is None else list(listing_ids)
+    manifest = _load_manifest(root)
+    with Session(bind=bind) as db:
+        fingerprints = listing_fingerprints(db, listing_ids)
+    changed = [
+        listing_id
+        for listing_id, fingerprint in sorted(fingerprints.items())
+        if force or manifest.get(str(listing_id)) != fingerprint
+    ]
+    candidates = manifest if listing_ids is None else [str(item) for item in listing_ids]
+    removed = [
+        int(key) for key in candidates if key in manifest and int(key) not in fingerprints
+    ]
+
+    workers = workers or settings.static_export_workers or os.cpu_count() or 1
+    if workers > 1 and len(changed) > 1:
+        database_url = bind.url.render_as_string(hide_password=False)
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(changed)),
+            initializer=_init_worker,
+            initargs=(database_url,),
+        ) as pool:
+            list(pool.map(_render_in_worker, changed, [str(root)] * len(changed)))
+    else:
+        with Session(bind=bind) as db:
+            for listing_id in changed:
+                render_listing(db, listing_id, root)
+
+    for listing_id in removed:
+        remove_listing(root, listing_id)
+        manifest.pop(str(listing_id), None)
+    for listing_id in changed:
+        manifest[str(listing_id)] = fingerprints[listing_id]
+    manifest_tmp = root / f".{MANIFEST_NAME}.tmp"
+    manifest_tmp.write_text(json.dumps(manifest, sort_keys=True, indent=2), "utf-8")
+    manifest_tmp.replace(root / MANIFEST_NAME)
+    logger.info("Static export: %s rendered, %s removed", len(changed), len(removed))
+    return {
+        "exported": changed,
+        "unchanged": sorted(set(fingerprints) - set(changed)),
+        "removed": removed,
+    }
+
+
+def find_static_file(
+    root: Path,
+    listing_id: int,
+    specific_item: str | None,
+    section: str,
+    languages: list[str],
+) -> tuple[Path, str] | None:
+    base = root.resolve()
+    for language in languages:
+        try:
+            path = static_file_path(root, listing_id, specific_item, language, section).resolve()
+        except ValueError:
+            continue
+        if path.is_relative_to(base) and path.is_file():
+            return path, language
+    return None
+
+
+def main(argv: list[str] | None = None) -> None:
+    from app.db.session import engine
+
+    parser = argparse.ArgumentParser(description="Export guest guides as static JSON files.")
+    parser.add_argument("--output-dir", default=None)
+    parser.add_argument("--listing", type=int, action="append", dest="listing_ids")
+    parser.add_argument("--force", action="store_true")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    result = export_static_guides(
+        engine,
+        output_dir=args.output_dir,
+        listing_ids=args.listing_ids,
+        force=args.force,
+        workers=args.workers,
+    )
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
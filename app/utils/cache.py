@@ -0,0 +1,380 @@
+from __future__ import annotations
+
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
+from hashlib import sha1
+from operator import itemgetter
+from threading import Lock
+from typing import Any, Callable, Hashable
+
+from app.core.config import get_settings
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+settings = get_settings()
+
+
+def estimate_size(value: Any) -> int:
+    return len(json.dumps(value, default=str, separators=(",", ":")))
+
+
+class TTLCache:
+    """Thread-safe LRU cache bounded by entry count and approximate payload bytes."""
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, int, Any]] = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, _, value = entry
+            if expires_at <= self._clock():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, size: int | None = None) -> None:
+        size = estimate_size(value) if size is None else size
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (self._clock() + self.ttl_seconds, size, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                self.invalidations += 1
+
+    def invalidate(
+        self, match: Callable[[Hashable], bool], namespace: Hashable | None = None
+    ) -> int:
+        with self._lock:
+            keys = [key for key in self._entries if match(key)]
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, int | float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+class CacheBackend(ABC):
+    """Byte-valued key/value store that caches and rate limits can share across workers."""
+
+    name = "backend"
+
+    @abstractmethod
+    def get(self, key: str) -> bytes | None:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl_seconds: float | None = None) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, *keys: str) -> int:
+        ...
+
+    @abstractmethod
+    def incr(self, key: str, amount: int = 1, ttl_seconds: float | None = None) -> int:
+        """Atomically add to a counter; ``ttl_seconds`` applies when the counter is created."""
+
+    @abstractmethod
+    def clear(self, prefix: str = "") -> None:
+        ...
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Per-process backend; the default for single-worker deployments and tests."""
+
+    name = "memory"
+    sweep_every = 1024
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self._entries: dict[str, tuple[float | None, bytes]] = {}
+        self._lock = Lock()
+        self._writes = 0
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._live(key)
+            return None if entry is None else entry[1]
+
+    def set(self, key: str, value: bytes, ttl_seconds: float | None = None) -> None:
+        with self._lock:
+            self._write(key, self._expiry(ttl_seconds), value)
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            removed = [key for key in keys if self._live(key) is not None]
+            for key in removed:
+                del self._entries[key]
+            return len(removed)
+
+    def incr(self, key: str, amount: int = 1, ttl_seconds: float | None = None) -> int:
+        with self._lock:
+            entry = self._live(key)
+            if entry is None:
+                expires_at, value = self._expiry(ttl_seconds), amount
+            else:
+                expires_at, value = entry[0], int(entry[1]) + amount
+            self._write(key, expires_at, str(value).encode())
+            return value
+
+    def clear(self, prefix: str = "") -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+    def _expiry(self, ttl_seconds: float | None) -> float | None:
+        return None if ttl_seconds is None else self._clock() + ttl_seconds
+
+    def _live(self, key: str) -> tuple[float | None, bytes] | None:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] is not None and entry[0] <= self._clock():
+            del self._entries[key]
+            return None
+        return entry
+
+    def _write(self, key: str, expires_at: float | None, value: bytes) -> None:
+        self._entries[key] = (expires_at, value)
+        self._writes += 1
+        if self._writes % self.sweep_every == 0:
+            now = self._clock()
+            for stale in [
+                name
+                for name, (expiry, _) in self._entries.items()
+                if expiry is not None and expiry <= now
+            ]:
+                del self._entries[stale]
+
+
+class RedisCacheBackend(CacheBackend):
+    """Backend speaking the Redis protocol (Redis, Valkey, KeyDB, or fakeredis in tests)."""
+
+    name = "redis"
+
+    def __init__(self, client, prefix: str = "") -> None:
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, prefix: str = "") -> "RedisCacheBackend":
+        if redis is None:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package")
+        return cls(redis.Redis.from_url(url), prefix)
+
+    def get(self, key: str) -> bytes | None:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl_seconds: float | None = None) -> None:
+        px = None if ttl_seconds is None else max(int(ttl_seconds * 1000), 1)
+        self.client.set(self.prefix + key, value, px=px)
+
+    def delete(self, *keys: str) -> int:
+        if not keys:
+            return 0
+        return self.client.delete(*(self.prefix + key for key in keys))
+
+    def incr(self, key: str, amount: int = 1, ttl_seconds: float | None = None) -> int:
+        name = self.prefix + key
+        with self.client.pipeline() as pipe:
+            if ttl_seconds is not None:
+                # creates the counter with its expiry; a no-op when it already exists
+                pipe.set(name, 0, px=max(int(ttl_seconds * 1000), 1), nx=True)
+            pipe.incrby(name, amount)
+            return int(pipe.execute()[-1])
+
+    def clear(self, prefix: str = "") -> None:
+        batch: list[bytes] = []
+        for name in self.client.scan_iter(match=f"{self.prefix}{prefix}*", count=500):
+            batch.append(name)
+            if len(batch) >= 500:
+                self.client.delete(*batch)
+                batch.clear()
+        if batch:
+            self.client.delete(*batch)
+
+
+def dump_entry(value: Any) -> bytes:
+    """JSON header line, then the raw ``body`` bytes when the entry is a dict carrying one."""
+    body = b""
+    if isinstance(value, dict) and isinstance(value.get("body"), bytes):
+        value = dict(value)
+        body = value.pop("body")
+        header = {"value": value, "body": True}
+    else:
+        header = {"value": value, "body": False}
+    return json.dumps(header, separators=(",", ":")).encode("utf-8") + b"\n" + body
+
+
+def load_entry(raw: bytes) -> Any:
+    header, _, body = raw.partition(b"\n")
+    decoded = json.loads(header)
+    value = decoded["value"]
+    if decoded["body"]:
+        value["body"] = body
+    return value
+
+
+class SharedTTLCache:
+    """TTLCache counterpart kept in a CacheBackend so all workers share one set of entries.
+
+    Keys are grouped into namespaces (the first key element by default). Invalidation
+    bumps the namespace's generation instead of enumerating keys, so it drops every
+    entry of the namespace; stale generations age out through the TTL.
+
+    Values must be JSON-serializable (tuples come back as lists), except for a bytes
+    ``body`` in a dict, which is stored as-is after the JSON header. Nothing read from the
+    backend is unpickled, so write access to it does not mean code execution.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        ttl_seconds: float,
+        max_entry_bytes: int = 1024 * 1024,
+        prefix: str = "cache:",
+        namespace: Callable[[Hashable], Hashable] = itemgetter(0),
+    ) -> None:
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.max_entry_bytes = max_entry_bytes
+        self.prefix = prefix
+        self._namespace = namespace
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        raw = self.backend.get(self._key(key))
+        value = None
+        if raw is not None:
+            try:
+                value = load_entry(raw)
+            except (ValueError, KeyError, TypeError):
+                value = None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, size: int | None = None) -> None:
+        raw = dump_entry(value)
+        if len(raw) > self.max_entry_bytes:
+            return
+        self.backend.set(self._key(key), raw, self.ttl_seconds)
+
+    def delete(self, key: Hashable) -> None:
+        if self.backend.delete(self._key(key)):
+            with self._lock:
+                self.invalidations += 1
+
+    def invalidate(
+        self, match: Callable[[Hashable], bool], namespace: Hashable | None = None
+    ) -> int:
+        if namespace is None:
+            self.clear()
+        else:
+            self.backend.incr(self._generation_key(namespace))
+        with self._lock:
+            self.invalidations += 1
+        return 1
+
+    def clear(self) -> None:
+        self.backend.clear(self.prefix)
+
+    def stats(self) -> dict[str, int | float | str]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": self.backend.name,
+                "max_entry_bytes": self.max_entry_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+    def _generation_key(self, namespace: Hashable) -> str:
+        return f"{self.prefix}gen:{namespace}"
+
+    def _key(self, key: Hashable) -> str:
+        namespace = self._namespace(key)
+        generation = (self.backend.get(self._generation_key(namespace)) or b"0").decode()
+        digest = sha1(repr(key).encode("utf-8")).hexdigest()
+        return f"{self.prefix}{namespace}:{generation}:{digest}"
+
+
+@lru_cache()
+def get_cache_backend() -> CacheBackend:
+    if settings.cache_backend == "redis":
+        return RedisCacheBackend.from_url(settings.cache_redis_url, settings.cache_key_prefix)
+    if settings.cache_backend != "memory":
+        raise ValueError(f"Unknown CACHE_BACKEND {settings.cache_backend!r}")
+    return MemoryCacheBackend()
@@ -0,0 +1,20 @@
+from hashlib import sha1
+from typing import Any
+
+
+def make_etag(*parts: Any) -> str:
+    return '"' + sha1(repr(parts).encode("utf-8")).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
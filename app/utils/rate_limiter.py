@@ -7,9 +7,25 @@ from typing import Callable
 
 from fastapi import HTTPException, Request, status
 
+from app.core.config import get_settings
+from app.utils.cache import CacheBackend, get_cache_backend
+
+settings = get_settings()
+
+
+def _too_many_requests() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many requests. Please try again later.",
+    )
+
 
 class RateLimiter:
-    def __init__(self) -> None:
+    """Sliding-window limiter kept in process, or fixed-window counters in a shared
+    CacheBackend so the limit holds across workers."""
+
+    def __init__(self, backend: CacheBackend | None = None) -> None:
+        self.backend = backend
         self._buckets: dict[str, list[float]] = defaultdict(list)
         self._lock = Lock()
 
@@ -18,20 +34,25 @@ class RateLimiter:
             client_key = request.client.host if request.client else "anonymous"
             key = f"{key_prefix}:{client_key}"
             now = time.time()
+            if self.backend is not None:
+                window = int(now // window_seconds)
+                calls = self.backend.incr(
+                    f"ratelimit:{key}:{window}", ttl_seconds=window_seconds
+                )
+                if calls > max_calls:
+                    raise _too_many_requests()
+                return
             with self._lock:
                 calls = self._buckets[key]
                 # purge old entries
                 while calls and now - calls[0] > window_seconds:
                     calls.pop(0)
                 if len(calls) >= max_calls:
-                    raise HTTPException(
-                        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                        detail="Too many requests. Please try again later.",
-                    )
+                    raise _too_many_requests()
                 calls.append(now)
 
         return dependency
 
 
-rate_limiter = RateLimiter()
+rate_limiter = RateLimiter(None if settings.cache_backend == "memory" else get_cache_backend())
 
@@ -0,0 +1,151 @@
+"""Sync vs async public guide reads at high concurrency.
+
+Serves the same guide section through a threadpool ``def`` handler on a sync Session
+and an ``async def`` handler on an AsyncSession, and fires concurrent requests at each
+in-process. ``--latency-ms`` adds a per-statement wait inside the database driver to
+stand in for the network round trip to Postgres.
+
+    python -m benchmarks.bench_async_public --concurrency 50 500 2000 --latency-ms 5
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi import Depends, FastAPI, Response  # noqa: E402
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from sqlalchemy.pool import NullPool  # noqa: E402
+
+from app.models import FAQ, Base, FAQTranslation, Listing  # noqa: E402
+from app.services.guide import settings  # noqa: E402
+from app.services.guide_snapshot import load_guide_section, rebuild_snapshots  # noqa: E402
+
+
+def _add_latency(engine, latency_ms: float) -> None:
+    @event.listens_for(engine, "connect")
+    def register(dbapi_connection, _):
+        dbapi_connection.create_function("bench_wait", 1, lambda ms: time.sleep(ms / 1000))
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def wait(conn, cursor, statement, parameters, context, executemany):
+        if latency_ms and not statement.startswith("SELECT bench_wait"):
+            cursor.execute("SELECT bench_wait(?)", (latency_ms,))
+
+
+def build_app(path: str, latency_ms: float) -> tuple[FastAPI, int]:
+    sync_engine = create_engine(
+        f"sqlite:///{path}", poolclass=NullPool, connect_args={"check_same_thread": False}
+    )
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    Base.metadata.create_all(sync_engine)
+    with Session(sync_engine) as db:
+        listing = Listing(name="Bench", slug="bench")
+        db.add(listing)
+        db.flush()
+        for index in range(20):
+            faq = FAQ(listing_id=listing.id, is_active=True)
+            faq.translations.append(
+                FAQTranslation(language_code="en", question=f"Q{index}", answer="A" * 200)
+            )
+            db.add(faq)
+        db.commit()
+        listing_id = listing.id
+        rebuild_snapshots(db, listing_id, None)
+    _add_latency(sync_engine, latency_ms)
+    _add_latency(async_engine.sync_engine, latency_ms)
+
+    def sync_db():
+        with Session(sync_engine) as db:
+            yield db
+
+    async def async_db():
+        async with AsyncSession(async_engine) as db:
+            yield db
+
+    app = FastAPI()
+
+    @app.get("/sync/{listing_id}/faqs")
+    def sync_faqs(listing_id: int, db: Session = Depends(sync_db)):
+        _, _, body = load_guide_section(db, listing_id, None, "faqs", ["en"])
+        return Response(body, media_type="application/json")
+
+    @app.get("/async/{listing_id}/faqs")
+    async def async_faqs(listing_id: int, db: AsyncSession = Depends(async_db)):
+        _, _, body = await db.run_sync(load_guide_section, listing_id, None, "faqs", ["en"])
+        return Response(body, media_type="application/json")
+
+    return app, listing_id
+
+
+async def _request(app: FastAPI, path: str) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("bench", 1),
+        "server": ("bench", 80),
+    }
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    started = time.perf_counter()
+    await app(scope, receive, send)
+    if status != 200:
+        raise RuntimeError(f"{path} returned {status}")
+    return time.perf_counter() - started
+
+
+async def run(app: FastAPI, path: str, concurrency: int) -> dict[str, float]:
+    started = time.perf_counter()
+    latencies = sorted(await asyncio.gather(*(_request(app, path) for _ in range(concurrency))))
+    elapsed = time.perf_counter() - started
+    return {
+        "req_per_s": concurrency / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 500, 2000])
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    settings.guide_cache_enabled = False
+    with tempfile.TemporaryDirectory() as directory:
+        app, listing_id = build_app(os.path.join(directory, "bench.db"), args.latency_ms)
+        print(f"per-statement latency {args.latency_ms} ms, guide cache disabled")
+        print(f"{'concurrency':>11} {'handler':>7} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+        for concurrency in args.concurrency:
+            for handler in ("sync", "async"):
+                result = asyncio.run(run(app, f"/{handler}/{listing_id}/faqs", concurrency))
+                print(
+                    f"{concurrency:>11} {handler:>7} {result['req_per_s']:>9.0f} "
+                    f"{result['p50_ms']:>9.1f} {result['p99_ms']:>9.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Per-request CPU cost of encoding guide and consent-log responses.
+
+Compares FastAPI's default path (jsonable_encoder + stdlib JSONResponse) with
+FastJSONResponse and with serving the pre-encoded body kept in the guide cache.
+
+    python -m benchmarks.bench_json_response [--iterations 2000]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse, Response  # noqa: E402
+
+from app.utils import responses  # noqa: E402
+from app.utils.responses import FastJSONResponse, json_dumps  # noqa: E402
+
+
+def guide_payload(items: int) -> dict:
+    return {
+        "listing_id": 1,
+        "specific_item": None,
+        "language": "es",
+        "consent": {
+            "template_id": 1,
+            "template_version": 3,
+            "status": "published",
+            "translation": {"language_code": "es", "title": "Consentimiento", "body": "x" * 800},
+        },
+        "faqs": [
+            {
+                "id": i,
+                "question": f"Pregunta {i}?",
+                "answer": "Respuesta detallada " * 12,
+                "links": [{"label": "Ayuda", "url": f"https://example.com/help/{i}"}],
+                "language_code": "es",
+            }
+            for i in range(items)
+        ],
+        "tutorials": [
+            {
+                "id": i,
+                "title": f"Tutorial {i}",
+                "description": "Paso a paso " * 10,
+                "video_url": f"https://example.com/video/{i}",
+                "thumbnail_url": None,
+                "language_code": "en",
+            }
+            for i in range(items)
+        ],
+        "page_descriptions": [{"id": 1, "body": "Bienvenido " * 100, "language_code": "es"}],
+    }
+
+
+def consent_logs(rows: int) -> list[dict]:
+    created_at = datetime(2024, 8, 1, 12, 0, tzinfo=timezone.utc)
+    return [
+        {
+            "id": i,
+            "listing_id": 1,
+            "template_id": 1,
+            "template_version": 3,
+            "language_code": "es",
+            "decision": "accepted",
+            "email": f"guest{i}@example.com",
+            "ip_address": "203.0.113.7",
+            "user_agent": "Mozilla/5.0",
+            "created_at": created_at,
+        }
+        for i in range(rows)
+    ]
+
+
+def cpu_per_call(func, iterations: int) -> float:
+    func()
+    start = time.process_time()
+    for _ in range(iterations):
+        func()
+    return (time.process_time() - start) / iterations * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    encoder = "orjson" if responses.orjson is not None else "stdlib json"
+    print(f"FastJSONResponse encoder: {encoder}")
+    for name, payload in (
+        ("guide bundle (40 items)", guide_payload(20)),
+        ("consent logs (500 rows)", consent_logs(500)),
+    ):
+        cached = json_dumps(payload)
+        timings = {
+            "jsonable_encoder + JSONResponse": cpu_per_call(
+                lambda: JSONResponse(jsonable_encoder(payload)).body, args.iterations
+            ),
+            "FastJSONResponse": cpu_per_call(
+                lambda: FastJSONResponse(payload).body, args.iterations
+            ),
+            "cached body": cpu_per_call(
+                lambda: Response(content=cached, media_type="application/json").body,
+                args.iterations,
+            ),
+        }
+        baseline = timings["jsonable_encoder + JSONResponse"]
+        print(f"\n{name}, {len(cached)} bytes")
+        for label, micros in timings.items():
+            print(f"  {label:<34} {micros:9.1f} us/request  {baseline / micros:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
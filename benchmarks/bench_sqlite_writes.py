@@ -0,0 +1,211 @@
+"""Concurrent consent submissions against a file-backed SQLite database.
+
+Starts ``--workers`` processes (standing in for uvicorn workers), each firing
+``--requests`` concurrent ``POST /public/listings/{id}/consent`` calls through the real
+app in-process, once with plain SQLite engines and once with the WAL / single-writer
+mode from ``app.db.sqlite``. Reports throughput, latency and "database is locked"
+failures per mode.
+
+    python -m benchmarks.bench_sqlite_writes --workers 4 --requests 200
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine, func, select  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlalchemy.ext.asyncio import (  # noqa: E402
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.db.session import create_sqlite_engines, get_async_db  # noqa: E402
+from app.db.sqlite import RoutingSession  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Base, ConsentLog, ConsentTemplate, Listing  # noqa: E402
+from app.services.guide import set_current_template  # noqa: E402
+
+MODES = ("default", "sqlite")
+
+
+def prepare(path: str) -> dict:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        listing = Listing(name="Bench", slug="bench")
+        db.add(listing)
+        db.flush()
+        template = ConsentTemplate(listing_id=listing.id, version=1, status="published")
+        db.add(template)
+        db.flush()
+        set_current_template(db, listing.id)
+        db.commit()
+        payload = {
+            "listing_id": listing.id,
+            "template_id": template.id,
+            "template_version": template.version,
+        }
+    engine.dispose()
+    return payload
+
+
+def session_factory(url: str, mode: str) -> tuple[async_sessionmaker, list[AsyncEngine]]:
+    if mode == "sqlite":
+        reader, writer = create_sqlite_engines(url)
+        factory = async_sessionmaker(
+            bind=writer,
+            class_=AsyncSession,
+            sync_session_class=RoutingSession,
+            reader=reader.sync_engine,
+            writer=writer.sync_engine,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+        return factory, [reader, writer]
+    engine = create_async_engine(url)
+    return async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False), [engine]
+
+
+async def _submit(path: str, body: bytes) -> tuple[int | str, float]:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "headers": [(b"host", b"bench"), (b"content-type", b"application/json")],
+        "client": ("bench", 1),
+        "server": ("bench", 80),
+    }
+    status: int | str = 0
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            await asyncio.sleep(3600)
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    started = time.perf_counter()
+    try:
+        await app(scope, receive, send)
+    except OperationalError as exc:
+        status = "locked" if "locked" in str(exc) else "error"
+    return status, time.perf_counter() - started
+
+
+async def _run_worker(url: str, mode: str, payload: dict, requests: int) -> dict:
+    factory, engines = session_factory(url, mode)
+
+    async def override_get_async_db():
+        async with factory() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    # a distinct guest per request, or the derived idempotency key replays the first one
+    bodies = [
+        json.dumps(
+            {
+                "template_id": payload["template_id"],
+                "template_version": payload["template_version"],
+                "language_code": "en",
+                "decision": "accept",
+                "email": f"guest-{os.getpid()}-{index}@example.com",
+            }
+        ).encode()
+        for index in range(requests)
+    ]
+    path = f"/public/listings/{payload['listing_id']}/consent"
+    results = await asyncio.gather(*(_submit(path, body) for body in bodies))
+    for engine in engines:
+        # pooled aiosqlite connections run on non-daemon threads
+        await engine.dispose()
+    return {
+        "statuses": [status for status, _ in results],
+        "latencies": [latency for _, latency in results],
+    }
+
+
+def worker(url: str, mode: str, payload: dict, requests: int) -> dict:
+    return asyncio.run(_run_worker(url, mode, payload, requests))
+
+
+def run_mode(directory: str, mode: str, workers: int, requests: int) -> dict:
+    path = os.path.join(directory, f"{mode}.db")
+    payload = prepare(path)
+    url = f"sqlite+aiosqlite:///{path}"
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(
+            pool.map(
+                worker,
+                [url] * workers,
+                [mode] * workers,
+                [payload] * workers,
+                [requests] * workers,
+            )
+        )
+    elapsed = time.perf_counter() - started
+    statuses = [status for result in results for status in result["statuses"]]
+    latencies = sorted(latency for result in results for latency in result["latencies"])
+    engine = create_engine(f"sqlite:///{path}")
+    with Session(engine) as db:
+        stored = db.scalar(select(func.count(ConsentLog.id)))
+    engine.dispose()
+    return {
+        "ok": statuses.count(200),
+        "locked": statuses.count("locked"),
+        "failed": len(statuses) - statuses.count(200) - statuses.count("locked"),
+        "stored": stored,
+        "req_per_s": len(statuses) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=200, help="concurrent POSTs per worker")
+    parser.add_argument("--mode", choices=(*MODES, "both"), default="both")
+    args = parser.parse_args()
+
+    modes = MODES if args.mode == "both" else (args.mode,)
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{args.workers} workers x {args.requests} concurrent consent POSTs")
+        print(
+            f"{'mode':>8} {'ok':>6} {'locked':>7} {'failed':>7} {'stored':>7} "
+            f"{'req/s':>8} {'p50 ms':>9} {'p99 ms':>9}"
+        )
+        for mode in modes:
+            result = run_mode(directory, mode, args.workers, args.requests)
+            print(
+                f"{mode:>8} {result['ok']:>6} {result['locked']:>7} {result['failed']:>7} "
+                f"{result['stored']:>7} {result['req_per_s']:>8.0f} "
+                f"{result['p50_ms']:>9.1f} {result['p99_ms']:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
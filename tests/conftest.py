@@ -8,12 +8,16 @@ from urllib.parse import urlencode
 import os
 import sys
 import typing
+import uuid
 
 import anyio
 import pytest
 from pydantic import typing as pydantic_typing
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
@@ -28,9 +32,11 @@ def _patched_forwardref_eval(self, globalns, localns, *args, **kwargs):  # type:
 
 typing.ForwardRef._evaluate = _patched_forwardref_eval  # type: ignore[attr-defined]
 
-from app.db.session import get_db
+from app.db.session import get_async_db, get_db
 from app.main import app
 from app.models import AdminRoleEnum, AdminUser, Base
+from app.services.guide import guide_cache
+from app.utils.rate_limiter import rate_limiter
 from app.utils.security import get_password_hash
 
 
@@ -99,15 +105,24 @@ class SimpleTestClient:
         }
 
         messages: list[dict] = []
+        request_sent = False
+        response_complete = anyio.Event()
 
         async def receive() -> dict:
-            nonlocal body
+            nonlocal body, request_sent
+            if request_sent:
+                # like a real server: nothing more arrives until the client goes away
+                await response_complete.wait()
+                return {"type": "http.disconnect"}
+            request_sent = True
             data = body
             body = b""
             return {"type": "http.request", "body": data, "more_body": False}
 
         async def send(message: dict) -> None:
             messages.append(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_complete.set()
 
         async def run() -> None:
             await self.app(scope, receive, send)
@@ -146,6 +161,8 @@ class SimpleTestClient:
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# every SimpleTestClient request runs in a fresh event loop, so async connections are not pooled
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -156,6 +173,13 @@ def setup_database() -> Generator[None, None, None]:
     Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture(autouse=True)
+def clear_guide_cache() -> Generator[None, None, None]:
+    guide_cache.clear()
+    yield
+    guide_cache.clear()
+
+
 @pytest.fixture()
 def db_session() -> Generator[Session, None, None]:
     session = TestingSessionLocal()
@@ -174,11 +198,24 @@ def client(db_session: Session) -> Generator[SimpleTestClient, None, None]:
         finally:
             pass
 
+    async def override_get_async_db():
+        async with AsyncSession(
+            bind=async_engine, autoflush=False, expire_on_commit=False
+        ) as session:
+            yield session
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     yield SimpleTestClient(app)
     app.dependency_overrides.clear()
 
 
+@pytest.fixture()
+def async_bind() -> Engine:
+    """Sync facade of the engine behind the async public routes, for event listeners."""
+    return async_engine.sync_engine
+
+
 @pytest.fixture()
 def admin_user(db_session: Session) -> AdminUser:
     existing = db_session.query(AdminUser).filter(AdminUser.email == "admin@example.com").first()
@@ -193,3 +230,22 @@ def admin_user(db_session: Session) -> AdminUser:
     db_session.commit()
     db_session.refresh(user)
     return user
+
+
+@pytest.fixture()
+def admin_headers(client: SimpleTestClient, db_session: Session) -> dict[str, str]:
+    rate_limiter._buckets.clear()
+    email = f"logs-{uuid.uuid4().hex[:8]}@example.com"
+    db_session.add(
+        AdminUser(
+            email=email,
+            hashed_password=get_password_hash("Secretpass1!"),
+            role=AdminRoleEnum.SUPERADMIN.value,
+        )
+    )
+    db_session.commit()
+    response = client.post(
+        "/admin/auth/login", json={"email": email, "password": "Secretpass1!"}
+    )
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
@@ -0,0 +1,274 @@
+import csv
+import gzip
+import io
+import json
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.orm import Session
+
+from tests.test_public_flow import _create_listing, _create_published_consent
+
+from app.api.routers.admin import logs as logs_router
+from app.models import ConsentDailyRollup, ConsentLog, Listing
+
+START = datetime(2024, 3, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture()
+def listing_logs(db_session: Session):
+    listing = Listing(name="Logs", slug=f"logs-{uuid.uuid4().hex[:8]}")
+    db_session.add(listing)
+    db_session.flush()
+    logs = [
+        ConsentLog(
+            listing_id=listing.id,
+            template_version=1,
+            language_code="en" if index % 2 else "es",
+            decision="accept" if index % 3 else "decline",
+            email=f"guest{index}@example.com",
+            user_agent='agent, "quoted"',
+            created_at=START + timedelta(hours=index),
+        )
+        for index in range(30)
+    ]
+    db_session.add_all(logs)
+    db_session.commit()
+    yield listing, logs
+    for log in logs:
+        db_session.delete(log)
+    db_session.commit()
+
+
+def test_export_streams_csv_newest_first(client, admin_headers, listing_logs, monkeypatch):
+    monkeypatch.setattr(logs_router, "EXPORT_CHUNK_BYTES", 256)
+    listing, logs = listing_logs
+
+    response = client.get(
+        "/admin/consent-logs/export",
+        headers=admin_headers,
+        params={"listing_id": listing.id},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "consent-logs.csv" in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response._body.decode("utf-8"))))
+    assert [int(row["id"]) for row in rows] == [log.id for log in reversed(logs)]
+    assert rows[0]["user_agent"] == 'agent, "quoted"'
+    assert datetime.fromisoformat(rows[-1]["created_at"]).replace(tzinfo=timezone.utc) == START
+
+
+def test_export_ndjson_applies_filters(client, admin_headers, listing_logs):
+    listing, logs = listing_logs
+
+    response = client.get(
+        "/admin/consent-logs/export",
+        headers=admin_headers,
+        params={
+            "format": "ndjson",
+            "listing_id": listing.id,
+            "language": "en",
+            "start": (START + timedelta(hours=10)).isoformat(),
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    records = [json.loads(line) for line in response._body.decode("utf-8").splitlines()]
+    expected = [log for index, log in enumerate(logs) if index % 2 and index >= 10]
+    assert [record["id"] for record in records] == [log.id for log in reversed(expected)]
+    assert set(records[0]) == set(logs_router.LOG_COLUMNS)
+
+
+def test_export_gzips_when_accepted(client, admin_headers, listing_logs):
+    listing, logs = listing_logs
+
+    response = client.get(
+        "/admin/consent-logs/export",
+        headers={**admin_headers, "Accept-Encoding": "gzip, deflate"},
+        params={"format": "ndjson", "listing_id": listing.id},
+    )
+
+    assert response.headers["content-encoding"] == "gzip"
+    lines = gzip.decompress(response._body).decode("utf-8").splitlines()
+    assert len(lines) == len(logs)
+
+
+def test_export_is_not_gzipped_when_refused(client, admin_headers, listing_logs):
+    listing, logs = listing_logs
+
+    response = client.get(
+        "/admin/consent-logs/export",
+        headers={**admin_headers, "Accept-Encoding": "gzip;q=0, identity"},
+        params={"format": "ndjson", "listing_id": listing.id},
+    )
+
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert len(response._body.decode("utf-8").splitlines()) == len(logs)
+
+
+def test_export_rejects_unknown_format(client, admin_headers):
+    response = client.get(
+        "/admin/consent-logs/export", headers=admin_headers, params={"format": "xml"}
+    )
+
+    assert response.status_code == 422
+
+
+def test_list_pages_with_keyset_cursor(client, admin_headers, listing_logs):
+    listing, logs = listing_logs
+    seen, cursor, pages = [], None, 0
+
+    while True:
+        params = {"listing_id": listing.id, "limit": 7}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/admin/consent-logs", headers=admin_headers, params=params)
+        assert response.status_code == 200
+        page = response.json()
+        pages += 1
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert pages == 5
+    assert seen == [log.id for log in reversed(logs)]
+    assert set(page["items"][0]) == set(logs_router.LOG_COLUMNS)
+
+
+def test_cursor_breaks_created_at_ties_by_id(client, admin_headers, db_session):
+    listing = Listing(name="Ties", slug=f"ties-{uuid.uuid4().hex[:8]}")
+    db_session.add(listing)
+    db_session.flush()
+    logs = [
+        ConsentLog(
+            listing_id=listing.id,
+            template_version=1,
+            language_code="en",
+            decision="accept",
+            created_at=START,
+        )
+        for _ in range(5)
+    ]
+    db_session.add_all(logs)
+    db_session.commit()
+
+    first = client.get(
+        "/admin/consent-logs", headers=admin_headers, params={"listing_id": listing.id, "limit": 3}
+    ).json()
+    second = client.get(
+        "/admin/consent-logs",
+        headers=admin_headers,
+        params={"listing_id": listing.id, "limit": 3, "cursor": first["next_cursor"]},
+    ).json()
+
+    ids = [item["id"] for item in first["items"] + second["items"]]
+    assert ids == sorted((log.id for log in logs), reverse=True)
+    assert second["next_cursor"] is None
+    for log in logs:
+        db_session.delete(log)
+    db_session.commit()
+
+
+def test_list_rejects_bad_cursor_and_oversized_pages(client, admin_headers):
+    bad = client.get("/admin/consent-logs", headers=admin_headers, params={"cursor": "nope"})
+    too_big = client.get(
+        "/admin/consent-logs",
+        headers=admin_headers,
+        params={"limit": logs_router.MAX_PAGE_SIZE + 1},
+    )
+
+    assert bad.status_code == 400
+    assert bad.json()["detail"] == "Invalid cursor"
+    assert too_big.status_code == 422
+
+
+def test_submissions_update_daily_rollups(client, admin_headers, db_session):
+    listing = _create_listing(db_session)
+    template = _create_published_consent(db_session, listing)
+    submissions = (("en", "accept"), ("en", "accept"), ("en", "decline"), ("es", "accept"))
+    for index, (language, decision) in enumerate(submissions):
+        response = client.post(
+            f"/public/listings/{listing.id}/consent",
+            json={
+                "template_id": template.id,
+                "template_version": template.version,
+                "language_code": language,
+                "decision": decision,
+                "email": f"guest{index}@example.com",
+            },
+        )
+        assert response.status_code == 200
+
+    today = datetime.now(timezone.utc).date()
+    rollups = db_session.query(ConsentDailyRollup).filter_by(listing_id=listing.id).all()
+    assert sorted((r.day, r.language_code, r.decision, r.count) for r in rollups) == [
+        (today, "en", "accept", 2),
+        (today, "en", "decline", 1),
+        (today, "es", "accept", 1),
+    ]
+
+    stats = client.get(
+        "/admin/consent-stats", headers=admin_headers, params={"listing_id": listing.id}
+    ).json()
+    assert stats == [
+        {
+            "day": today.isoformat(),
+            "accept": 3,
+            "decline": 1,
+            "total": 4,
+            "acceptance_rate": 0.75,
+        }
+    ]
+    db_session.query(ConsentLog).filter_by(listing_id=listing.id).delete()
+    db_session.commit()
+
+
+def test_consent_stats_groups_rollups_within_range(client, admin_headers, db_session):
+    listing = Listing(name="Stats", slug=f"stats-{uuid.uuid4().hex[:8]}")
+    db_session.add(listing)
+    db_session.flush()
+    for day, language, decision, count in (
+        (date(2024, 3, 1), "en", "accept", 8),
+        (date(2024, 3, 1), "en", "decline", 2),
+        (date(2024, 3, 2), "es", "accept", 1),
+        (date(2024, 3, 2), "en", "accept", 5),
+        (date(2024, 3, 9), "en", "decline", 50),
+    ):
+        db_session.add(
+            ConsentDailyRollup(
+                listing_id=listing.id,
+                day=day,
+                template_version=1,
+                language_code=language,
+                decision=decision,
+                count=count,
+            )
+        )
+    db_session.commit()
+
+    response = client.get(
+        "/admin/consent-stats",
+        headers=admin_headers,
+        params={
+            "listing_id": listing.id,
+            "start": "2024-03-01",
+            "end": "2024-03-02",
+            "group_by": ["language", "listing"],
+        },
+    )
+
+    assert response.status_code == 200
+    assert [
+        (row["language"], row["listing"], row["accept"], row["decline"], row["total"])
+        for row in response.json()
+    ] == [("en", listing.id, 13, 2, 15), ("es", listing.id, 1, 0, 1)]
+    assert [row["acceptance_rate"] for row in response.json()] == [0.8667, 1.0]
+    bad = client.get(
+        "/admin/consent-stats", headers=admin_headers, params={"group_by": "decision"}
+    )
+    assert bad.status_code == 422
@@ -0,0 +1,174 @@
+import pickle
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.utils.cache import MemoryCacheBackend, RedisCacheBackend, SharedTTLCache, TTLCache
+from app.utils.rate_limiter import RateLimiter
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_cache_hits_misses_and_ttl_expiry() -> None:
+    clock = FakeClock()
+    cache = TTLCache(max_entries=10, max_bytes=10_000, ttl_seconds=30, clock=clock)
+
+    assert cache.get("a") is None
+    cache.set("a", {"items": [1, 2, 3]})
+    assert cache.get("a") == {"items": [1, 2, 3]}
+
+    clock.now = 31
+    assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["expirations"] == 1
+    assert stats["entries"] == 0
+
+
+def test_cache_evicts_least_recently_used_by_count_and_bytes() -> None:
+    cache = TTLCache(max_entries=2, max_bytes=100, ttl_seconds=60)
+    cache.set("a", "x", size=10)
+    cache.set("b", "y", size=10)
+    cache.get("a")
+    cache.set("c", "z", size=10)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "x"
+    assert cache.stats()["evictions"] == 1
+
+    cache.set("big", "payload", size=95)
+    assert cache.get("a") is None
+    assert cache.get("c") is None
+    assert cache.stats()["bytes"] == 95
+
+    cache.set("too-big", "payload", size=101)
+    assert cache.get("too-big") is None
+
+
+def test_cache_invalidate_by_predicate() -> None:
+    cache = TTLCache(max_entries=10, max_bytes=10_000, ttl_seconds=60)
+    cache.set((1, None, "faqs", "en"), {"items": []})
+    cache.set((1, "parking", "faqs", "en"), {"items": []})
+    cache.set((2, None, "faqs", "en"), {"items": []})
+
+    removed = cache.invalidate(lambda key: key[0] == 1)
+
+    assert removed == 2
+    assert cache.get((2, None, "faqs", "en")) == {"items": []}
+    assert cache.stats()["invalidations"] == 2
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request):
+    if request.param == "memory":
+        return MemoryCacheBackend(clock=FakeClock())
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisCacheBackend(fakeredis.FakeRedis(), prefix="test:")
+
+
+def _expire(backend, seconds: float) -> None:
+    if isinstance(backend, MemoryCacheBackend):
+        backend._clock.now += seconds
+    else:
+        for name in backend.client.scan_iter(match=f"{backend.prefix}*"):
+            if backend.client.pttl(name) > 0:
+                backend.client.delete(name)
+
+
+def test_backend_get_set_delete_and_ttl(backend) -> None:
+    assert backend.get("missing") is None
+    backend.set("a", b"1")
+    backend.set("b", b"2", ttl_seconds=30)
+    assert backend.get("a") == b"1"
+    assert backend.get("b") == b"2"
+
+    _expire(backend, 31)
+    assert backend.get("b") is None
+    assert backend.get("a") == b"1"
+
+    assert backend.delete("a", "missing") == 1
+    assert backend.get("a") is None
+
+
+def test_backend_incr_sets_ttl_only_on_create(backend) -> None:
+    assert backend.incr("hits", ttl_seconds=30) == 1
+    assert backend.incr("hits", amount=4, ttl_seconds=30) == 5
+    assert backend.get("hits") == b"5"
+
+    _expire(backend, 31)
+    assert backend.incr("hits") == 1
+
+
+def test_backend_clear_by_prefix(backend) -> None:
+    backend.set("guide:1", b"x")
+    backend.set("guide:2", b"y")
+    backend.set("other", b"z")
+
+    backend.clear("guide:")
+
+    assert backend.get("guide:1") is None
+    assert backend.get("other") == b"z"
+
+
+def test_shared_cache_is_visible_to_every_worker(backend) -> None:
+    worker_a = SharedTTLCache(backend, ttl_seconds=60)
+    worker_b = SharedTTLCache(backend, ttl_seconds=60)
+    entry = {"etag": '"abc"', "language": "en", "body": b"{}"}
+
+    worker_a.set((1, None, "faqs", ("en",)), entry)
+    worker_a.set((2, None, "faqs", ("en",)), entry)
+    assert worker_b.get((1, None, "faqs", ("en",))) == entry
+
+    worker_b.invalidate(lambda key: key[0] == 1, namespace=1)
+
+    assert worker_a.get((1, None, "faqs", ("en",))) is None
+    assert worker_a.get((2, None, "faqs", ("en",))) == entry
+    assert worker_a.stats()["hits"] == 1
+
+
+def test_shared_cache_stores_json_and_raw_body(backend) -> None:
+    cache = SharedTTLCache(backend, ttl_seconds=60)
+    key = (1, None, "faqs", ("en",))
+    cache.set(key, {"etag": '"abc"', "language": "en", "body": b'{"items":[]}'})
+    cache.set((1, None, "languages", None), ["en", "es"])
+
+    raw = backend.get(cache._key(key))
+    assert raw == b'{"value":{"etag":"\\"abc\\"","language":"en"},"body":true}\n{"items":[]}'
+    assert cache.get((1, None, "languages", None)) == ["en", "es"]
+
+    backend.set(cache._key(key), pickle.dumps({"body": b"{}"}))
+    assert cache.get(key) is None
+
+
+def test_shared_cache_skips_oversized_entries(backend) -> None:
+    cache = SharedTTLCache(backend, ttl_seconds=60, max_entry_bytes=64)
+    cache.set((1, "big"), "x" * 100)
+
+    assert cache.get((1, "big")) is None
+
+
+def _request(host: str) -> Request:
+    return Request({"type": "http", "method": "POST", "headers": [], "client": (host, 1)})
+
+
+def test_rate_limit_is_shared_across_workers(backend) -> None:
+    check_a = RateLimiter(backend).limit("login", max_calls=3, window_seconds=60)
+    check_b = RateLimiter(backend).limit("login", max_calls=3, window_seconds=60)
+
+    check_a(_request("10.0.0.1"))
+    check_b(_request("10.0.0.1"))
+    check_a(_request("10.0.0.1"))
+    with pytest.raises(HTTPException) as exc_info:
+        check_b(_request("10.0.0.1"))
+
+    assert exc_info.value.status_code == 429
+    check_b(_request("10.0.0.2"))
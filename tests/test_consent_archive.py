@@ -0,0 +1,166 @@
+import csv
+import gzip
+import io
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, delete, select
+from sqlalchemy.orm import Session
+
+from app.models import Base, ConsentLog, Listing
+from app.services import consent_archive
+from app.services.consent_archive import archive_consent_logs, iter_archived_logs
+
+NOW = datetime(2024, 9, 15, tzinfo=timezone.utc)
+START = datetime(2024, 3, 1, tzinfo=timezone.utc)
+
+
+def _log(listing_id, created_at, **values) -> ConsentLog:
+    return ConsentLog(
+        listing_id=listing_id,
+        template_version=1,
+        language_code=values.get("language_code", "en"),
+        decision=values.get("decision", "accept"),
+        email=values.get("email"),
+        created_at=created_at,
+        updated_at=created_at,
+    )
+
+
+@pytest.fixture()
+def archive_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "archive"
+    monkeypatch.setattr(consent_archive.settings, "consent_archive_dir", str(directory))
+    return directory
+
+
+@pytest.fixture()
+def log_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'logs.db'}")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_archive_moves_old_logs_into_listing_month_segments(log_engine, archive_dir):
+    with Session(log_engine) as db:
+        for listing_id, age in ((1, 10), (1, 100), (1, 101), (1, 130), (2, 100), (None, 200)):
+            db.add(_log(listing_id, NOW - timedelta(days=age), email=f"{listing_id}-{age}"))
+        db.commit()
+
+    result = archive_consent_logs(log_engine, older_than_days=90, now=NOW)
+
+    assert result["archived_rows"] == 5
+    assert result["archived_before"] == (NOW - timedelta(days=90)).isoformat()
+    index = json.loads((archive_dir / "index.json").read_text())
+    assert sorted((s["listing_id"] or 0, s["month"], s["rows"]) for s in index["segments"]) == [
+        (0, "2024-02", 1),
+        (1, "2024-05", 1),
+        (1, "2024-06", 2),
+        (2, "2024-06", 1),
+    ]
+    segment = next(s for s in index["segments"] if s["rows"] == 2)
+    with gzip.open(archive_dir / segment["path"], "rt") as file:
+        assert [json.loads(line)["email"] for line in file] == ["1-100", "1-101"]
+    with Session(log_engine) as db:
+        assert db.scalars(select(ConsentLog.email)).all() == ["1-10"]
+
+    archived = list(iter_archived_logs())
+    assert [row["email"] for row in archived] == ["2-100", "1-100", "1-101", "1-130", "None-200"]
+    listing_emails = [row["email"] for row in iter_archived_logs(listing_id=1)]
+    assert listing_emails == ["1-100", "1-101", "1-130"]
+    assert archived[0]["created_at"] == NOW - timedelta(days=100)
+
+
+def test_archive_runs_are_incremental_and_clean_up_leftovers(log_engine, archive_dir):
+    with Session(log_engine) as db:
+        db.add(_log(1, NOW - timedelta(days=120)))
+        db.commit()
+    archive_consent_logs(log_engine, older_than_days=90, now=NOW)
+
+    with Session(log_engine) as db:
+        # as if an earlier run had updated the index but not finished deleting
+        db.add(_log(1, NOW - timedelta(days=95), email="leftover"))
+        db.add(_log(1, NOW - timedelta(days=60), email="next"))
+        db.commit()
+    assert archive_consent_logs(log_engine, older_than_days=90, now=NOW)["archived_rows"] == 0
+    result = archive_consent_logs(log_engine, older_than_days=30, now=NOW)
+
+    assert result["archived_rows"] == 1
+    with Session(log_engine) as db:
+        assert db.scalars(select(ConsentLog)).all() == []
+    assert [row["email"] for row in iter_archived_logs()] == ["next", None]
+
+
+def test_archive_requires_an_age(log_engine, archive_dir, monkeypatch):
+    monkeypatch.setattr(consent_archive.settings, "consent_archive_after_days", None)
+
+    with pytest.raises(ValueError):
+        archive_consent_logs(log_engine, now=NOW)
+
+
+@pytest.fixture()
+def archived_listing(db_session: Session, archive_dir):
+    listing = Listing(name="Archive", slug=f"archive-{uuid.uuid4().hex[:8]}")
+    db_session.add(listing)
+    db_session.flush()
+    logs = [
+        _log(
+            listing.id,
+            START + timedelta(hours=index),
+            language_code="en" if index % 2 else "es",
+        )
+        for index in range(30)
+    ]
+    db_session.add_all(logs)
+    db_session.commit()
+    ids = [log.id for log in logs]
+    cutoff = START + timedelta(hours=15)
+    result = archive_consent_logs(
+        db_session.get_bind(), older_than_days=90, now=cutoff + timedelta(days=90)
+    )
+    assert result["archived_rows"] == 15
+    yield listing, ids
+    db_session.execute(delete(ConsentLog).where(ConsentLog.listing_id == listing.id))
+    db_session.commit()
+
+
+def test_list_pages_continue_into_the_archive(client, admin_headers, archived_listing):
+    listing, ids = archived_listing
+    seen, cursor = [], None
+    while True:
+        params = {"listing_id": listing.id, "limit": 7}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/admin/consent-logs", headers=admin_headers, params=params).json()
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == ids[::-1]
+
+    filtered = client.get(
+        "/admin/consent-logs",
+        headers=admin_headers,
+        params={
+            "listing_id": listing.id,
+            "language": "en",
+            "start": (START + timedelta(hours=10)).isoformat(),
+            "end": (START + timedelta(hours=20)).isoformat(),
+        },
+    ).json()
+    assert [item["id"] for item in filtered["items"]] == [ids[i] for i in (19, 17, 15, 13, 11)]
+
+
+def test_export_includes_archived_logs(client, admin_headers, archived_listing):
+    listing, ids = archived_listing
+
+    response = client.get(
+        "/admin/consent-logs/export", headers=admin_headers, params={"listing_id": listing.id}
+    )
+
+    rows = list(csv.DictReader(io.StringIO(response._body.decode("utf-8"))))
+    assert [int(row["id"]) for row in rows] == ids[::-1]
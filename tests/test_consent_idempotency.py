@@ -0,0 +1,190 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from tests.conftest import SimpleTestClient
+from tests.test_public_flow import _create_listing, _create_published_consent
+
+from app.api.routers.public import consent as consent_router
+from app.models import Base, ConsentDailyRollup, ConsentIdempotencyKey, ConsentLog, IdBlock
+from app.services.consent_idempotency import purge_expired_keys, recent_submissions
+from app.services.consent_ingest import ConsentIngestor
+
+
+@pytest.fixture()
+def consent_listing(db_session: Session):
+    listing = _create_listing(db_session)
+    template = _create_published_consent(db_session, listing)
+    recent_submissions.clear()
+    yield listing.id, {
+        "template_id": template.id,
+        "template_version": template.version,
+        "language_code": "en",
+        "decision": "accept",
+        "email": "guest@example.com",
+    }
+    recent_submissions.clear()
+    db_session.query(ConsentLog).filter_by(listing_id=listing.id).delete()
+    db_session.commit()
+
+
+def _log_count(db: Session, listing_id: int) -> int:
+    db.expire_all()
+    return db.scalar(select(func.count(ConsentLog.id)).where(ConsentLog.listing_id == listing_id))
+
+
+def test_retry_with_same_header_replays_original(
+    client: SimpleTestClient, db_session: Session, consent_listing
+):
+    listing_id, payload = consent_listing
+    headers = {"Idempotency-Key": "retry-1"}
+
+    first = client.post(f"/public/listings/{listing_id}/consent", json=payload, headers=headers)
+    retry = client.post(
+        f"/public/listings/{listing_id}/consent",
+        json={**payload, "email": "changed@example.com"},
+        headers=headers,
+    )
+
+    assert first.status_code == retry.status_code == 200
+    assert "idempotent-replayed" not in first.headers
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert retry.json() == first.json()
+    assert _log_count(db_session, listing_id) == 1
+
+
+def test_derived_key_separates_decisions(
+    client: SimpleTestClient, db_session: Session, consent_listing
+):
+    listing_id, payload = consent_listing
+
+    accepted = client.post(f"/public/listings/{listing_id}/consent", json=payload)
+    again = client.post(f"/public/listings/{listing_id}/consent", json=payload)
+    declined = client.post(
+        f"/public/listings/{listing_id}/consent", json={**payload, "decision": "decline"}
+    )
+
+    assert again.json()["id"] == accepted.json()["id"]
+    assert declined.json()["id"] != accepted.json()["id"]
+    assert _log_count(db_session, listing_id) == 2
+
+
+def test_retry_on_another_worker_is_caught_by_the_stored_key(
+    client: SimpleTestClient, db_session: Session, consent_listing
+):
+    listing_id, payload = consent_listing
+    first = client.post(f"/public/listings/{listing_id}/consent", json=payload)
+    recent_submissions.clear()
+
+    retry = client.post(f"/public/listings/{listing_id}/consent", json=payload)
+
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert retry.json() == first.json()
+    assert _log_count(db_session, listing_id) == 1
+    assert db_session.scalar(
+        select(func.sum(ConsentDailyRollup.count)).where(
+            ConsentDailyRollup.listing_id == listing_id
+        )
+    ) == 1
+
+
+def test_expired_key_is_reused_for_a_new_submission(
+    client: SimpleTestClient, db_session: Session, consent_listing
+):
+    listing_id, payload = consent_listing
+    first = client.post(f"/public/listings/{listing_id}/consent", json=payload)
+    recent_submissions.clear()
+    stored = db_session.scalars(
+        select(ConsentIdempotencyKey).where(ConsentIdempotencyKey.listing_id == listing_id)
+    ).one()
+    stored.expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    db_session.commit()
+
+    later = client.post(f"/public/listings/{listing_id}/consent", json=payload)
+
+    assert "idempotent-replayed" not in later.headers
+    assert later.json()["id"] != first.json()["id"]
+    db_session.refresh(stored)
+    assert stored.response["id"] == later.json()["id"]
+    assert _log_count(db_session, listing_id) == 2
+
+
+def test_batch_flush_stores_keys_and_expired_keys_are_purged(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'ingest.db'}")
+    Base.metadata.create_all(engine)
+    ingestor = ConsentIngestor(batch_size=10, flush_interval=0.05, max_queue=10, id_block_size=10)
+    ingestor.start(engine)
+    values = {
+        "listing_id": 3,
+        "template_id": 1,
+        "template_version": 1,
+        "language_code": "en",
+        "decision": "accept",
+        "email": "guest@example.com",
+    }
+    row = ingestor.submit(values, "a")
+    ingestor.submit(values, "a")
+    ingestor.submit(values, "b")
+    ingestor.submit(values)
+    assert ingestor.drain(timeout=5) == 0
+
+    with Session(engine) as db:
+        keys = {key.key: key.response for key in db.scalars(select(ConsentIdempotencyKey))}
+    assert sorted(keys) == ["a", "b"]
+    assert keys["a"]["id"] == row["id"]
+    assert purge_expired_keys(engine, now=datetime.now(timezone.utc) + timedelta(days=2)) == 2
+    engine.dispose()
+
+
+def test_batch_retry_on_another_worker_is_not_written(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'ingest.db'}")
+    Base.metadata.create_all(engine)
+    values = {
+        "listing_id": 3,
+        "template_id": 1,
+        "template_version": 1,
+        "language_code": "en",
+        "decision": "accept",
+        "email": "guest@example.com",
+    }
+    workers = [
+        ConsentIngestor(batch_size=10, flush_interval=0.05, max_queue=10, id_block_size=10)
+        for _ in range(2)
+    ]
+    for worker in workers:
+        worker.start(engine)
+    first = workers[0].submit(values, "same")
+    assert workers[0].drain(timeout=5) == 0
+    workers[1].submit(values, "same")
+    assert workers[1].drain(timeout=5) == 0
+
+    with Session(engine) as db:
+        assert db.scalars(select(ConsentLog.id)).all() == [first["id"]]
+        assert db.scalar(select(func.sum(ConsentDailyRollup.count))) == 1
+        assert db.get(ConsentIdempotencyKey, "same").response["id"] == first["id"]
+    assert workers[1].stats()["duplicates"] == 1
+    assert workers[1].stats()["flushed"] == 0
+    engine.dispose()
+
+
+def test_batch_mode_replays_a_key_stored_by_another_worker(
+    client: SimpleTestClient, db_session: Session, consent_listing, monkeypatch
+):
+    listing_id, payload = consent_listing
+    ingestor = ConsentIngestor(batch_size=10, flush_interval=0.05, max_queue=10, id_block_size=10)
+    ingestor.start(db_session.get_bind())
+    monkeypatch.setattr(consent_router, "consent_ingestor", ingestor)
+    monkeypatch.setattr(consent_router.settings, "consent_ingest_mode", "batch")
+
+    first = client.post(f"/public/listings/{listing_id}/consent", json=payload)
+    assert ingestor.drain(timeout=5) == 0
+    recent_submissions.clear()
+    retry = client.post(f"/public/listings/{listing_id}/consent", json=payload)
+
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert retry.json() == first.json()
+    assert _log_count(db_session, listing_id) == 1
+    db_session.delete(db_session.get(IdBlock, "consent_logs"))
+    db_session.commit()
@@ -0,0 +1,199 @@
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from tests.conftest import SimpleTestClient
+
+from app.api.routers.public import consent as consent_router
+from app.models import (
+    Base,
+    ConsentDailyRollup,
+    ConsentDeadLetter,
+    ConsentLog,
+    ConsentTemplate,
+    IdBlock,
+    Listing,
+)
+from app.services.consent_ingest import (
+    ConsentIngestor,
+    ConsentQueueFullError,
+    IdAllocator,
+)
+from app.services.guide import set_current_template
+
+
+@pytest.fixture()
+def ingest_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'ingest.db'}")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def _values(index: int = 0) -> dict:
+    return {
+        "listing_id": None,
+        "template_id": None,
+        "template_version": 1,
+        "language_code": "en",
+        "decision": "accept",
+        "email": f"guest{index}@example.com",
+    }
+
+
+def test_ingestor_flushes_in_batches_and_drains(ingest_engine):
+    ingestor = ConsentIngestor(batch_size=10, flush_interval=0.05, max_queue=100, id_block_size=7)
+    ingestor.start(ingest_engine)
+    rows = [ingestor.submit(_values(index)) for index in range(25)]
+
+    assert ingestor.drain(timeout=5) == 0
+    with Session(ingest_engine) as db:
+        stored = db.execute(select(ConsentLog.id, ConsentLog.email)).all()
+    assert sorted(stored) == sorted((row["id"], row["email"]) for row in rows)
+    assert len({row["id"] for row in rows}) == 25
+    assert all(row["created_at"] is not None for row in rows)
+    stats = ingestor.stats()
+    assert stats["flushed"] == 25
+    assert stats["depth"] == 0
+    assert 3 <= stats["batches"] <= 25
+    assert not stats["running"]
+
+
+def test_ingestor_updates_rollups_with_each_batch(ingest_engine):
+    ingestor = ConsentIngestor(batch_size=4, flush_interval=0.05, max_queue=100, id_block_size=10)
+    ingestor.start(ingest_engine)
+    for index in range(10):
+        decision = "decline" if index % 5 == 0 else "accept"
+        ingestor.submit({**_values(index), "listing_id": 7, "decision": decision})
+    ingestor.submit(_values())
+
+    assert ingestor.drain(timeout=5) == 0
+    with Session(ingest_engine) as db:
+        rollups = db.scalars(select(ConsentDailyRollup).where(ConsentDailyRollup.listing_id == 7))
+        counts = {rollup.decision: rollup.count for rollup in rollups}
+    assert counts == {"accept": 8, "decline": 2}
+
+
+def test_rejected_rows_are_dead_lettered_without_blocking_the_queue(ingest_engine):
+    @event.listens_for(ingest_engine, "connect")
+    def enforce_foreign_keys(dbapi_connection, _) -> None:
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+    ingest_engine.dispose()
+    ingestor = ConsentIngestor(batch_size=10, flush_interval=0.05, max_queue=100, id_block_size=10)
+    ingestor.start(ingest_engine)
+    good = [ingestor.submit(_values(index)) for index in range(3)]
+    # listing deleted while its decision waited in the queue
+    bad = ingestor.submit({**_values(9), "listing_id": 999}, "gone")
+    good.append(ingestor.submit(_values(4)))
+
+    assert ingestor.drain(timeout=5) == 0
+    with Session(ingest_engine) as db:
+        stored = set(db.scalars(select(ConsentLog.id)))
+        dead_letters = db.scalars(select(ConsentDeadLetter)).all()
+    assert stored == {row["id"] for row in good}
+    assert [(letter.listing_id, letter.row["id"]) for letter in dead_letters] == [
+        (999, bad["id"])
+    ]
+    assert dead_letters[0].row["idempotency_key"] == "gone"
+    assert "FOREIGN KEY" in dead_letters[0].error
+    stats = ingestor.stats()
+    assert (stats["flushed"], stats["dead_lettered"], stats["failures"]) == (4, 1, 0)
+
+
+def test_drain_retries_after_earlier_failures(ingest_engine, monkeypatch):
+    ingestor = ConsentIngestor(batch_size=10, flush_interval=0.05, max_queue=100, id_block_size=10)
+    # outages long since recovered from must not count against the shutdown retries
+    ingestor.failures = 10
+    write = ingestor._write
+    attempts = []
+
+    def flaky_write(batch):
+        attempts.append(len(batch))
+        if len(attempts) == 1:
+            raise OperationalError("INSERT", {}, Exception("database is locked"))
+        return write(batch)
+
+    monkeypatch.setattr(ingestor, "_write", flaky_write)
+    ingestor.start(ingest_engine)
+    rows = [ingestor.submit(_values(index)) for index in range(3)]
+
+    assert ingestor.drain(timeout=5) == 0
+    with Session(ingest_engine) as db:
+        assert set(db.scalars(select(ConsentLog.id))) == {row["id"] for row in rows}
+    stats = ingestor.stats()
+    assert (stats["failures"], stats["consecutive_failures"]) == (11, 0)
+
+
+def test_id_blocks_start_after_existing_rows(ingest_engine):
+    with Session(ingest_engine) as db:
+        db.add(ConsentLog(id=100, template_version=1, language_code="en", decision="accept"))
+        db.commit()
+    allocator = IdAllocator(ConsentLog.__table__, block_size=5)
+
+    assert [allocator.allocate(ingest_engine) for _ in range(6)] == [101, 102, 103, 104, 105, 106]
+    with Session(ingest_engine) as db:
+        assert db.get(IdBlock, "consent_logs").next_id == 111
+        db.add(ConsentLog(id=500, template_version=1, language_code="en", decision="accept"))
+        db.commit()
+
+    other_worker = IdAllocator(ConsentLog.__table__, block_size=5)
+    assert other_worker.allocate(ingest_engine) == 501
+
+
+def test_full_queue_is_rejected(ingest_engine):
+    ingestor = ConsentIngestor(batch_size=10, flush_interval=60, max_queue=2, id_block_size=10)
+    ingestor.start(ingest_engine)
+    ingestor.submit(_values())
+    ingestor.submit(_values())
+
+    with pytest.raises(ConsentQueueFullError):
+        ingestor.submit(_values())
+    assert ingestor.drain(timeout=5) == 0
+
+
+def test_submit_route_queues_in_batch_mode(
+    client: SimpleTestClient, db_session: Session, monkeypatch
+):
+    listing = Listing(name="Batch", slug=f"batch-{uuid.uuid4().hex[:8]}")
+    db_session.add(listing)
+    db_session.flush()
+    template = ConsentTemplate(listing_id=listing.id, version=1, status="published")
+    db_session.add(template)
+    db_session.flush()
+    set_current_template(db_session, listing.id)
+    db_session.commit()
+
+    ingestor = ConsentIngestor(batch_size=50, flush_interval=0.05, max_queue=100, id_block_size=10)
+    ingestor.start(db_session.get_bind())
+    monkeypatch.setattr(consent_router, "consent_ingestor", ingestor)
+    monkeypatch.setattr(consent_router.settings, "consent_ingest_mode", "batch")
+
+    response = client.post(
+        f"/public/listings/{listing.id}/consent",
+        json={
+            "template_id": template.id,
+            "template_version": 1,
+            "language_code": "en",
+            "decision": "accept",
+            "email": "batch@example.com",
+        },
+    )
+    assert response.status_code == 200
+    log_id = response.json()["id"]
+
+    assert ingestor.drain(timeout=5) == 0
+    db_session.expire_all()
+    log = db_session.get(ConsentLog, log_id)
+    assert log is not None
+    assert log.email == "batch@example.com"
+    assert db_session.scalar(
+        select(func.count(ConsentLog.id)).where(ConsentLog.listing_id == listing.id)
+    ) == 1
+
+    db_session.delete(log)
+    db_session.delete(db_session.get(IdBlock, "consent_logs"))
+    db_session.commit()
@@ -0,0 +1,57 @@
+import uuid
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.main import app
+from app.models import FAQ, Listing
+from app.services.content_types import (
+    CONTENT_TYPES,
+    FAQS,
+    register_content_type,
+    sync_translations,
+)
+
+
+def test_every_content_type_has_public_routes():
+    paths = {route.path for route in app.routes}
+    for content_type in CONTENT_TYPES.values():
+        assert f"/public/listings/{{listing_id}}/{content_type.path}" in paths
+        assert f"/public/listings/{{listing_id}}/{{specific_item}}/{content_type.path}" in paths
+
+
+def test_duplicate_registration_is_rejected():
+    with pytest.raises(ValueError):
+        register_content_type(FAQS)
+
+
+def test_sync_translations_upserts_and_prunes(db_session: Session):
+    listing = Listing(name="Sync", slug=f"sync-{uuid.uuid4().hex[:8]}")
+    db_session.add(listing)
+    db_session.flush()
+    faq = FAQ(listing_id=listing.id)
+    db_session.add(faq)
+    db_session.flush()
+    sync_translations(
+        db_session,
+        FAQS,
+        faq,
+        [
+            {"language_code": "EN", "question": "Q", "answer": "A"},
+            {"language_code": "es", "question": "P", "answer": "R"},
+        ],
+    )
+    db_session.commit()
+    assert sorted(tr.language_code for tr in faq.translations) == ["en", "es"]
+
+    sync_translations(
+        db_session,
+        FAQS,
+        faq,
+        [{"language_code": "en", "question": "Q2", "answer": "A2", "links": ["https://x.test"]}],
+    )
+    db_session.commit()
+    db_session.refresh(faq)
+    assert [(tr.language_code, tr.question, tr.links) for tr in faq.translations] == [
+        ("en", "Q2", ["https://x.test"])
+    ]
@@ -0,0 +1,69 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+def _query_plan(db: Session, statement: str, **params) -> str:
+    rows = db.execute(text(f"EXPLAIN QUERY PLAN {statement}"), params).fetchall()
+    return " | ".join(row[-1] for row in rows)
+
+
+def test_guide_content_queries_use_scope_indexes(db_session: Session):
+    for table in ("faqs", "tutorials", "page_descriptions"):
+        plan = _query_plan(
+            db_session,
+            f"SELECT id FROM {table} "
+            "WHERE listing_id = :listing_id AND specific_item IS NULL AND is_active = 1",
+            listing_id=1,
+        )
+        assert f"ix_{table}_listing_scope" in plan
+
+
+def test_consent_queries_use_composite_indexes(db_session: Session):
+    plan = _query_plan(
+        db_session,
+        "SELECT id FROM consent_templates WHERE listing_id = :listing_id "
+        "AND status = 'published' ORDER BY version DESC LIMIT 1",
+        listing_id=1,
+    )
+    assert "ix_consent_templates_listing_status_version" in plan
+    assert "TEMP B-TREE" not in plan
+
+    plan = _query_plan(
+        db_session,
+        "SELECT id FROM consent_logs WHERE listing_id = :listing_id ORDER BY created_at DESC",
+        listing_id=1,
+    )
+    assert "ix_consent_logs_listing_created" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_refresh_token_lookup_uses_user_index(db_session: Session):
+    plan = _query_plan(
+        db_session,
+        "SELECT id FROM admin_refresh_tokens WHERE user_id = :user_id AND revoked_at IS NULL",
+        user_id=1,
+    )
+    assert "ix_admin_refresh_tokens_user_expires" in plan
+
+
+def test_consent_log_keyset_pages_use_indexes(db_session: Session):
+    cursor = {"created_at": "2024-03-01 00:00:00.000000", "id": 10}
+    plan = _query_plan(
+        db_session,
+        "SELECT id FROM consent_logs WHERE (created_at, id) < (:created_at, :id) "
+        "ORDER BY created_at DESC, id DESC LIMIT 101",
+        **cursor,
+    )
+    assert "ix_consent_logs_created_id" in plan
+    assert "TEMP B-TREE" not in plan
+
+    plan = _query_plan(
+        db_session,
+        "SELECT id FROM consent_logs WHERE listing_id = :listing_id "
+        "AND (created_at, id) < (:created_at, :id) "
+        "ORDER BY created_at DESC, id DESC LIMIT 101",
+        listing_id=1,
+        **cursor,
+    )
+    assert "ix_consent_logs_listing_created" in plan
+    assert "TEMP B-TREE" not in plan
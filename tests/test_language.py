@@ -0,0 +1,33 @@
+from app.services.language import (
+    language_chain,
+    negotiate_languages,
+    normalize_language,
+    parse_accept_language,
+    settings,
+)
+
+
+def test_normalize_language():
+    assert normalize_language(" ES ") == "es"
+    assert normalize_language("pt_BR") == "pt-br"
+
+
+def test_parse_accept_language_orders_by_quality():
+    header = "fr;q=0.5, es-MX, *;q=0.1, de;q=0, EN;q=0.8"
+    assert parse_accept_language(header) == ["es-mx", "en", "fr"]
+    assert parse_accept_language(None) == []
+    assert parse_accept_language("es;q=abc") == []
+
+
+def test_language_chain_expands_subtags_and_configured_fallbacks(monkeypatch):
+    assert language_chain(["pt-BR"]) == ["pt-br", "pt", "en"]
+    monkeypatch.setattr(settings, "language_fallbacks", {"ca": ["es"]})
+    assert language_chain(["ca", "fr"]) == ["ca", "es", "fr", "en"]
+    monkeypatch.setattr(settings, "default_language", "es")
+    assert language_chain(["en"]) == ["en", "es"]
+
+
+def test_query_parameter_overrides_accept_language():
+    assert negotiate_languages("ES", "fr") == ["es", "en"]
+    assert negotiate_languages(None, "fr-CA, de;q=0.5") == ["fr-ca", "fr", "de", "en"]
+    assert negotiate_languages(None, None) == ["en"]
@@ -0,0 +1,82 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.models import AdminAuditLog, Base, ConsentLog
+from app.services import partitions
+from app.services.partitions import (
+    add_months,
+    apply_retention,
+    ensure_partitions,
+    expired_partitions,
+    partition_month,
+    partition_name,
+)
+
+NOW = datetime(2024, 9, 15, tzinfo=timezone.utc)
+
+
+@pytest.fixture()
+def log_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'logs.db'}")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_partition_names_round_trip():
+    assert add_months(date(2024, 11, 1), 3) == date(2025, 2, 1)
+    assert add_months(date(2024, 1, 1), -1) == date(2023, 12, 1)
+    assert partition_name("consent_logs", date(2024, 2, 1)) == "consent_logs_p2024_02"
+    assert partition_month("consent_logs", "consent_logs_p2024_02") == date(2024, 2, 1)
+    assert partition_month("consent_logs", "consent_logs_default") is None
+    assert partition_month("consent_logs", "admin_audit_logs_p2024_02") is None
+
+
+def test_only_fully_expired_months_are_dropped():
+    names = [
+        "consent_logs_p2024_05",
+        "consent_logs_p2024_06",
+        "consent_logs_p2024_07",
+        "consent_logs_default",
+    ]
+
+    assert expired_partitions("consent_logs", names, datetime(2024, 7, 1)) == [
+        "consent_logs_p2024_05",
+        "consent_logs_p2024_06",
+    ]
+    assert expired_partitions("consent_logs", names, datetime(2024, 6, 30)) == [
+        "consent_logs_p2024_05"
+    ]
+
+
+def test_sqlite_keeps_plain_tables_and_deletes_expired_rows(log_engine, monkeypatch):
+    monkeypatch.setattr(partitions.settings, "consent_log_retention_days", 30)
+    monkeypatch.setattr(partitions.settings, "audit_log_retention_days", None)
+    with Session(log_engine) as db:
+        for age in (5, 29, 31, 400):
+            created = NOW - timedelta(days=age)
+            db.add(
+                ConsentLog(
+                    template_version=1,
+                    language_code="en",
+                    decision="accept",
+                    email=f"age{age}@example.com",
+                    created_at=created,
+                )
+            )
+            db.add(AdminAuditLog(event_type="login", created_at=created))
+        db.commit()
+
+    assert ensure_partitions(log_engine, now=NOW) == []
+    assert apply_retention(log_engine, now=NOW, dry_run=True)["consent_logs"]["deleted_rows"] == 2
+    result = apply_retention(log_engine, now=NOW)
+
+    assert list(result) == ["consent_logs"]
+    assert result["consent_logs"]["deleted_rows"] == 2
+    with Session(log_engine) as db:
+        emails = db.scalars(select(ConsentLog.email).order_by(ConsentLog.email)).all()
+        assert emails == ["age29@example.com", "age5@example.com"]
+        assert len(db.scalars(select(AdminAuditLog)).all()) == 4
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, exc
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import SingletonThreadPool
+
+from app.db.pool import (
+    TimedAsyncQueuePool,
+    TimedQueuePool,
+    engine_options,
+    pool_stats,
+    warm_async_pool,
+    warm_pool,
+)
+
+
+def _engine(tmp_path, **options):
+    return create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", poolclass=TimedQueuePool, **options
+    )
+
+
+def test_engine_options_apply_pool_settings():
+    options = engine_options("postgresql://db/app")
+    assert options["poolclass"] is TimedQueuePool
+    assert options["pool_pre_ping"] is True
+    assert {"pool_size", "max_overflow", "pool_timeout", "pool_recycle"} <= set(options)
+
+    async_options = engine_options("postgresql+psycopg://db/app", asynchronous=True)
+    assert async_options["poolclass"] is TimedAsyncQueuePool
+
+
+def test_engine_options_leave_in_memory_sqlite_alone():
+    engine = create_engine("sqlite://", **engine_options("sqlite://"))
+    assert isinstance(engine.pool, SingletonThreadPool)
+    assert pool_stats(engine) == {"pool": "SingletonThreadPool"}
+
+
+def test_pool_stats_report_checked_out_connections_and_timeouts(tmp_path):
+    engine = _engine(tmp_path, pool_size=1, max_overflow=0, pool_timeout=0.05)
+
+    with engine.connect():
+        stats = pool_stats(engine)
+        assert stats["checked_out"] == 1
+        assert stats["overflow"] == 0
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+    stats = pool_stats(engine)
+    assert stats["checked_out"] == 0
+    assert stats["checkouts"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["wait_ms_max"] >= 50
+
+
+def test_telemetry_survives_dispose(tmp_path):
+    engine = _engine(tmp_path, pool_size=2)
+    with engine.connect():
+        pass
+    engine.dispose()
+    with engine.connect():
+        pass
+
+    assert pool_stats(engine)["checkouts"] == 2
+
+
+def test_warm_pool_opens_connections_up_front(tmp_path):
+    engine = _engine(tmp_path, pool_size=3)
+
+    assert warm_pool(engine) == 3
+    assert pool_stats(engine)["checked_in"] == 3
+    assert warm_pool(engine, connections=10) == 3
+
+
+def test_warm_async_pool(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=TimedAsyncQueuePool,
+        pool_size=2,
+    )
+
+    async def warm() -> int:
+        try:
+            return await warm_async_pool(engine)
+        finally:
+            stats = pool_stats(engine)
+            await engine.dispose()
+            assert stats["checked_in"] == 2
+
+    assert asyncio.run(warm()) == 2
@@ -4,12 +4,18 @@ import jwt
 import pytest
 import uuid
 
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session
 
 from tests.conftest import SimpleTestClient
+from tests.test_admin_auth import login
 
 from app.core.config import get_settings
 from app.models import (
+    GuideSnapshot,
+    AdminRoleEnum,
+    AdminUser,
     ConsentLog,
     ConsentTemplate,
     ConsentTemplateTranslation,
@@ -21,7 +27,19 @@ from app.models import (
     Tutorial,
     TutorialTranslation,
 )
+from app.services.content_types import TUTORIALS
+from app.services.guide import (
+    build_section_items,
+    guide_cache,
+    lookup_consent,
+    set_current_template,
+)
+from app.services import guide_snapshot
+from app.services.guide_snapshot import rebuild_snapshots
+from app.services.language import language_chain
 from app.services.qr import create_qr_token, decode_qr_token
+from app.utils.rate_limiter import rate_limiter
+from app.utils.security import get_password_hash
 
 settings = get_settings()
 
@@ -35,6 +53,19 @@ def _create_listing(db: Session) -> Listing:
     return listing
 
 
+def _create_admin(db: Session) -> AdminUser:
+    rate_limiter._buckets.clear()
+    admin = AdminUser(
+        email=f"guide-admin-{uuid.uuid4().hex[:8]}@example.com",
+        hashed_password=get_password_hash("Secretpass1!"),
+        role=AdminRoleEnum.SUPERADMIN.value,
+    )
+    db.add(admin)
+    db.commit()
+    db.refresh(admin)
+    return admin
+
+
 def _create_published_consent(db: Session, listing: Listing) -> ConsentTemplate:
     template = ConsentTemplate(listing_id=listing.id, version=1, status="published")
     db.add(template)
@@ -52,6 +83,7 @@ def _create_published_consent(db: Session, listing: Listing) -> ConsentTemplate:
         body="Cuerpo en español",
     )
     db.add_all([translation_en, translation_es])
+    set_current_template(db, listing.id)
     db.commit()
     db.refresh(template)
     return template
@@ -215,6 +247,167 @@ def test_consent_submission_success(client: SimpleTestClient, db_session: Sessio
     assert log.email == "guest@example.com"
 
 
+def test_consent_submission_is_a_pointer_lookup_and_inserts(
+    client: SimpleTestClient, db_session: Session, async_bind: Engine
+):
+    listing = _create_listing(db_session)
+    template = _create_published_consent(db_session, listing)
+    listing_id, template_id = listing.id, template.id
+    payload = {
+        "template_id": template_id,
+        "template_version": 1,
+        "language_code": "en",
+        "decision": "accept",
+        "email": "guest@example.com",
+    }
+    assert client.post(f"/public/listings/{listing_id}/consent", json=payload).status_code == 200
+
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_bind, "before_cursor_execute", record)
+    try:
+        payload["email"] = "other@example.com"
+        response = client.post(f"/public/listings/{listing_id}/consent", json=payload)
+        inserts = list(statements)
+        statements.clear()
+        replay = client.post(f"/public/listings/{listing_id}/consent", json=payload)
+    finally:
+        event.remove(async_bind, "before_cursor_execute", record)
+    assert response.status_code == 200
+    assert response.json()["created_at"]
+    assert "FROM listings \nWHERE listings.id = ?" in inserts[0]
+    assert sorted(statement.split(" (")[0] for statement in inserts[1:]) == [
+        "INSERT INTO consent_daily_rollups",
+        "INSERT INTO consent_idempotency_keys",
+        "INSERT INTO consent_logs",
+    ]
+    assert replay.json() == response.json()
+    assert statements == []
+
+    admin = _create_admin(db_session)
+    tokens = login(client, admin.email, "Secretpass1!")
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    created = client.post(
+        f"/admin/listings/{listing_id}/consent-templates",
+        json={
+            "listing_id": listing_id,
+            "translations": [{"language_code": "en", "title": "Consent", "body": "v2"}],
+        },
+        headers=headers,
+    ).json()
+    client.request(
+        "PUT",
+        f"/admin/consent-templates/{created['id']}",
+        json_data={"status": "published"},
+        headers=headers,
+    )
+
+    payload["email"] = "stale@example.com"
+    stale = client.post(f"/public/listings/{listing_id}/consent", json=payload)
+    assert stale.status_code == 400
+    payload.update(template_id=created["id"], template_version=2)
+    assert client.post(f"/public/listings/{listing_id}/consent", json=payload).status_code == 200
+
+
+def test_publish_on_another_worker_is_seen_without_invalidation(
+    client: SimpleTestClient, db_session: Session
+):
+    listing = _create_listing(db_session)
+    template = _create_published_consent(db_session, listing)
+    listing_id = listing.id
+    payload = {
+        "template_id": template.id,
+        "template_version": 1,
+        "language_code": "en",
+        "decision": "accept",
+        "email": "worker@example.com",
+    }
+    assert client.post(f"/public/listings/{listing_id}/consent", json=payload).status_code == 200
+
+    # another worker publishes v2; this worker's guide cache is not told
+    newer = ConsentTemplate(listing_id=listing_id, version=2, status="published")
+    db_session.add(newer)
+    db_session.flush()
+    set_current_template(db_session, listing_id)
+    db_session.commit()
+
+    payload.update(template_id=newer.id, template_version=2)
+    assert client.post(f"/public/listings/{listing_id}/consent", json=payload).status_code == 200
+
+
+def test_publishing_moves_the_listing_template_pointer(
+    client: SimpleTestClient, db_session: Session, async_bind: Engine
+):
+    listing = _create_listing(db_session)
+    template = _create_published_consent(db_session, listing)
+    listing_id, template_id = listing.id, template.id
+    assert (listing.current_template_id, listing.current_template_version) == (template_id, 1)
+
+    admin = _create_admin(db_session)
+    tokens = login(client, admin.email, "Secretpass1!")
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    created = client.post(
+        f"/admin/listings/{listing_id}/consent-templates",
+        json={
+            "listing_id": listing_id,
+            "translations": [{"language_code": "en", "title": "Consent", "body": "v2"}],
+        },
+        headers=headers,
+    ).json()
+    db_session.refresh(listing)
+    assert listing.current_template_id == template_id
+
+    client.request(
+        "PUT",
+        f"/admin/consent-templates/{created['id']}",
+        json_data={"status": "published"},
+        headers=headers,
+    )
+    db_session.refresh(listing)
+    assert (listing.current_template_id, listing.current_template_version) == (created["id"], 2)
+
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_bind, "before_cursor_execute", record)
+    try:
+        served = client.get(f"/public/listings/{listing_id}/consent")
+        lookup = list(statements)
+        statements.clear()
+        submitted = client.post(
+            f"/public/listings/{listing_id}/consent",
+            json={
+                "template_id": created["id"],
+                "template_version": 2,
+                "language_code": "en",
+                "decision": "accept",
+                "email": "pointer@example.com",
+            },
+        )
+    finally:
+        event.remove(async_bind, "before_cursor_execute", record)
+    assert served.json()["template_version"] == 2
+    assert len(lookup) == 1
+    assert submitted.status_code == 200
+    assert "FROM listings \nWHERE listings.id = ?" in statements[0]
+    assert "consent_templates" not in statements[0]
+
+    client.request(
+        "PUT",
+        f"/admin/consent-templates/{created['id']}",
+        json_data={"status": "draft"},
+        headers=headers,
+    )
+    db_session.refresh(listing)
+    assert (listing.current_template_id, listing.current_template_version) == (template_id, 1)
+    assert client.get(f"/public/listings/{listing_id}/consent").json()["template_version"] == 1
+
+
 def test_faq_and_tutorial_language_fallback(client: SimpleTestClient, db_session: Session):
     listing = _create_listing(db_session)
     _create_published_consent(db_session, listing)
@@ -289,3 +482,377 @@ def test_specific_item_routes(client: SimpleTestClient, db_session: Session):
         description_specific_response.json()["items"][0]["body"]
         == "Parking instructions"
     )
+
+
+def test_guide_bundle_returns_all_sections(client: SimpleTestClient, db_session: Session):
+    listing = _create_listing(db_session)
+    template = _create_published_consent(db_session, listing)
+    _create_guide_content(db_session, listing)
+    _create_page_description(db_session, listing)
+    _create_specific_guide_content(db_session, listing, "parking")
+
+    response = client.get(f"/public/listings/{listing.id}/guide", params={"language": "es"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["consent"]["template_id"] == template.id
+    assert data["consent"]["translation"]["language_code"] == "es"
+    assert [item["question"] for item in data["faqs"]] == ["P1"]
+    assert data["tutorials"][0]["language_code"] == "en"
+    assert data["page_descriptions"][0]["body"] == "Bienvenido a la propiedad."
+
+    specific_response = client.get(f"/public/listings/{listing.id}/parking/guide")
+    assert specific_response.status_code == 200
+    specific_data = specific_response.json()
+    assert specific_data["specific_item"] == "parking"
+    assert specific_data["faqs"][0]["question"] == "Parking?"
+    assert specific_data["tutorials"][0]["title"] == "Parking tutorial"
+    assert specific_data["page_descriptions"][0]["body"] == "Parking instructions"
+
+
+def test_guide_bundle_missing_listing(client: SimpleTestClient):
+    response = client.get("/public/listings/999999/guide")
+    assert response.status_code == 404
+
+
+def test_public_reads_are_cached_until_admin_write(
+    client: SimpleTestClient, db_session: Session
+):
+    admin = _create_admin(db_session)
+    listing = _create_listing(db_session)
+    _create_guide_content(db_session, listing)
+    faq = db_session.query(FAQ).filter(FAQ.listing_id == listing.id).first()
+
+    first = client.get(f"/public/listings/{listing.id}/faqs")
+    assert first.json()["items"][0]["question"] == "Q1"
+
+    db_session.query(FAQTranslation).filter(FAQTranslation.faq_id == faq.id).update(
+        {"question": "Changed outside the admin API"}
+    )
+    db_session.commit()
+    cached = client.get(f"/public/listings/{listing.id}/faqs")
+    assert cached.json()["items"][0]["question"] == "Q1"
+    assert guide_cache.stats()["hits"] >= 1
+
+    tokens = login(client, admin.email, "Secretpass1!")
+    response = client.request(
+        "PUT",
+        f"/admin/faqs/{faq.id}",
+        json_data={
+            "translations": [{"language_code": "en", "question": "Q2", "answer": "A2"}]
+        },
+        headers={"Authorization": f"Bearer {tokens['access_token']}"},
+    )
+    assert response.status_code == 200
+
+    refreshed = client.get(f"/public/listings/{listing.id}/faqs")
+    assert refreshed.json()["items"][0]["question"] == "Q2"
+
+
+def test_guide_etag_conditional_requests(
+    client: SimpleTestClient, db_session: Session, async_bind: Engine
+):
+    listing = _create_listing(db_session)
+    _create_published_consent(db_session, listing)
+    _create_guide_content(db_session, listing)
+
+    first = client.get(f"/public/listings/{listing.id}/faqs", params={"language": "es"})
+    etag = first.headers["etag"]
+    assert first.status_code == 200
+    assert etag.startswith('"')
+
+    not_modified = client.get(
+        f"/public/listings/{listing.id}/faqs",
+        params={"language": "es"},
+        headers={"If-None-Match": etag},
+    )
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+
+    guide_cache.clear()
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = async_bind
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        cold = client.get(
+            f"/public/listings/{listing.id}/faqs",
+            params={"language": "es"},
+            headers={"If-None-Match": f'W/{etag}, "other"'},
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert cold.status_code == 304
+    assert len(statements) == 1
+
+    consent = client.get(f"/public/listings/{listing.id}/consent")
+    assert consent.status_code == 200
+    consent_304 = client.get(
+        f"/public/listings/{listing.id}/consent", headers={"If-None-Match": consent.headers["etag"]}
+    )
+    assert consent_304.status_code == 304
+
+    faq = db_session.query(FAQ).filter(FAQ.listing_id == listing.id).first()
+    faq.is_active = False
+    db_session.commit()
+    rebuild_snapshots(db_session, listing.id, None)
+    guide_cache.clear()
+    changed = client.get(
+        f"/public/listings/{listing.id}/faqs",
+        params={"language": "es"},
+        headers={"If-None-Match": etag},
+    )
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()["items"] == []
+
+
+def test_guide_reads_come_from_snapshots(
+    client: SimpleTestClient, db_session: Session, async_bind: Engine
+):
+    listing = _create_listing(db_session)
+    _create_guide_content(db_session, listing)
+    _create_page_description(db_session, listing)
+
+    live = client.get(f"/public/listings/{listing.id}/faqs", params={"language": "es"})
+    assert live.status_code == 200
+    snapshots = (
+        db_session.query(GuideSnapshot)
+        .filter(GuideSnapshot.listing_id == listing.id)
+        .order_by(GuideSnapshot.language_code)
+        .all()
+    )
+    assert [snapshot.language_code for snapshot in snapshots] == ["en", "es"]
+    assert snapshots[1].document["faqs"][0]["question"] == "P1"
+    assert snapshots[1].document["tutorials"][0]["language_code"] == "en"
+
+    guide_cache.clear()
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = async_bind
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.get(
+            f"/public/listings/{listing.id}/page-descriptions", params={"language": "fr"}
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert response.status_code == 200
+    assert response.json()["items"][0]["body"] == "Welcome to the property."
+    assert len(statements) == 1
+    assert "guide_snapshots" in statements[0]
+
+
+def test_guide_revalidation_skips_the_snapshot_document(
+    client: SimpleTestClient, db_session: Session, async_bind: Engine
+):
+    listing = _create_listing(db_session)
+    _create_published_consent(db_session, listing)
+    _create_guide_content(db_session, listing)
+    client.get(f"/public/listings/{listing.id}/guide", params={"language": "es"})
+    guide_cache.clear()
+    guide = client.get(f"/public/listings/{listing.id}/guide", params={"language": "es"})
+    guide_cache.clear()
+
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_bind, "before_cursor_execute", record)
+    try:
+        response = client.get(
+            f"/public/listings/{listing.id}/guide",
+            params={"language": "es"},
+            headers={"If-None-Match": guide.headers["etag"]},
+        )
+    finally:
+        event.remove(async_bind, "before_cursor_execute", record)
+    assert response.status_code == 304
+    assert statements
+    assert not any("guide_snapshots.document" in statement for statement in statements)
+
+
+def test_rebuild_replaces_a_snapshot_saved_concurrently(db_session: Session, monkeypatch):
+    listing = _create_listing(db_session)
+    _create_guide_content(db_session, listing)
+    listing_id = listing.id
+    # a rebuild on another worker read the guide before the edit and committed after our delete
+    db_session.add(
+        GuideSnapshot(
+            listing_id=listing_id,
+            specific_item="",
+            language_code="es",
+            checksum="stale",
+            document={"faqs": [], "tutorials": [], "page_descriptions": []},
+        )
+    )
+    db_session.commit()
+    monkeypatch.setattr(guide_snapshot, "discard_snapshots", lambda *args, **kwargs: None)
+
+    assert rebuild_snapshots(db_session, listing_id, None) == 2
+    db_session.expire_all()
+    snapshot = (
+        db_session.query(GuideSnapshot)
+        .filter(GuideSnapshot.listing_id == listing_id, GuideSnapshot.language_code == "es")
+        .one()
+    )
+    assert snapshot.checksum != "stale"
+    assert snapshot.document["faqs"][0]["question"] == "P1"
+
+
+def test_unknown_specific_items_do_not_create_snapshots(
+    client: SimpleTestClient, db_session: Session
+):
+    listing = _create_listing(db_session)
+    _create_guide_content(db_session, listing)
+    listing_id = listing.id
+
+    for _ in range(3):
+        junk = uuid.uuid4().hex
+        response = client.get(f"/public/listings/{listing_id}/{junk}/faqs")
+        assert response.status_code == 200
+        assert response.json()["items"] == []
+    assert client.get(f"/public/listings/{listing_id}/faqs").status_code == 200
+
+    scopes = {
+        snapshot.specific_item
+        for snapshot in db_session.query(GuideSnapshot).filter(
+            GuideSnapshot.listing_id == listing_id
+        )
+    }
+    assert scopes == {""}
+
+
+def test_deleting_a_listing_discards_its_snapshots(
+    client: SimpleTestClient, db_session: Session
+):
+    listing = _create_listing(db_session)
+    _create_guide_content(db_session, listing)
+    _create_specific_guide_content(db_session, listing, "room-7")
+    listing_id = listing.id
+    rebuild_snapshots(db_session, listing_id, None)
+    rebuild_snapshots(db_session, listing_id, "room-7")
+    assert client.get(f"/public/listings/{listing_id}/faqs").status_code == 200
+
+    admin = _create_admin(db_session)
+    tokens = login(client, admin.email, "Secretpass1!")
+    deleted = client.request(
+        "DELETE",
+        f"/admin/listings/{listing_id}",
+        headers={"Authorization": f"Bearer {tokens['access_token']}"},
+    )
+    assert deleted.status_code == 204
+
+    assert (
+        db_session.query(GuideSnapshot).filter(GuideSnapshot.listing_id == listing_id).count()
+        == 0
+    )
+    assert client.get(f"/public/listings/{listing_id}/faqs").status_code == 404
+    assert client.get(f"/public/listings/{listing_id}/room-7/faqs").status_code == 404
+
+
+def test_language_fallback_resolves_in_one_statement(db_session: Session):
+    listing = _create_listing(db_session)
+    template = _create_published_consent(db_session, listing)
+    _create_guide_content(db_session, listing)
+    tutorial = db_session.query(Tutorial).filter(Tutorial.listing_id == listing.id).first()
+    db_session.add(
+        TutorialTranslation(
+            tutorial=Tutorial(listing_id=listing.id, is_active=True),
+            language_code="es",
+            title="Solo español",
+            video_url="https://example.com/es",
+        )
+    )
+    db_session.commit()
+    listing_id, tutorial_id = listing.id, tutorial.id
+
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        items = build_section_items(db_session, TUTORIALS, listing_id, None, "es")
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert len(statements) == 1
+    assert (items[0]["id"], items[0]["language_code"]) == (tutorial_id, "en")
+    assert items[1]["title"] == "Solo español"
+
+    db_session.refresh(listing)
+    assert listing.current_template_id == template.id
+    assert lookup_consent(db_session, listing_id, language_chain(["es"]))[1].language_code == "es"
+    assert lookup_consent(db_session, listing_id, language_chain(["fr"]))[1].language_code == "en"
+
+
+def test_consent_read_is_a_single_statement(
+    client: SimpleTestClient, db_session: Session, async_bind: Engine
+):
+    listing = _create_listing(db_session)
+    empty_listing = _create_listing(db_session)
+    template = _create_published_consent(db_session, listing)
+    listing_id, empty_listing_id, template_id = listing.id, empty_listing.id, template.id
+
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = async_bind
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.get(
+            f"/public/listings/{listing_id}/consent", params={"language": "fr"}
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert response.status_code == 200
+    assert response.json()["template_id"] == template_id
+    assert response.json()["translation"]["language_code"] == "en"
+    assert len(statements) == 1
+
+    missing_template = client.get(f"/public/listings/{empty_listing_id}/consent")
+    assert missing_template.status_code == 404
+    assert missing_template.json()["detail"] == "Consent template not found"
+    missing_listing = client.get("/public/listings/999999/consent")
+    assert missing_listing.status_code == 404
+    assert missing_listing.json()["detail"] == "Listing not found"
+
+
+def test_accept_language_negotiation(client: SimpleTestClient, db_session: Session):
+    listing = _create_listing(db_session)
+    _create_published_consent(db_session, listing)
+    _create_guide_content(db_session, listing)
+
+    regional = client.get(
+        f"/public/listings/{listing.id}/faqs", headers={"Accept-Language": "es-MX,en;q=0.5"}
+    )
+    assert regional.status_code == 200
+    assert regional.headers["content-language"] == "es"
+    assert regional.headers["vary"] == "Accept-Language"
+    assert regional.json()["items"][0]["language_code"] == "es"
+
+    upper = client.get(f"/public/listings/{listing.id}/guide", params={"language": "ES"})
+    assert upper.json()["language"] == "es"
+    assert upper.json()["faqs"][0]["language_code"] == "es"
+
+    consent = client.get(
+        f"/public/listings/{listing.id}/consent", headers={"Accept-Language": "fr, es;q=0.8"}
+    )
+    assert consent.headers["content-language"] == "es"
+    assert consent.json()["translation"]["language_code"] == "es"
+
+    fallback = client.get(
+        f"/public/listings/{listing.id}/tutorials", headers={"Accept-Language": "de-DE"}
+    )
+    assert fallback.headers["content-language"] == "en"
@@ -0,0 +1,182 @@
+import time
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from tests.conftest import SimpleTestClient
+from tests.test_admin_auth import login
+from tests.test_public_flow import _create_listing, _create_published_consent
+
+from app.db.replicas import ReplicaRouter
+from app.db.session import async_database_url, read_router
+from app.models import AdminRoleEnum, AdminUser, Base, Listing
+from app.services import guide
+from app.services.guide import cacheable, guide_cache, invalidate_guide_cache, load_consent
+from app.utils.cache import MemoryCacheBackend
+from app.utils.rate_limiter import rate_limiter
+from app.utils.security import get_password_hash
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _router(clock: FakeClock, count: int = 0) -> ReplicaRouter:
+    router = ReplicaRouter(
+        [], eject_seconds=30, sticky_seconds=5, async_url=async_database_url, clock=clock
+    )
+    for _ in range(count):
+        router.add_replica(create_engine("sqlite://"))
+    return router
+
+
+@pytest.fixture()
+def replica(tmp_path):
+    replica_engine = create_engine(
+        f"sqlite:///{tmp_path / 'replica.db'}", connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(replica_engine)
+    read_router.add_replica(replica_engine)
+    yield replica_engine
+    read_router.engines.clear()
+    read_router.async_engines.clear()
+    read_router._ejected_until.clear()
+    read_router.backend.clear("replica:")
+    replica_engine.dispose()
+
+
+def test_router_round_robins_healthy_replicas():
+    router = _router(FakeClock(), count=3)
+
+    assert [router.choose() for _ in range(6)] == [0, 1, 2, 0, 1, 2]
+
+
+def test_router_without_replicas_reads_from_primary():
+    assert _router(FakeClock()).route({}) is None
+
+
+def test_failed_connection_ejects_replica_until_timeout(tmp_path):
+    clock = FakeClock()
+    router = _router(clock, count=1)
+    router.add_replica(create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"))
+
+    with pytest.raises(OperationalError):
+        with router.engines[1].connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+    assert router.healthy() == [0]
+    assert {router.choose() for _ in range(4)} == {0}
+    assert [entry["healthy"] for entry in router.stats()] == [True, False]
+
+    clock.now += 31
+    assert router.healthy() == [0, 1]
+
+
+def test_sql_errors_do_not_eject_replica():
+    router = _router(FakeClock(), count=1)
+
+    with pytest.raises(OperationalError):
+        with router.engines[0].connect() as connection:
+            connection.execute(text("SELECT * FROM missing_table"))
+
+    assert router.healthy() == [0]
+
+
+def test_sticky_token_reads_from_primary_until_window_passes():
+    clock = FakeClock()
+    router = _router(clock, count=1)
+    headers = {"authorization": "Bearer abc"}
+
+    router.stick("abc")
+    assert router.route(headers) is None
+    assert router.route({"authorization": "Bearer other"}) == 0
+
+    clock.now += 6
+    assert router.route(headers) == 0
+
+
+def test_sticky_token_is_shared_by_routers_on_one_backend():
+    clock = FakeClock()
+    backend = MemoryCacheBackend(clock)
+    workers = [
+        ReplicaRouter(
+            [],
+            eject_seconds=30,
+            sticky_seconds=5,
+            async_url=async_database_url,
+            clock=clock,
+            backend=backend,
+        )
+        for _ in range(2)
+    ]
+    for router in workers:
+        router.add_replica(create_engine("sqlite://"))
+    headers = {"authorization": "Bearer abc"}
+
+    workers[0].stick("abc")
+    assert workers[1].route(headers) is None
+
+    clock.now += 6
+    assert workers[1].route(headers) == 0
+
+
+def test_replica_reads_are_not_cached_right_after_a_write(
+    db_session: Session, monkeypatch
+):
+    monkeypatch.setattr(guide.settings, "replica_sticky_seconds", 0.2)
+    listing = _create_listing(db_session)
+    _create_published_consent(db_session, listing)
+    key = (listing.id, None, "consent", ("en",))
+    guide_cache.clear()
+
+    invalidate_guide_cache(listing.id)
+    db_session.info["primary_bind"] = db_session.get_bind()
+    try:
+        assert not cacheable(db_session, listing.id)
+        load_consent(db_session, listing.id, ["en"])
+        assert guide_cache.get(key) is None
+
+        time.sleep(0.25)
+        load_consent(db_session, listing.id, ["en"])
+        assert guide_cache.get(key) is not None
+    finally:
+        del db_session.info["primary_bind"]
+        guide_cache.clear()
+
+
+def test_admin_list_reads_from_replica_until_a_write(
+    client: SimpleTestClient, db_session: Session, replica
+):
+    rate_limiter._buckets.clear()
+    admin = AdminUser(
+        email="replica-admin@example.com",
+        hashed_password=get_password_hash("Secretpass1!"),
+        role=AdminRoleEnum.SUPERADMIN.value,
+    )
+    db_session.add(admin)
+    db_session.commit()
+
+    tokens = login(client, admin.email, "Secretpass1!")
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    with Session(replica) as replica_db:
+        replica_db.add(Listing(name="Replica only", slug=f"replica-{uuid.uuid4().hex[:8]}"))
+        replica_db.commit()
+
+    names = [item["name"] for item in client.get("/admin/listings", headers=headers).json()]
+    assert names == ["Replica only"]
+
+    slug = f"primary-{uuid.uuid4().hex[:8]}"
+    created = client.post(
+        "/admin/listings", json={"name": "Primary", "slug": slug}, headers=headers
+    )
+    assert created.status_code == 200
+
+    slugs = [item["slug"] for item in client.get("/admin/listings", headers=headers).json()]
+    assert slug in slugs
@@ -0,0 +1,62 @@
+import json
+from datetime import datetime, timezone
+from enum import Enum
+
+import pytest
+
+from app.utils import responses
+from app.utils.responses import FastJSONResponse, accepts_encoding, json_dumps
+
+
+class Color(str, Enum):
+    RED = "red"
+
+
+PAYLOAD = {
+    "created_at": datetime(2024, 8, 1, 12, 30, tzinfo=timezone.utc),
+    "color": Color.RED,
+    "title": "Consentimiento",
+    "items": [1, 2.5, None, True],
+}
+
+EXPECTED = {
+    "created_at": "2024-08-01T12:30:00+00:00",
+    "color": "red",
+    "title": "Consentimiento",
+    "items": [1, 2.5, None, True],
+}
+
+
+def test_json_dumps_matches_jsonable_encoder_output():
+    assert json.loads(json_dumps(PAYLOAD)) == EXPECTED
+
+
+def test_stdlib_fallback(monkeypatch):
+    monkeypatch.setattr(responses, "orjson", None)
+    body = FastJSONResponse(PAYLOAD).body
+    assert json.loads(body) == EXPECTED
+    assert "Consentimiento".encode("utf-8") in body
+
+
+def test_unserializable_values_raise():
+    with pytest.raises(TypeError):
+        json_dumps({"value": object()})
+
+
+@pytest.mark.parametrize(
+    ("header", "accepted"),
+    [
+        ("gzip, deflate", True),
+        ("GZIP;q=0.5", True),
+        ("gzip;q=0", False),
+        ("deflate, gzip;q=0.0", False),
+        ("*", True),
+        ("*;q=0", False),
+        ("gzip;q=0, *", False),
+        ("br", False),
+        (None, False),
+    ],
+)
+def test_accepts_encoding_honours_q_values(header, accepted):
+    assert accepts_encoding(header, "gzip") is accepted
+
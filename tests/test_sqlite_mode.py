@@ -0,0 +1,121 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import create_sqlite_engines
+from app.db.sqlite import WRITING, RoutingSession, is_sqlite_file, write_gate
+from app.models import Base, ConsentLog, Listing
+
+
+@pytest.fixture()
+def sqlite_session(tmp_path):
+    reader, writer = create_sqlite_engines(f"sqlite:///{tmp_path / 'app.db'}")
+    Base.metadata.create_all(writer)
+    factory = sessionmaker(class_=RoutingSession, reader=reader, writer=writer, autoflush=False)
+    yield factory
+    reader.dispose()
+    writer.dispose()
+
+
+def test_is_sqlite_file():
+    assert is_sqlite_file("sqlite:///./app.db")
+    assert is_sqlite_file("sqlite+aiosqlite:////var/lib/app.db")
+    assert not is_sqlite_file("sqlite://")
+    assert not is_sqlite_file("sqlite:///:memory:")
+    assert not is_sqlite_file("postgresql://db/app")
+
+
+def test_connections_use_wal_and_pragmas(sqlite_session):
+    with sqlite_session() as db:
+        for engine in (db.reader, db.writer):
+            with engine.connect() as connection:
+                assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+                assert connection.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+                assert connection.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+                assert connection.exec_driver_sql("PRAGMA foreign_keys").scalar() == 1
+        assert db.writer.pool.size() == 1
+
+
+def test_reads_use_reader_until_transaction_writes(sqlite_session):
+    with sqlite_session() as db:
+        assert db.get_bind(Listing) is db.reader
+        db.add(Listing(name="Routed", slug="routed"))
+        db.flush()
+        assert db.get_bind(Listing) is db.writer
+        assert db.scalar(select(func.count(Listing.id))) == 1
+        db.commit()
+
+        assert WRITING not in db.info
+        assert db.get_bind(Listing) is db.reader
+        assert db.get_bind(clause=text("SELECT 1")) is db.reader
+        assert db.get_bind(clause=Listing.__table__.delete()) is db.writer
+
+
+def test_concurrent_writers_do_not_hit_locked_errors(sqlite_session):
+    with sqlite_session() as db:
+        listing = Listing(name="Burst", slug="burst")
+        db.add(listing)
+        db.commit()
+        listing_id = listing.id
+
+    def submit(index: int) -> None:
+        with sqlite_session() as db:
+            db.scalar(select(Listing.id).where(Listing.id == listing_id))
+            db.add(
+                ConsentLog(
+                    listing_id=listing_id,
+                    template_version=1,
+                    language_code="en",
+                    decision="accept",
+                    email=f"guest{index}@example.com",
+                )
+            )
+            db.commit()
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(submit, range(200)))
+
+    with sqlite_session() as db:
+        assert db.scalar(select(func.count(ConsentLog.id))) == 200
+
+
+
+def test_sync_and_async_writers_share_one_write_gate(sqlite_session, tmp_path):
+    gate = write_gate(str(tmp_path / "app.db"))
+    events: list[str] = []
+
+    async def write_async() -> None:
+        _, writer = create_sqlite_engines(f"sqlite+aiosqlite:///{tmp_path / 'app.db'}")
+
+        async def tick() -> None:
+            await asyncio.sleep(0.05)
+            events.append("loop ran")
+
+        ticker = asyncio.create_task(tick())
+        async with writer.begin() as connection:
+            events.append("async writer began")
+            await connection.execute(insert(Listing).values(name="Async", slug="async"))
+        await ticker
+        await writer.dispose()
+
+    with sqlite_session() as db:
+        db.add(Listing(name="Gate", slug="gate"))
+        db.flush()
+        assert gate._lock.locked()
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            pending = pool.submit(asyncio.run, write_async())
+            time.sleep(0.3)
+            assert not pending.done()
+            events.append("sync writer committed")
+            db.commit()
+            pending.result()
+
+    # the async writer waited for the gate off the event loop
+    assert events == ["loop ran", "sync writer committed", "async writer began"]
+    assert not gate._lock.locked()
+    with sqlite_session() as db:
+        assert db.scalar(select(func.count(Listing.id))) == 2
@@ -0,0 +1,169 @@
+import json
+import time
+
+from sqlalchemy.orm import Session
+
+from tests.conftest import SimpleTestClient
+from tests.test_admin_auth import login
+from tests.test_public_flow import (
+    _create_admin,
+    _create_guide_content,
+    _create_listing,
+    _create_published_consent,
+    _create_specific_guide_content,
+)
+
+from app.api.routers.admin import static_export as static_export_route
+from app.models import FAQ, FAQTranslation
+from app.services import static_export
+from app.services.static_export import export_static_guides, static_file_path
+
+
+def test_export_renders_every_scope_and_language(db_session: Session, tmp_path):
+    listing = _create_listing(db_session)
+    _create_published_consent(db_session, listing)
+    _create_guide_content(db_session, listing)
+    _create_specific_guide_content(db_session, listing, "room-101")
+    engine = db_session.get_bind()
+
+    result = export_static_guides(engine, output_dir=tmp_path, listing_ids=[listing.id], workers=1)
+    assert result["exported"] == [listing.id]
+
+    guide = json.loads(static_file_path(tmp_path, listing.id, None, "es", "guide").read_text())
+    assert guide["language"] == "es"
+    assert guide["faqs"][0]["question"] == "P1"
+    assert guide["consent"]["translation"]["language_code"] == "es"
+    consent = json.loads(static_file_path(tmp_path, listing.id, None, "en", "consent").read_text())
+    assert consent["translation"]["body"] == "English body"
+    assert static_file_path(tmp_path, listing.id, "room-101", "en", "faqs").is_file()
+    assert not static_file_path(tmp_path, listing.id, "room-101", "en", "consent").exists()
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    assert str(listing.id) in manifest
+
+
+def test_export_is_incremental(db_session: Session, tmp_path):
+    listing = _create_listing(db_session)
+    other = _create_listing(db_session)
+    _create_guide_content(db_session, listing)
+    engine = db_session.get_bind()
+    ids = [listing.id, other.id]
+
+    first = export_static_guides(engine, output_dir=tmp_path, listing_ids=ids, workers=1)
+    assert first["exported"] == ids
+    second = export_static_guides(engine, output_dir=tmp_path, listing_ids=ids, workers=1)
+    assert second["exported"] == []
+    assert second["unchanged"] == ids
+
+    time.sleep(0.01)
+    translation = (
+        db_session.query(FAQTranslation)
+        .join(FAQ)
+        .filter(FAQ.listing_id == listing.id, FAQTranslation.language_code == "es")
+        .one()
+    )
+    translation.question = "Nueva"
+    db_session.commit()
+    third = export_static_guides(engine, output_dir=tmp_path, listing_ids=ids, workers=1)
+    assert third["exported"] == [listing.id]
+    faqs = json.loads(static_file_path(tmp_path, listing.id, None, "es", "faqs").read_text())
+    assert faqs["items"][0]["question"] == "Nueva"
+
+    other_id = other.id
+    db_session.delete(other)
+    db_session.commit()
+    fourth = export_static_guides(engine, output_dir=tmp_path, listing_ids=ids, workers=1)
+    assert fourth["removed"] == [other_id]
+    assert not (tmp_path / str(other_id)).exists()
+
+
+def test_rerender_swaps_the_listing_directory(db_session: Session, tmp_path):
+    listing = _create_listing(db_session)
+    _create_guide_content(db_session, listing)
+    engine = db_session.get_bind()
+    target = tmp_path / str(listing.id)
+    # a plain directory from an export made before renders were swapped in
+    static_file_path(tmp_path, listing.id, None, "en", "stale").parent.mkdir(parents=True)
+    static_file_path(tmp_path, listing.id, None, "en", "stale").write_text("{}")
+
+    export_static_guides(engine, output_dir=tmp_path, listing_ids=[listing.id], workers=1)
+    assert target.is_symlink()
+    assert not static_file_path(tmp_path, listing.id, None, "en", "stale").exists()
+    first = target.resolve()
+
+    export_static_guides(
+        engine, output_dir=tmp_path, listing_ids=[listing.id], force=True, workers=1
+    )
+    assert target.resolve() != first
+    assert not first.exists()
+    assert static_file_path(tmp_path, listing.id, None, "es", "faqs").is_file()
+    assert sorted(path.name for path in tmp_path.iterdir() if path.name != "manifest.json") == [
+        target.resolve().name,
+        str(listing.id),
+    ]
+
+
+def test_static_route_serves_exported_files(
+    client: SimpleTestClient, db_session: Session, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(static_export.settings, "static_export_dir", str(tmp_path))
+    monkeypatch.setattr(static_export.settings, "static_export_workers", 4)
+    listing = _create_listing(db_session)
+    _create_published_consent(db_session, listing)
+    _create_guide_content(db_session, listing)
+    listing_id = listing.id
+
+    missing = client.get(f"/public/static/listings/{listing_id}/faqs")
+    assert missing.status_code == 404
+
+    calls = []
+    export = static_export_route.export_static_guides
+
+    def record(*args, **kwargs):
+        calls.append(kwargs["workers"])
+        return export(*args, **kwargs)
+
+    monkeypatch.setattr(static_export_route, "export_static_guides", record)
+    admin = _create_admin(db_session)
+    tokens = login(client, admin.email, "Secretpass1!")
+    triggered = client.post(
+        "/admin/static-export",
+        params={"listing_id": str(listing_id)},
+        headers={"Authorization": f"Bearer {tokens['access_token']}"},
+    )
+    assert triggered.status_code == 202
+    # the process pool is for the CLI, not the API worker running the background task
+    assert calls == [1]
+
+    response = client.get(
+        f"/public/static/listings/{listing_id}/faqs", headers={"Accept-Language": "es-MX"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-language"] == "es"
+    assert response.headers["cache-control"].startswith("public")
+    assert response.json()["items"][0]["question"] == "P1"
+
+    fallback = client.get(f"/public/static/listings/{listing_id}/consent", params={"language": "fr"})
+    assert fallback.json()["translation"]["language_code"] == "en"
+    assert client.get(f"/public/static/listings/{listing_id}/secrets").status_code == 404
+
+
+def test_static_route_stays_inside_the_export_root(
+    client: SimpleTestClient, tmp_path, monkeypatch
+):
+    root = tmp_path / "export"
+    monkeypatch.setattr(static_export.settings, "static_export_dir", str(root))
+    secret = tmp_path / "secret" / "guide.json"
+    secret.parent.mkdir(parents=True)
+    secret.write_text('{"secret": true}')
+    (root / "1" / "_").mkdir(parents=True)
+
+    traversal = client.get(
+        "/public/static/listings/1/guide", params={"language": "../../../secret"}
+    )
+    assert traversal.status_code == 404
+    header = client.get(
+        "/public/static/listings/1/guide", headers={"Accept-Language": "../../../secret"}
+    )
+    assert header.status_code == 404
+    scope = client.get("/public/static/listings/1/../guide", params={"language": "en"})
+    assert scope.status_code == 404